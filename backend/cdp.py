@@ -0,0 +1,254 @@
+import os
+import json
+import base64
+import logging
+import threading
+import itertools
+import concurrent.futures
+import requests
+import websocket
+
+# Limits for what a client may ask of the screencast
+FORMATS = {"jpeg", "png"}
+QUALITY_RANGE = (10, 95)
+WIDTH_RANGE = (240, 1920)
+HEIGHT_RANGE = (180, 1080)
+
+def clamp(value, bounds):
+    return max(bounds[0], min(bounds[1], int(value)))
+
+def screencast_settings(format=None, quality=None, max_width=None, max_height=None):
+    # Client-requested settings, clamped, with server defaults for anything not asked for
+    format = format if format in FORMATS else os.environ.get("SCREENCAST_FORMAT", "jpeg")
+    return (
+        format,
+        clamp(quality if quality is not None else os.environ.get("SCREENCAST_QUALITY", 60), QUALITY_RANGE),
+        clamp(max_width if max_width is not None else os.environ.get("SCREENCAST_MAX_WIDTH", 960), WIDTH_RANGE),
+        clamp(max_height if max_height is not None else os.environ.get("SCREENCAST_MAX_HEIGHT", 720), HEIGHT_RANGE),
+    )
+
+# Keys that need more than their text to do anything (Windows virtual key codes)
+SPECIAL_KEYS = {
+    "Enter": 13, "Backspace": 8, "Tab": 9, "Escape": 27, "Delete": 46, " ": 32,
+    "ArrowLeft": 37, "ArrowUp": 38, "ArrowRight": 39, "ArrowDown": 40,
+    "Home": 36, "End": 35, "PageUp": 33, "PageDown": 34,
+}
+
+def input_commands(event, width, height):
+    # One interaction event from the client to the CDP Input commands that replay it.
+    # Coordinates are fractions (0-1) of the view unless the event says normalized: false.
+    kind = event.get("type")
+    scale = (width, height) if event.get("normalized", True) else (1, 1)
+    x = round(float(event.get("x", 0)) * scale[0])
+    y = round(float(event.get("y", 0)) * scale[1])
+    if kind == "move":
+        return [("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": x, "y": y})]
+    if kind == "click":
+        button = event.get("button", "left")
+        count = int(event.get("count", 1))
+        return [
+            ("Input.dispatchMouseEvent", {"type": "mouseMoved", "x": x, "y": y}),
+            ("Input.dispatchMouseEvent", {"type": "mousePressed", "x": x, "y": y, "button": button, "clickCount": count}),
+            ("Input.dispatchMouseEvent", {"type": "mouseReleased", "x": x, "y": y, "button": button, "clickCount": count}),
+        ]
+    if kind == "scroll":
+        return [("Input.dispatchMouseEvent", {"type": "mouseWheel", "x": x, "y": y,
+                                               "deltaX": float(event.get("dx", 0)), "deltaY": float(event.get("dy", 0))})]
+    if kind == "key":
+        key = event["key"]
+        params = {"key": key, "code": event.get("code", ""), "windowsVirtualKeyCode": SPECIAL_KEYS.get(key, 0)}
+        down = {"type": "keyDown", **params}
+        if len(key) == 1:
+            # Printable keys also produce their character
+            down["text"] = key
+        return [("Input.dispatchKeyEvent", down), ("Input.dispatchKeyEvent", {"type": "keyUp", **params})]
+    if kind == "type":
+        return [("Input.insertText", {"text": event.get("text", "")})]
+    raise ValueError(f"Unknown input event type '{kind}'")
+
+EVENT_TYPES = {"move", "click", "scroll", "key", "type"}
+NUMERIC_FIELDS = ("x", "y", "dx", "dy", "count")
+
+def interaction_events(message):
+    # The events of a client interaction message, checked up front so a malformed batch
+    # is rejected whole instead of failing halfway through dispatch. Raises ValueError.
+    if not isinstance(message, dict):
+        raise ValueError("Message must be a JSON object")
+    events = message.get("events", [])
+    if not isinstance(events, list):
+        raise ValueError("'events' must be a list")
+    for event in events:
+        if not isinstance(event, dict):
+            raise ValueError("Each event must be a JSON object")
+        if event.get("type") not in EVENT_TYPES:
+            raise ValueError(f"Unknown input event type '{event.get('type')}'")
+        for field in NUMERIC_FIELDS:
+            value = event.get(field)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise ValueError(f"'{field}' must be a number")
+        if event["type"] == "key" and not (isinstance(event.get("key"), str) and event["key"]):
+            raise ValueError("Key events need a 'key'")
+        if event["type"] == "type" and not isinstance(event.get("text", ""), str):
+            raise ValueError("'text' must be a string")
+    return events
+
+def debugger_address(driver):
+    return driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+
+# A DevTools websocket connection to the page target of a Selenium-driven Chrome.
+# Runs Page.startScreencast: Chrome pushes a downscaled frame whenever the page
+# repaints, and the latest one is cached here so viewers never touch the driver.
+class CDPSession:
+    def __init__(self, address, timeout=10):
+        self.address = address
+        self.timeout = timeout
+        self.ws = None
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        self.frame_cond = threading.Condition()
+        self.frame = None # (frame_id, image bytes, metadata)
+        self.frame_ids = itertools.count(1)
+        self.settings = None
+        self.closed = False
+
+    def connect(self):
+        targets = requests.get(f"http://{self.address}/json", timeout=self.timeout).json()
+        # The first page target is the tab Selenium is looking at
+        page = next(t for t in targets if t.get("type") == "page")
+        # No Origin header: Chrome rejects unknown origins unless --remote-allow-origins is set
+        self.ws = websocket.create_connection(page["webSocketDebuggerUrl"], timeout=self.timeout, suppress_origin=True)
+        self.ws.settimeout(None)
+        threading.Thread(target=self.read_loop, name="cdp-reader", daemon=True).start()
+
+    def send(self, method, params=None, wait=True):
+        message_id = next(self.ids)
+        future = concurrent.futures.Future()
+        with self.pending_lock:
+            # Once the reader is gone nothing would ever answer
+            if self.closed:
+                raise RuntimeError("Screencast connection is closed")
+            self.pending[message_id] = future
+        with self.send_lock:
+            self.ws.send(json.dumps({"id": message_id, "method": method, "params": params or {}}))
+        if not wait:
+            return future
+        return future.result(self.timeout)
+
+    def read_loop(self):
+        try:
+            while True:
+                message = json.loads(self.ws.recv())
+                if "id" in message:
+                    with self.pending_lock:
+                        future = self.pending.pop(message["id"], None)
+                    if future is not None:
+                        if "error" in message:
+                            future.set_exception(RuntimeError(message["error"].get("message", "CDP error")))
+                        else:
+                            future.set_result(message.get("result", {}))
+                elif message.get("method") == "Page.screencastFrame":
+                    self.on_frame(message["params"])
+        except Exception as e:
+            if not self.closed:
+                logging.info(f"Screencast connection closed: {e}")
+        finally:
+            with self.pending_lock:
+                self.closed = True
+                pending = list(self.pending.values())
+                self.pending.clear()
+            for future in pending:
+                future.cancel()
+            with self.frame_cond:
+                self.frame_cond.notify_all()
+
+    def on_frame(self, params):
+        # Ack right away, Chrome sends the next frame only after the previous one is acked
+        self.send("Page.screencastFrameAck", {"sessionId": params["sessionId"]}, wait=False)
+        with self.frame_cond:
+            self.frame = (next(self.frame_ids), base64.b64decode(params["data"]), params.get("metadata", {}))
+            self.frame_cond.notify_all()
+
+    def start_screencast(self, settings):
+        if settings == self.settings:
+            return
+        if self.settings is not None:
+            self.send("Page.stopScreencast")
+        format, quality, max_width, max_height = settings
+        self.send("Page.startScreencast", {"format": format, "quality": quality, "maxWidth": max_width, "maxHeight": max_height, "everyNthFrame": 1})
+        self.settings = settings
+
+    def viewport_size(self):
+        # CSS size of the page viewport, as reported with the last frame
+        metadata = self.frame[2] if self.frame is not None else {}
+        if metadata.get("deviceWidth"):
+            return metadata["deviceWidth"], metadata["deviceHeight"]
+        result = self.send("Runtime.evaluate", {"expression": "[window.innerWidth, window.innerHeight]", "returnByValue": True})
+        return tuple(result["result"]["value"])
+
+    def dispatch(self, events):
+        # Sends the whole batch back to back and then waits for all the replies, so a
+        # batch costs one round trip to Chrome instead of one per command. Chrome runs
+        # the commands of a connection in order.
+        width, height = self.viewport_size()
+        commands = [command for event in events for command in input_commands(event, width, height)]
+        futures = [self.send(method, params, wait=False) for method, params in commands]
+        for future in futures:
+            future.result(self.timeout)
+        return len(commands)
+
+    def latest_frame(self):
+        return self.frame
+
+    def wait_for_frame(self, after_id, timeout):
+        # Blocks until a frame newer than after_id arrives (or the timeout passes)
+        with self.frame_cond:
+            self.frame_cond.wait_for(lambda: self.closed or (self.frame is not None and self.frame[0] > after_id), timeout)
+            return self.frame
+
+    def close(self):
+        self.closed = True
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+# One screencast session per browser, opened on first view and closed when the job
+# lets go of the browser.
+class ScreencastRegistry:
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, driver, settings):
+        key = driver.session_id
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is not None and session.closed:
+                session = None
+            if session is None:
+                address = debugger_address(driver)
+                if not address:
+                    raise RuntimeError("Browser has no DevTools address")
+                session = CDPSession(address)
+                session.connect()
+                self.sessions[key] = session
+            # The most recent viewer's settings win
+            session.start_screencast(settings)
+            return session
+
+    def close(self, driver):
+        if driver is None:
+            return
+        with self.lock:
+            session = self.sessions.pop(driver.session_id, None)
+        if session is not None:
+            session.close()
+
+    def close_all(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
@@ -0,0 +1,46 @@
+import json
+import asyncio
+import threading
+
+# Fan-out of job events from worker threads to async subscribers (SSE streams).
+# Every job keeps its event history so a client that connects late (or reconnects
+# with Last-Event-ID) still receives everything it missed.
+class EventBroker:
+    def __init__(self):
+        self.history = {} # job_id -> list of events
+        self.subscribers = {} # job_id -> list of (loop, queue)
+        self.lock = threading.Lock()
+
+    def publish(self, job_id, event, data):
+        with self.lock:
+            history = self.history.setdefault(job_id, [])
+            item = {"id": len(history) + 1, "event": event, "data": data}
+            history.append(item)
+            subscribers = list(self.subscribers.get(job_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # The subscriber's event loop is already closed
+                pass
+
+    def subscribe(self, job_id, loop, last_event_id=0):
+        queue = asyncio.Queue()
+        with self.lock:
+            backlog = [item for item in self.history.get(job_id, ()) if item["id"] > last_event_id]
+            self.subscribers.setdefault(job_id, []).append((loop, queue))
+        return queue, backlog
+
+    def unsubscribe(self, job_id, queue):
+        with self.lock:
+            subscribers = self.subscribers.get(job_id, [])
+            self.subscribers[job_id] = [s for s in subscribers if s[1] is not queue]
+            if not self.subscribers[job_id]:
+                del self.subscribers[job_id]
+
+    def forget(self, job_id):
+        with self.lock:
+            self.history.pop(job_id, None)
+
+def format_sse(item):
+    return f"id: {item['id']}\nevent: {item['event']}\ndata: {json.dumps(item['data'], ensure_ascii=False)}\n\n"
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import logging
+import threading
+
+# In-memory job registry with bounded retention.
+# Finished jobs expire after a TTL and, when the results of all retained jobs
+# grow past a byte budget, the oldest finished jobs are evicted first. A reaper
+# thread also quits browsers left behind by captcha sessions nobody is watching.
+class JobStore:
+    def __init__(self, ttl=None, max_result_bytes=None, abandon_timeout=None, reap_interval=None, quit_driver=None, on_evict=None):
+        self.ttl = ttl if ttl is not None else float(os.environ.get("JOB_TTL", 3600))
+        self.max_result_bytes = max_result_bytes if max_result_bytes is not None else int(os.environ.get("JOB_STORE_MAX_BYTES", 100 * 1024 * 1024))
+        self.abandon_timeout = abandon_timeout if abandon_timeout is not None else float(os.environ.get("JOB_ABANDON_TIMEOUT", 120))
+        self.reap_interval = reap_interval if reap_interval is not None else float(os.environ.get("JOB_REAP_INTERVAL", 30))
+        self.quit_driver = quit_driver
+        self.on_evict = on_evict
+        self.jobs = {}
+        self.sizes = {} # job_id -> (results list id, bytes), recomputed only when results change
+        self.lock = threading.RLock()
+        self.counters = {"expired": 0, "evicted_for_size": 0, "orphaned_drivers_reaped": 0}
+        self.stop_event = threading.Event()
+
+    def __contains__(self, job_id):
+        with self.lock:
+            return job_id in self.jobs
+
+    def __getitem__(self, job_id):
+        with self.lock:
+            return self.jobs[job_id]
+
+    def __setitem__(self, job_id, job):
+        job.setdefault('last_seen', time.time())
+        job.setdefault('updated_at', time.time())
+        with self.lock:
+            self.jobs[job_id] = job
+
+    def __delitem__(self, job_id):
+        with self.lock:
+            self.jobs.pop(job_id, None)
+            self.sizes.pop(job_id, None)
+
+    def get(self, job_id, default=None):
+        with self.lock:
+            return self.jobs.get(job_id, default)
+
+    def touch(self, job_id):
+        # A client is still looking at this job (polling, streaming, solving the captcha)
+        job = self.get(job_id)
+        if job is not None:
+            job['last_seen'] = time.time()
+
+    def result_bytes(self, job_id, job):
+        results = job['results']
+        cached = self.sizes.get(job_id)
+        if cached is None or cached[0] != id(results):
+            cached = (id(results), len(json.dumps(results, ensure_ascii=False).encode("utf-8")))
+            self.sizes[job_id] = cached
+        return cached[1]
+
+    def reap(self):
+        now = time.time()
+        orphaned = []
+        with self.lock:
+            # Drivers of captcha sessions nobody follows any more. Coalesced jobs share the
+            # leader's driver, so it is only abandoned once all attached clients are gone.
+            for job in list(self.jobs.values()):
+                if job.get('driver') is None or job['status'] != 'waiting_input' or 'leader' in job:
+                    continue
+                attached = [job] + [self.jobs[f] for f in job.get('followers', []) if f in self.jobs]
+                if now - max(j['last_seen'] for j in attached) > self.abandon_timeout:
+                    orphaned.append(job['driver'])
+                    for j in attached:
+                        j['driver'] = None
+
+            finished = sorted((job['updated_at'], job_id) for job_id, job in self.jobs.items() if job['status'] == 'completed')
+            expired = [job_id for finished_at, job_id in finished if now - finished_at > self.ttl]
+            for job_id in expired:
+                self._evict(job_id)
+            self.counters["expired"] += len(expired)
+
+            total = sum(self.result_bytes(job_id, job) for job_id, job in self.jobs.items())
+            for _, job_id in finished:
+                if total <= self.max_result_bytes:
+                    break
+                if job_id in self.jobs:
+                    total -= self.result_bytes(job_id, self.jobs[job_id])
+                    self._evict(job_id)
+                    self.counters["evicted_for_size"] += 1
+
+        for driver in orphaned:
+            logging.warning("Quitting browser of an abandoned captcha session")
+            self.counters["orphaned_drivers_reaped"] += 1
+            if self.quit_driver:
+                self.quit_driver(driver)
+
+    def _evict(self, job_id):
+        del self[job_id]
+        if self.on_evict:
+            self.on_evict(job_id)
+
+    def run_reaper(self):
+        while not self.stop_event.wait(self.reap_interval):
+            try:
+                self.reap()
+            except Exception as e:
+                logging.error(f"Job reaper failed: {e}")
+
+    def start(self):
+        threading.Thread(target=self.run_reaper, daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self):
+        with self.lock:
+            statuses = {}
+            for job in self.jobs.values():
+                statuses[job['status']] = statuses.get(job['status'], 0) + 1
+            return {
+                "jobs": len(self.jobs),
+                "by_status": statuses,
+                "result_bytes": sum(self.result_bytes(job_id, job) for job_id, job in self.jobs.items()),
+                "live_drivers": sum(1 for job in self.jobs.values() if job.get('driver') is not None),
+                "max_result_bytes": self.max_result_bytes,
+                "ttl": self.ttl,
+                **self.counters,
+            }
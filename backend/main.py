@@ -1,24 +1,44 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 import sys
 import os
-import concurrent.futures
 import uuid
+import json
 import time
 import base64
-from selenium.webdriver.common.action_chains import ActionChains
+import asyncio
+import threading
+from selenium.webdriver.common.actions.action_builder import ActionBuilder
 
 # Add parent directory to path to import search scripts
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from infojobs_search import search_infojobs
-from indeed_search import search_indeed
-from linkedin_search import search_linkedin
+from driver_pool import DriverPool
+from fanout import run_sources, SOURCES
+from dedup import dedupe_offers
+from source_health import get_source_health
+from parse_pool import start_parse_pool, shutdown_parse_pool
+from backend.scheduler import JobScheduler, QueueFull
+from backend.events import EventBroker, format_sse
+from backend.result_cache import ResultCache, cache_key, normalize_text
+from backend.job_store import JobStore
+from backend.offer_filters import filter_offers
+from backend.offer_store import OfferStore
+from backend.saved_searches import SavedSearchStore, SavedSearchScheduler
+from backend.cdp import ScreencastRegistry, screencast_settings, interaction_events
 
 app = FastAPI()
 
+# Shared pool of warm browsers for all scrapers
+driver_pool = DriverPool()
+
+# Caps how many jobs (and therefore browsers) run at once; the rest wait in a bounded queue
+scheduler = JobScheduler(browsers_per_job=3)
+
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -31,142 +51,603 @@ app.add_middleware(
 class SearchRequest(BaseModel):
     query: str = ""
     location: str
+    # Result pages fetched per source (in parallel) and an optional cap on offers per source
+    pages: Optional[int] = Field(None, ge=1, le=10)
+    max_results: Optional[int] = Field(None, ge=1)
+
+class SavedSearchRequest(BaseModel):
+    query: str = ""
+    location: str
+    pages: int = Field(int(os.environ.get("SAVED_SEARCH_PAGES", 3)), ge=1, le=10)
+    interval_minutes: float = Field(float(os.environ.get("SAVED_SEARCH_INTERVAL_MINUTES", 24 * 60)), ge=5)
 
 class InteractionRequest(BaseModel):
     action: str # "click"
-    x: int = 0
-    y: int = 0
+    x: float = 0
+    y: float = 0
+    # x / y as fractions (0-1) of the view frame instead of browser pixels
+    normalized: bool = False
+
+# Per-job event streams (status transitions and per-source results)
+events = EventBroker()
+
+# Job Store: finished jobs expire, and browsers of abandoned captcha sessions are quit
+jobs = JobStore(quit_driver=driver_pool.quit_driver, on_evict=events.forget)
+
+# Recent per-source results for identical (query, location) searches
+result_cache = ResultCache()
+
+# Live views of the browsers waiting for a captcha
+screencasts = ScreencastRegistry()
+
+# Jobs and their offers on disk (SQLite): job results survive restarts and evictions
+offer_store = OfferStore()
+
+def refresh_saved_search(run_id, search, delta):
+    # Each refresh is stored as a job whose results are only the offers new since the last one
+    offer_store.save_job(run_id, search['query'], search['location'], 'running')
+    # Nobody is there to solve a captcha: such sources are skipped and reported as such
+    outcomes = run_sources(search['query'], search['location'], pool=driver_pool, pages=search['pages'], newest=True, on_page=delta.on_page,
+                           unattended=True)
+    offer_store.set_results(run_id, dedupe_offers(delta.offers()))
+    offer_store.update_job(run_id, status='completed', sources={
+        source: {key: o[key] for key in ('status', 'count', 'reason') if key in o} for source, o in outcomes.items()
+    })
+    return outcomes
+
+# Saved searches are refreshed in the background through the job scheduler, so they
+# share the browser budget (and its fairness) with interactive searches
+saved_searches = SavedSearchStore()
+saved_search_scheduler = SavedSearchScheduler(
+    saved_searches,
+    submit=lambda run_id, fn, *args: scheduler.submit(run_id, "saved-searches", fn, *args),
+    refresh=refresh_saved_search,
+)
 
-# Job Store
-jobs = {}
+@app.on_event("startup")
+def start_background_services():
+    offer_store.start()
+    saved_searches.start()
+    saved_search_scheduler.start()
+    driver_pool.start()
+    start_parse_pool()
+    jobs.start()
+
+@app.on_event("shutdown")
+def stop_background_services():
+    saved_search_scheduler.stop()
+    jobs.stop()
+    scheduler.shutdown()
+    screencasts.close_all()
+    driver_pool.shutdown()
+    shutdown_parse_pool()
+    offer_store.stop()
+
+# In-flight searches by normalized (query, location). A new identical search attaches
+# to the running one as a follower instead of starting its own browsers; every update
+# of the leading job is mirrored to its followers.
+inflight = {}
+coalesce_lock = threading.RLock()
+
+def search_key(query, location, pages=None, max_results=None):
+    return (normalize_text(query), normalize_text(location), pages, max_results)
+
+def attached_jobs(job_id):
+    # Followers the job store already evicted (their clients are long gone) are left out
+    return [job_id] + [f for f in jobs[job_id].get('followers', []) if f in jobs]
+
+def set_job_status(job_id, status):
+    with coalesce_lock:
+        for attached_id in attached_jobs(job_id):
+            if jobs[attached_id]['status'] != status:
+                jobs[attached_id]['status'] = status
+                jobs[attached_id]['updated_at'] = time.time()
+                offer_store.update_job(attached_id, status=status)
+                events.publish(attached_id, 'status', {"status": status})
+
+def set_job_driver(job_id, driver):
+    with coalesce_lock:
+        previous = jobs[job_id]['driver']
+        for attached_id in attached_jobs(job_id):
+            jobs[attached_id]['driver'] = driver
+    if previous is not None and previous is not driver:
+        # Nobody can view a browser the job no longer holds
+        screencasts.close(previous)
+
+def publish_page(job_id, source, page, offers):
+    # A result page of a source that is still running
+    with coalesce_lock:
+        for attached_id in attached_jobs(job_id):
+            info = jobs[attached_id]['sources'].setdefault(source, {"status": 'running', "count": 0, "cached": False})
+            info['count'] += len(offers)
+            jobs[attached_id]['results'] = jobs[attached_id]['results'] + offers
+            offer_store.add_offers(attached_id, offers)
+            offer_store.update_job(attached_id, sources=jobs[attached_id]['sources'])
+            events.publish(attached_id, 'page', {"source": source, "page": page, "offers": offers})
+
+def publish_source(job_id, source, status, offers, cached=False, details=None, streamed=0):
+    # The first `streamed` offers were already published page by page, only the rest is new
+    with coalesce_lock:
+        for attached_id in attached_jobs(job_id):
+            jobs[attached_id]['sources'][source] = {"status": status, "count": len(offers), "cached": cached, **(details or {})}
+            jobs[attached_id]['results'] = jobs[attached_id]['results'] + offers[streamed:]
+            offer_store.add_offers(attached_id, offers[streamed:])
+            offer_store.update_job(attached_id, sources=jobs[attached_id]['sources'])
+            events.publish(attached_id, 'source', {"source": source, **jobs[attached_id]['sources'][source], "offers": offers[streamed:]})
+
+def finish_job(job_id):
+    # Once every source is in, offers found on several sites are merged into one (with all
+    # their links) and the deduplicated list replaces the streamed results
+    with coalesce_lock:
+        for attached_id in attached_jobs(job_id):
+            raw = jobs[attached_id]['results']
+            jobs[attached_id]['results'] = dedupe_offers(raw)
+            offer_store.set_results(attached_id, jobs[attached_id]['results'])
+            events.publish(attached_id, 'results', {"offers": jobs[attached_id]['results'], "merged": len(raw) - len(jobs[attached_id]['results'])})
+        set_job_status(job_id, 'completed')
+
+def attach_to_inflight(job_id, query, location, pages=None, max_results=None):
+    # Returns the leading job id when an identical search is already queued or running
+    with coalesce_lock:
+        leader_id = inflight.get(search_key(query, location, pages, max_results))
+        if leader_id is None:
+            return None
+        leader = jobs[leader_id]
+        follower = jobs[job_id]
+        follower['leader'] = leader_id
+        follower['driver'] = leader['driver']
+        # Catch up on everything the leader already published
+        for source, info in leader['sources'].items():
+            offers = [o for o in leader['results'] if o.get('source') == source]
+            follower['sources'][source] = dict(info)
+            follower['results'] = follower['results'] + offers
+            offer_store.add_offers(job_id, offers)
+            events.publish(job_id, 'source', {"source": source, **info, "offers": offers})
+        follower['status'] = leader['status']
+        offer_store.update_job(job_id, status=leader['status'], sources=follower['sources'])
+        events.publish(job_id, 'status', {"status": leader['status']})
+        leader.setdefault('followers', []).append(job_id)
+        return leader_id
+
+def cache_results(query, location, source, outcome, pages=None, max_results=None):
+    # Empty results are usually a block page or a timeout, not worth remembering
+    if outcome['status'] == 'completed' and outcome['offers']:
+        result_cache.put(cache_key(source, query, location, pages, max_results), outcome['offers'])
+
+def serve_cached_sources(job_id, query, location, pages=None, max_results=None):
+    # Publishes every cached source right away and returns the sources that still need a scrape.
+    # Stale entries are answered too, and refreshed in the background.
+    missing = []
+    stale = []
+    for source in SOURCES:
+        offers, state = result_cache.get(cache_key(source, query, location, pages, max_results))
+        if state is None:
+            missing.append(source)
+            continue
+        publish_source(job_id, source, 'completed', offers, cached=True)
+        if state == 'stale' and result_cache.start_refresh(cache_key(source, query, location, pages, max_results)):
+            stale.append(source)
+    if stale:
+        refresh_id = f"refresh-{uuid.uuid4()}"
+        try:
+            scheduler.submit(refresh_id, "cache-refresh", refresh_cached_sources, query, location, stale, pages, max_results)
+        except QueueFull:
+            # Too busy to refresh now, the next stale hit will try again
+            for source in stale:
+                result_cache.end_refresh(cache_key(source, query, location, pages, max_results))
+    return missing
 
-def run_search_job(job_id, query, location):
+def refresh_cached_sources(refresh_id, query, location, sources, pages=None, max_results=None):
+    print(f"Refreshing cached {', '.join(sources)} results for {query} in {location}")
+    try:
+        # Nobody is watching a background refresh: sources that need a captcha solved are skipped
+        run_sources(query, location, pool=driver_pool, sources=sources, pages=pages, max_results=max_results, unattended=True,
+                    on_source_done=lambda source, outcome: cache_results(query, location, source, outcome, pages, max_results))
+    finally:
+        for source in sources:
+            result_cache.end_refresh(cache_key(source, query, location, pages, max_results))
+
+def run_search_job(job_id, query, location, sources=None, pages=None, max_results=None):
     print(f"Starting job {job_id} for {query} in {location}")
-    jobs[job_id]['status'] = 'running'
-    results = []
+    set_job_status(job_id, 'running')
     
     def infojobs_callback(status, driver):
-        jobs[job_id]['status'] = status
-        jobs[job_id]['driver'] = driver
-        if status == 'waiting_input':
-            # Keep driver accessible
-            pass
+        # Keep driver accessible while waiting for the user
+        set_job_driver(job_id, driver)
+        set_job_status(job_id, status)
 
-    # Run searches in parallel
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # InfoJobs needs the callback for interaction
-        future_infojobs = executor.submit(search_infojobs, query, location, infojobs_callback)
-        future_indeed = executor.submit(search_indeed, query, location)
-        future_linkedin = executor.submit(search_linkedin, query, location)
-        
-        try:
-            results.extend(future_infojobs.result())
-        except Exception as e:
-            print(f"InfoJobs search failed: {e}")
-            
-        try:
-            results.extend(future_indeed.result())
-        except Exception as e:
-            print(f"Indeed search failed: {e}")
-            
-        try:
-            results.extend(future_linkedin.result())
-        except Exception as e:
-            print(f"LinkedIn search failed: {e}")
-            
-    jobs[job_id]['status'] = 'completed'
-    jobs[job_id]['results'] = results
-    jobs[job_id]['driver'] = None # Cleanup driver reference
+    # Offers of each source already published page by page
+    streamed = {}
+
+    def page_done(source, page, offers):
+        streamed[source] = streamed.get(source, 0) + len(offers)
+        publish_page(job_id, source, page, offers)
 
+    def source_done(source, outcome):
+        if source == 'InfoJobs':
+            # The InfoJobs browser goes back to the pool, don't expose it any longer
+            set_job_driver(job_id, None)
+        cache_results(query, location, source, outcome, pages, max_results)
+        # fetch_mode / fallback_reason and other per-source details go along with the results
+        details = {key: value for key, value in outcome.items() if key not in ('status', 'count', 'offers')}
+        publish_source(job_id, source, outcome['status'], outcome['offers'], details=details, streamed=streamed.get(source, 0))
+
+    # Run searches in parallel (each within its time budget), publish result pages as they
+    # arrive and every source as soon as it finishes
+    key = search_key(query, location, pages, max_results)
+    try:
+        run_sources(query, location, pool=driver_pool, status_callback=infojobs_callback, on_source_done=source_done, sources=sources,
+                    pages=pages, max_results=max_results, on_page=page_done)
+    finally:
+        with coalesce_lock:
+            # New identical searches must not attach to a finished job
+            if inflight.get(key) == job_id:
+                del inflight[key]
+            set_job_driver(job_id, None) # Cleanup driver reference
+            finish_job(job_id)
+
+def get_client_id(http_request):
+    # Fairness is per client: an explicit header if the frontend sends one, otherwise the IP
+    return http_request.headers.get("X-Client-Id") or (http_request.client.host if http_request.client else "unknown")
+
+# Plain def: FastAPI runs it in its threadpool, so waiting for coalesce_lock (held by
+# search threads while they publish) never blocks the event loop
 @app.post("/jobs/start")
-async def start_job(request: SearchRequest, background_tasks: BackgroundTasks):
+def start_job(request: SearchRequest, http_request: Request):
     job_id = str(uuid.uuid4())
     jobs[job_id] = {
         'id': job_id,
-        'status': 'pending',
+        'status': 'queued',
         'results': [],
+        'sources': {},
         'driver': None,
         'created_at': time.time()
     }
-    background_tasks.add_task(run_search_job, job_id, request.query, request.location)
-    return {"job_id": job_id}
+    offer_store.save_job(job_id, request.query, request.location, 'queued', created_at=jobs[job_id]['created_at'])
+
+    with coalesce_lock:
+        # Identical search already in flight: share its results instead of scraping again
+        leader_id = attach_to_inflight(job_id, request.query, request.location, request.pages, request.max_results)
+        if leader_id is not None:
+            return {"job_id": job_id, "status": jobs[job_id]['status'], "queue_position": scheduler.position(leader_id), "coalesced": True}
+
+        # Answer from the cache when possible, only the missing sources need browsers
+        missing = serve_cached_sources(job_id, request.query, request.location, request.pages, request.max_results)
+        if not missing:
+            finish_job(job_id)
+            return {"job_id": job_id, "status": 'completed', "queue_position": None}
+
+        try:
+            position = scheduler.submit(job_id, get_client_id(http_request), run_search_job, request.query, request.location, missing,
+                                        request.pages, request.max_results)
+        except QueueFull as e:
+            del jobs[job_id]
+            events.forget(job_id)
+            offer_store.update_job(job_id, status='rejected')
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+        inflight[search_key(request.query, request.location, request.pages, request.max_results)] = job_id
+    return {"job_id": job_id, "status": jobs[job_id]['status'], "queue_position": position}
+
+def flush_offer_store():
+    # Bounded: a stuck writer must not hang the requests reading from the store
+    if not offer_store.flush(timeout=offer_store.flush_timeout):
+        print(f"Offer store writes still pending after {offer_store.flush_timeout}s, reading committed results")
 
 @app.get("/jobs/{job_id}")
-async def get_job(job_id: str):
-    if job_id not in jobs:
+def get_job(job_id: str, min_salary: Optional[float] = None, source: Optional[str] = None, company: Optional[str] = None,
+            sort: Optional[Literal["salary", "title", "company", "location", "source"]] = None,
+            order: Literal["asc", "desc"] = "asc"):
+    jobs.touch(job_id)
+    # Results are read from the offer store (once the pending writes are committed), which
+    # also knows jobs that finished long ago or were interrupted by a restart
+    flush_offer_store()
+    stored = offer_store.load_job(job_id)
+    job = jobs.get(job_id) or stored
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    job = jobs[job_id]
+    all_results = stored['results'] if stored is not None else job['results']
+
+    # Filtering and sorting happen here, so clients only download the offers they show
+    try:
+        results = filter_offers(all_results, min_salary=min_salary, source=source, company=company, sort=sort, order=order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
         "id": job['id'],
         "status": job['status'],
-        "results": job['results'] if job['status'] == 'completed' else []
+        "queue_position": scheduler.position(job.get('leader', job_id)) if job['status'] == 'queued' else None,
+        "sources": job['sources'],
+        "total": len(all_results),
+        # Partial results are returned while the remaining sources are still running
+        "results": results
     }
 
-@app.get("/jobs/{job_id}/screenshot")
-async def get_screenshot(job_id: str):
+@app.get("/offers/search")
+def search_offers(q: str, source: Optional[str] = None, limit: int = Query(20, ge=1, le=200), offset: int = Query(0, ge=0)):
+    # Every offer any job has found, ranked by relevance: answers variations of earlier
+    # searches without starting a scrape
+    started = time.perf_counter()
+    results = offer_store.search(q, source=source, limit=limit, offset=offset)
+    return {"query": q, "results": results, "took_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+@app.post("/saved-searches")
+def create_saved_search(request: SavedSearchRequest, http_request: Request):
+    # The first refresh runs right away and becomes the baseline, later ones only report new offers
+    search = saved_searches.create(get_client_id(http_request), request.query, request.location, request.pages, request.interval_minutes * 60)
+    saved_search_scheduler.refresh_now(search['id'])
+    return search
+
+@app.get("/saved-searches")
+def list_saved_searches(http_request: Request):
+    return {"saved_searches": saved_searches.list(get_client_id(http_request))}
+
+def find_saved_search(search_id):
+    search = saved_searches.get(search_id)
+    if search is None:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return search
+
+@app.get("/saved-searches/{search_id}")
+def get_saved_search(search_id: str):
+    return {**find_saved_search(search_id), "runs": saved_searches.runs(search_id)}
+
+@app.delete("/saved-searches/{search_id}")
+def delete_saved_search(search_id: str):
+    find_saved_search(search_id)
+    saved_searches.delete(search_id)
+    return {"deleted": search_id}
+
+@app.post("/saved-searches/{search_id}/refresh")
+def refresh_saved_search_now(search_id: str):
+    find_saved_search(search_id)
+    saved_search_scheduler.refresh_now(search_id)
+    return {"scheduled": search_id}
+
+@app.get("/saved-searches/{search_id}/new")
+def get_saved_search_delta(search_id: str, run_id: Optional[str] = None):
+    # Offers that were new in a refresh (the latest one by default)
+    search = find_saved_search(search_id)
+    run_id = run_id or search['last_run_id']
+    runs = saved_searches.runs(search_id, limit=1, run_id=run_id) if run_id else []
+    if not runs:
+        raise HTTPException(status_code=404, detail="No finished refresh yet")
+    run = runs[0]
+    flush_offer_store()
+    stored = offer_store.load_job(run_id)
+    return {"run": run, "results": stored['results'] if stored else []}
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, http_request: Request):
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    try:
+        last_event_id = int(http_request.headers.get("Last-Event-ID", 0))
+    except ValueError:
+        last_event_id = 0
+
+    async def event_stream():
+        queue, backlog = events.subscribe(job_id, asyncio.get_running_loop(), last_event_id)
+        try:
+            for item in backlog:
+                yield format_sse(item)
+                if item['event'] == 'status' and item['data']['status'] == 'completed':
+                    return
+            while True:
+                jobs.touch(job_id)
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(item)
+                if item['event'] == 'status' and item['data']['status'] == 'completed':
+                    return
+        finally:
+            events.unsubscribe(job_id, queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def active_driver(job_id):
     if job_id not in jobs or not jobs[job_id]['driver']:
         raise HTTPException(status_code=404, detail="Driver not active")
-    
+    jobs.touch(job_id)
+    return jobs[job_id]['driver']
+
+async def open_screencast(job_id, format=None, quality=None, max_width=None, max_height=None):
+    driver = active_driver(job_id)
     try:
-        driver = jobs[job_id]['driver']
-        screenshot = driver.get_screenshot_as_png()
+        # Connecting to DevTools is blocking network I/O, keep it off the event loop
+        return driver, await asyncio.to_thread(screencasts.get, driver, screencast_settings(format, quality, max_width, max_height))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Live view unavailable: {e}")
+
+@app.get("/jobs/{job_id}/view")
+async def get_view(job_id: str, http_request: Request, format: Optional[str] = None, quality: Optional[int] = None,
+                   max_width: Optional[int] = None, max_height: Optional[int] = None):
+    # Latest screencast frame, straight from the cache. Clients send back the ETag to get
+    # a 304 when the page hasn't changed since their last frame.
+    driver, session = await open_screencast(job_id, format, quality, max_width, max_height)
+    frame = session.latest_frame() or await asyncio.to_thread(session.wait_for_frame, 0, 5)
+    if frame is None:
+        raise HTTPException(status_code=503, detail="No frame yet", headers={"Retry-After": "1"})
+    frame_id, image, metadata = frame
+    etag = f'"{frame_id}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Frame-Metadata": json.dumps(metadata)}
+    if http_request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=image, media_type=f"image/{session.settings[0]}", headers=headers)
+
+@app.get("/jobs/{job_id}/view/stream")
+async def stream_view(job_id: str, quality: Optional[int] = None, max_width: Optional[int] = None, max_height: Optional[int] = None):
+    # MJPEG stream (multipart/x-mixed-replace) that an <img> can show directly; a part
+    # is only sent when Chrome reports the page changed
+    driver, session = await open_screencast(job_id, "jpeg", quality, max_width, max_height)
+
+    async def frames():
+        last_id = 0
+        while not session.closed and jobs.get(job_id, {}).get('driver') is driver:
+            frame = await asyncio.to_thread(session.wait_for_frame, last_id, 15)
+            jobs.touch(job_id)
+            if frame is None or frame[0] == last_id:
+                continue
+            last_id, image, _ = frame
+            yield b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: " + str(len(image)).encode() + b"\r\n\r\n" + image + b"\r\n"
+
+    return StreamingResponse(frames(), media_type="multipart/x-mixed-replace; boundary=frame", headers={"Cache-Control": "no-cache"})
+
+@app.websocket("/jobs/{job_id}/interact/ws")
+async def interact_ws(websocket: WebSocket, job_id: str, quality: Optional[int] = None, max_width: Optional[int] = None, max_height: Optional[int] = None):
+    # Persistent interaction channel for solving the captcha remotely.
+    #   client -> server: {"id": n, "events": [{"type": "move" | "click" | "scroll" | "key" | "type", ...}]}
+    #   server -> client: {"id": n, "ok": true, "dispatched": commands, "frame_id": ...} for every batch,
+    #                     ({"id": n, "ok": false, "error": ...} for a malformed or failed batch, none of a
+    #                     malformed batch is dispatched), and each new screencast frame as a binary JPEG message
+    # Events of a batch are dispatched through CDP in order and acknowledged together,
+    # right after the first frame that shows their effect (or INTERACT_FRAME_WAIT seconds).
+    if job_id not in jobs or not jobs[job_id]['driver']:
+        await websocket.close(code=4404)
+        return
+    driver = jobs[job_id]['driver']
+    await websocket.accept()
+    try:
+        session = await asyncio.to_thread(screencasts.get, driver, screencast_settings("jpeg", quality, max_width, max_height))
+    except Exception as e:
+        await websocket.close(code=1011, reason=f"Live view unavailable: {e}"[:120])
+        return
+
+    frame_wait = float(os.environ.get("INTERACT_FRAME_WAIT", 0.5))
+    send_lock = asyncio.Lock()
+    sent_frame = [0]
+
+    async def send_frame(frame):
+        async with send_lock:
+            if frame is not None and frame[0] > sent_frame[0]:
+                sent_frame[0] = frame[0]
+                await websocket.send_bytes(frame[1])
+
+    async def push_frames():
+        while not session.closed and jobs.get(job_id, {}).get('driver') is driver:
+            await send_frame(await asyncio.to_thread(session.wait_for_frame, sent_frame[0], 15))
+        # The job let go of the browser (captcha solved or abandoned)
+        try:
+            await websocket.close(code=1000)
+        except RuntimeError:
+            pass
+
+    async def reject(message, error):
+        async with send_lock:
+            await websocket.send_json({"id": message.get("id") if isinstance(message, dict) else None, "ok": False, "error": error})
+
+    pusher = asyncio.create_task(push_frames())
+    try:
+        while True:
+            text = await websocket.receive_text()
+            jobs.touch(job_id)
+            message = None
+            try:
+                message = json.loads(text)
+                input_events = interaction_events(message)
+            except ValueError as e:
+                await reject(message, str(e))
+                continue
+            before = session.latest_frame()
+            try:
+                dispatched = await asyncio.to_thread(session.dispatch, input_events)
+            except Exception as e:
+                await reject(message, str(e))
+                continue
+            frame = await asyncio.to_thread(session.wait_for_frame, before[0] if before else 0, frame_wait)
+            await send_frame(frame)
+            async with send_lock:
+                await websocket.send_json({"id": message.get("id"), "ok": True, "dispatched": dispatched, "frame_id": frame[0] if frame else None})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        pusher.cancel()
+        await asyncio.gather(pusher, return_exceptions=True)
+
+async def on_driver(driver, fn, *args):
+    # Queues fn(driver, *args) on the driver's worker thread, which also runs the scraper's
+    # commands, and awaits the result without tying up the event loop or a thread
+    return await asyncio.wrap_future(driver.submit(fn, *args))
+
+def take_screenshot(driver):
+    return driver.get_screenshot_as_png()
+
+@app.get("/jobs/{job_id}/screenshot")
+async def get_screenshot(job_id: str):
+    driver = active_driver(job_id)
+    try:
+        screenshot = await on_driver(driver, take_screenshot)
         return Response(content=screenshot, media_type="image/png")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def viewport_point(driver, x, y):
+    # Fractions of the view frame to CSS pixels of the page viewport
+    session = screencasts.sessions.get(driver.session_id)
+    frame = session.latest_frame() if session is not None else None
+    if frame is not None and frame[2].get("deviceWidth"):
+        width, height = frame[2]["deviceWidth"], frame[2]["deviceHeight"]
+    else:
+        width, height = driver.execute_script("return [window.innerWidth, window.innerHeight];")
+    return round(x * width), round(y * height)
+
+def click_at(driver, request):
+    # Runs on the driver's worker: the whole click goes through without scraper commands in between
+    if request.normalized:
+        x, y = viewport_point(driver, request.x, request.y)
+    else:
+        x, y = round(request.x), round(request.y)
+    # Use CDP (Chrome DevTools Protocol) for low-level mouse interaction.
+    # This works inside iframes (like reCAPTCHA) and is undetectable.
+    try:
+        # Move mouse
+        driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
+            "type": "mouseMoved",
+            "x": x,
+            "y": y
+        })
+        # Press
+        driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
+            "type": "mousePressed",
+            "x": x,
+            "y": y,
+            "button": "left",
+            "clickCount": 1
+        })
+        # Release
+        driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
+            "type": "mouseReleased",
+            "x": x,
+            "y": y,
+            "button": "left",
+            "clickCount": 1
+        })
+        return {"status": "clicked", "method": "CDP"}
+    except Exception as cdp_error:
+        print(f"CDP Click failed: {cdp_error}")
+        # Fallback to ActionChains if CDP fails
+        try:
+            # Using w3c actions pointer move
+            action = ActionBuilder(driver)
+            action.pointer_action.move_to_location(x, y)
+            action.pointer_action.click()
+            action.perform()
+            return {"status": "clicked", "method": "ActionChains"}
+        except Exception as ac_error:
+             raise HTTPException(status_code=500, detail=f"Click failed: {ac_error}")
+
 @app.post("/jobs/{job_id}/interact")
 async def interact(job_id: str, request: InteractionRequest):
-    if job_id not in jobs or not jobs[job_id]['driver']:
-        raise HTTPException(status_code=404, detail="Driver not active")
-    
+    driver = active_driver(job_id)
     try:
-        driver = jobs[job_id]['driver']
         if request.action == 'click':
-            # Use CDP (Chrome DevTools Protocol) for low-level mouse interaction.
-            # This works inside iframes (like reCAPTCHA) and is undetectable.
-            try:
-                # Move mouse
-                driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
-                    "type": "mouseMoved",
-                    "x": request.x,
-                    "y": request.y
-                })
-                # Press
-                driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
-                    "type": "mousePressed",
-                    "x": request.x,
-                    "y": request.y,
-                    "button": "left",
-                    "clickCount": 1
-                })
-                # Release
-                driver.execute_cdp_cmd("Input.dispatchMouseEvent", {
-                    "type": "mouseReleased",
-                    "x": request.x,
-                    "y": request.y,
-                    "button": "left",
-                    "clickCount": 1
-                })
-                return {"status": "clicked", "method": "CDP"}
-            except Exception as cdp_error:
-                print(f"CDP Click failed: {cdp_error}")
-                # Fallback to ActionChains if CDP fails
-                try:
-                    actions = ActionChains(driver)
-                    # Reset to body top-left then move
-                    # Note: This might be offset by scroll if not careful, but CDP is safer.
-                    # Using w3c actions pointer move
-                    from selenium.webdriver.common.actions.action_builder import ActionBuilder
-                    from selenium.webdriver.common.actions.mouse_button import MouseButton
-                    
-                    action = ActionBuilder(driver)
-                    action.pointer_action.move_to_location(request.x, request.y)
-                    action.pointer_action.click()
-                    action.perform()
-                    return {"status": "clicked", "method": "ActionChains"}
-                except Exception as ac_error:
-                     raise HTTPException(status_code=500, detail=f"Click failed: {ac_error}")
+            return await on_driver(driver, click_at, request)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -176,6 +657,23 @@ async def search_jobs_legacy(request: SearchRequest):
     # Better to return error or redirect
     return {"error": "Use /jobs/start for interactive search"}
 
+@app.get("/store/stats")
+def get_store_stats():
+    return {**jobs.stats(), "offer_store": offer_store.stats()}
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    return result_cache.stats()
+
+@app.get("/scheduler")
+def get_scheduler_stats():
+    return {"scheduler": scheduler.stats(), "drivers": driver_pool.stats()}
+
+@app.get("/health/sources")
+def get_source_health_stats():
+    # Circuit state, success rate, card counts, latency and last bot wall of every source run so far
+    return {source: get_source_health().snapshot(source) for source in SOURCES}
+
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": "Job Search API is running"}
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from salary import PERIODS_PER_YEAR
+
+SORT_FIELDS = {"salary", "title", "company", "location", "source"}
+
+def offers_frame(offers):
+    # Columnar view of a result list: one row per offer, with the yearly salary range
+    # so that hourly, monthly and yearly offers can be compared
+    frame = pd.DataFrame.from_records(offers, columns=["title", "company", "location", "source", "sources",
+                                                       "salary_min", "salary_max", "salary_period"])
+    per_year = frame["salary_period"].map(PERIODS_PER_YEAR).astype(float)
+    frame["annual_min"] = frame["salary_min"].astype(float) * per_year
+    frame["annual_max"] = frame["salary_max"].astype(float) * per_year
+    # Deduplicated offers list every source they were found on
+    if frame["sources"].notna().any():
+        frame["all_sources"] = frame["sources"].str.join("|").fillna(frame["source"])
+    else:
+        frame["all_sources"] = frame["source"]
+    return frame
+
+def filter_offers(offers, min_salary=None, source=None, company=None, sort=None, order="asc"):
+    # Filters and sorts a job's results in one pass over the columns and returns the
+    # matching offers (the original dicts) in order.
+    #   min_salary: yearly amount the top of the salary range must reach; offers without a salary are left out
+    #   source: comma separated source names, matching any site the offer was found on
+    #   company: case-insensitive substring
+    #   sort: salary | title | company | location | source, order: asc | desc
+    if not offers or (min_salary is None and not source and not company and not sort):
+        return offers
+    if sort is not None and sort not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort field '{sort}', expected one of {', '.join(sorted(SORT_FIELDS))}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unknown sort order '{order}', expected asc or desc")
+
+    frame = offers_frame(offers)
+    mask = np.ones(len(frame), dtype=bool)
+    if min_salary is not None:
+        mask &= (frame["annual_max"].fillna(frame["annual_min"]) >= min_salary).to_numpy()
+    names = [name.strip().lower() for name in (source or "").split(",") if name.strip()]
+    if names:
+        # Whole names: "in" must not match InfoJobs, Indeed and LinkedIn
+        found_on = frame["all_sources"].fillna("").str.lower().str.split("|").explode()
+        mask &= found_on.isin(names).groupby(level=0).any().reindex(frame.index, fill_value=False).to_numpy()
+    if company:
+        mask &= frame["company"].str.contains(company, case=False, regex=False, na=False).to_numpy()
+
+    selected = frame[mask]
+    if sort is not None:
+        if sort == "salary":
+            key = selected["annual_max"].fillna(selected["annual_min"])
+        else:
+            key = selected[sort].str.lower()
+        # Offers without a value go last whatever the order
+        selected = selected.loc[key.sort_values(ascending=order != "desc", na_position="last", kind="stable").index]
+    return [offers[i] for i in selected.index]
@@ -0,0 +1,307 @@
+import os
+import re
+import json
+import time
+import queue
+import sqlite3
+import hashlib
+import logging
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    location TEXT NOT NULL,
+    status TEXT NOT NULL,
+    sources TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS offers (
+    offer_key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    link TEXT,
+    title TEXT,
+    company TEXT,
+    location TEXT,
+    salary_min REAL,
+    salary_max REAL,
+    salary_period TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_offers (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    offer_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS offers_source ON offers (source);
+CREATE INDEX IF NOT EXISTS offers_link ON offers (link);
+CREATE INDEX IF NOT EXISTS offers_company ON offers (company);
+CREATE INDEX IF NOT EXISTS offers_first_seen ON offers (first_seen);
+CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at);
+"""
+
+# Inverted index over every offer ever stored. It reads its text from the offers table
+# (external content) and triggers keep it in step with each write, so it is updated
+# incrementally by the same transactions that store the results. remove_diacritics
+# makes "hibrido" find "híbrido" and the other way round.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS offers_fts USING fts5(
+    title, company, location, source,
+    content='offers', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS offers_fts_insert AFTER INSERT ON offers BEGIN
+    INSERT INTO offers_fts (rowid, title, company, location, source) VALUES (new.rowid, new.title, new.company, new.location, new.source);
+END;
+CREATE TRIGGER IF NOT EXISTS offers_fts_delete AFTER DELETE ON offers BEGIN
+    INSERT INTO offers_fts (offers_fts, rowid, title, company, location, source) VALUES ('delete', old.rowid, old.title, old.company, old.location, old.source);
+END;
+CREATE TRIGGER IF NOT EXISTS offers_fts_update AFTER UPDATE OF title, company, location, source ON offers BEGIN
+    INSERT INTO offers_fts (offers_fts, rowid, title, company, location, source) VALUES ('delete', old.rowid, old.title, old.company, old.location, old.source);
+    INSERT INTO offers_fts (rowid, title, company, location, source) VALUES (new.rowid, new.title, new.company, new.location, new.source);
+END;
+"""
+
+# bm25 weights for title, company, location and source: a hit in the title counts most
+FTS_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+UPSERT_OFFER = """
+INSERT INTO offers (offer_key, source, link, title, company, location, salary_min, salary_max, salary_period, first_seen, last_seen, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (offer_key) DO UPDATE SET
+    title = excluded.title, company = excluded.company, location = excluded.location,
+    salary_min = excluded.salary_min, salary_max = excluded.salary_max, salary_period = excluded.salary_period,
+    last_seen = excluded.last_seen, data = excluded.data
+"""
+
+UPSERT_JOB = """
+INSERT INTO jobs (id, query, location, status, sources, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET status = excluded.status, sources = excluded.sources, updated_at = excluded.updated_at
+"""
+
+def offer_key(offer):
+    # The link identifies an offer; offers without one fall back to their visible fields
+    link = offer.get("link")
+    if link and link != "N/A":
+        return link
+    fields = "|".join(str(offer.get(f, "")) for f in ("source", "title", "company", "location"))
+    return "sha1:" + hashlib.sha1(fields.encode("utf-8")).hexdigest()
+
+def match_expression(text):
+    # Free text to an FTS5 query: every word must match, as a prefix ("progra" finds
+    # "programador"). Words are quoted so user input can't inject FTS syntax.
+    words = re.findall(r"\w+", text or "")
+    return " AND ".join(f'"{word}"*' for word in words)
+
+def job_offer_row(job_id, position, offer):
+    # The offer as this job found it: offers.data only holds the latest version of a link,
+    # which a later job (or its merged, deduplicated record) overwrites
+    return (job_id, position, offer_key(offer), json.dumps(offer, ensure_ascii=False))
+
+def offer_row(offer, now):
+    return (
+        offer_key(offer), offer.get("source"), offer.get("link"), offer.get("title"), offer.get("company"), offer.get("location"),
+        offer.get("salary_min"), offer.get("salary_max"), offer.get("salary_period"),
+        now, now, json.dumps(offer, ensure_ascii=False),
+    )
+
+# SQLite store for jobs and the offers they found, so results survive restarts and
+# can be reused across jobs. Writes go through a queue to a single writer thread that
+# commits them in batches (one transaction per batch); reads use a connection per
+# thread and, thanks to WAL mode, never wait for the writer.
+class OfferStore:
+    def __init__(self, path=None, batch_size=None, flush_interval=None):
+        self.path = path or os.environ.get("OFFER_DB_PATH", "offers.db")
+        self.batch_size = batch_size if batch_size is not None else int(os.environ.get("OFFER_STORE_BATCH", 500))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.environ.get("OFFER_STORE_FLUSH_INTERVAL", 0.2))
+        # How long a request waits for pending writes before reading what is committed
+        self.flush_timeout = float(os.environ.get("OFFER_STORE_FLUSH_TIMEOUT", 5))
+        self.queue = queue.Queue()
+        self.local = threading.local()
+        self.next_position = {} # job_id -> next free position, writer thread only
+        self.counters = {"batches": 0, "writes": 0, "offers_written": 0}
+        self.thread = None
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def reader(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = self.connect()
+        return connection
+
+    def start(self):
+        with self.connect() as connection:
+            connection.executescript(SCHEMA)
+            has_index = connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'offers_fts'").fetchone()
+            connection.executescript(FTS_SCHEMA)
+            if not has_index:
+                # Databases created before the index existed: index the offers already stored
+                connection.execute("INSERT INTO offers_fts (offers_fts) VALUES ('rebuild')")
+            # Jobs that were running when the process stopped will never finish
+            interrupted = connection.execute(
+                "UPDATE jobs SET status = 'interrupted', updated_at = ? WHERE status NOT IN ('completed', 'interrupted', 'rejected')", (time.time(),)
+            ).rowcount
+        if interrupted:
+            logging.warning(f"Marked {interrupted} unfinished jobs as interrupted")
+        self.thread = threading.Thread(target=self.run_writer, name="offer-store", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout=10)
+            self.thread = None
+
+    # --- writes (queued) ---
+
+    def save_job(self, job_id, query, location, status, sources=None, created_at=None):
+        now = time.time()
+        self.queue.put(("job", (job_id, query, location, status, json.dumps(sources or {}, ensure_ascii=False), created_at or now, now)))
+
+    def update_job(self, job_id, status=None, sources=None):
+        sources = json.dumps(sources, ensure_ascii=False) if sources is not None else None
+        self.queue.put(("update", (status, sources, time.time(), job_id)))
+
+    def add_offers(self, job_id, offers):
+        if offers:
+            self.queue.put(("offers", job_id, list(offers), time.time()))
+
+    def set_results(self, job_id, offers):
+        # Replaces the job's result list (e.g. with the deduplicated one)
+        self.queue.put(("results", job_id, list(offers), time.time()))
+
+    def flush(self, timeout=None):
+        # Blocks until everything queued so far is committed (or timeout seconds went by).
+        # Returns whether it was.
+        if self.thread is None:
+            return True
+        done = threading.Event()
+        self.queue.put(("barrier", done))
+        return done.wait(timeout)
+
+    # --- writer thread ---
+
+    def run_writer(self):
+        connection = self.connect()
+        running = True
+        while running:
+            item = self.queue.get()
+            batch = [item]
+            # Give results arriving together (pages, sources, followers) a moment to pile up
+            deadline = time.time() + self.flush_interval
+            while item is not None and item[0] != "barrier" and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get(timeout=max(0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+            barriers = [op[1] for op in batch if op is not None and op[0] == "barrier"]
+            running = None not in batch
+            try:
+                with connection:
+                    for op in batch:
+                        if op is not None and op[0] != "barrier":
+                            self.apply(connection, op)
+                self.counters["batches"] += 1
+            except Exception as e:
+                # Whatever went wrong (a locked database, an offer that won't serialize), the
+                # writer keeps going: readers flush through it
+                logging.exception(f"Offer store write failed, dropping {len(batch)} operations: {e}")
+                self.next_position.clear()
+            finally:
+                for done in barriers:
+                    done.set()
+        connection.close()
+
+    def apply(self, connection, op):
+        self.counters["writes"] += 1
+        if op[0] == "job":
+            connection.execute(UPSERT_JOB, op[1])
+        elif op[0] == "update":
+            connection.execute("UPDATE jobs SET status = COALESCE(?, status), sources = COALESCE(?, sources), updated_at = ? WHERE id = ?", op[1])
+        elif op[0] == "offers":
+            _, job_id, offers, now = op
+            start = self.position(connection, job_id)
+            connection.executemany(UPSERT_OFFER, [offer_row(offer, now) for offer in offers])
+            connection.executemany("INSERT OR REPLACE INTO job_offers (job_id, position, offer_key, data) VALUES (?, ?, ?, ?)",
+                                   [job_offer_row(job_id, start + i, offer) for i, offer in enumerate(offers)])
+            self.next_position[job_id] = start + len(offers)
+            self.counters["offers_written"] += len(offers)
+        elif op[0] == "results":
+            _, job_id, offers, now = op
+            connection.execute("DELETE FROM job_offers WHERE job_id = ?", (job_id,))
+            connection.executemany(UPSERT_OFFER, [offer_row(offer, now) for offer in offers])
+            connection.executemany("INSERT INTO job_offers (job_id, position, offer_key, data) VALUES (?, ?, ?, ?)",
+                                   [job_offer_row(job_id, i, offer) for i, offer in enumerate(offers)])
+            self.next_position[job_id] = len(offers)
+            self.counters["offers_written"] += len(offers)
+
+    def position(self, connection, job_id):
+        if job_id not in self.next_position:
+            row = connection.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM job_offers WHERE job_id = ?", (job_id,)).fetchone()
+            self.next_position[job_id] = row[0]
+        return self.next_position[job_id]
+
+    # --- reads ---
+
+    def load_job(self, job_id):
+        connection = self.reader()
+        row = connection.execute("SELECT id, query, location, status, sources, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        offers = connection.execute(
+            "SELECT data FROM job_offers WHERE job_id = ? ORDER BY position", (job_id,)
+        ).fetchall()
+        return {
+            "id": row[0],
+            "query": row[1],
+            "location": row[2],
+            "status": row[3],
+            "sources": json.loads(row[4]),
+            "created_at": row[5],
+            "updated_at": row[6],
+            "results": [json.loads(data) for (data,) in offers],
+        }
+
+    def search(self, text, source=None, limit=20, offset=0):
+        # Ranked (bm25) full-text search over all stored offers
+        expression = match_expression(text)
+        if not expression:
+            return []
+        sql = (
+            "SELECT o.data, o.first_seen, o.last_seen, bm25(offers_fts, ?, ?, ?, ?) AS rank "
+            "FROM offers_fts JOIN offers o ON o.rowid = offers_fts.rowid WHERE offers_fts MATCH ?"
+        )
+        params = [*FTS_WEIGHTS, expression]
+        if source:
+            sql += " AND o.source = ?"
+            params.append(source)
+        sql += " ORDER BY rank LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        results = []
+        for data, first_seen, last_seen, rank in self.reader().execute(sql, params):
+            # bm25 is lower-is-better, flip it so a higher score is a better match
+            results.append({**json.loads(data), "first_seen": first_seen, "last_seen": last_seen, "score": round(-rank, 4)})
+        return results
+
+    def stats(self):
+        connection = self.reader()
+        return {
+            "path": self.path,
+            "jobs": connection.execute("SELECT COUNT(*) FROM jobs").fetchone()[0],
+            "offers": connection.execute("SELECT COUNT(*) FROM offers").fetchone()[0],
+            "pending_writes": self.queue.qsize(),
+            **self.counters,
+        }
@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+
+def normalize_text(text):
+    # "  Programador  Python " and "programador python" are the same search
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+def cache_key(source, query, location, pages=None, max_results=None):
+    # Deeper or capped searches return different offers, so they are cached separately
+    return (source, normalize_text(query), normalize_text(location), pages, max_results)
+
+# Per-source search results with a freshness TTL and a longer stale window.
+# Fresh entries are served as is; stale entries are served too but the caller is
+# expected to refresh them in the background (stale-while-revalidate). The cache
+# is an LRU bounded both by entry count and by the JSON size of the stored offers.
+class ResultCache:
+    def __init__(self, ttl=None, stale_ttl=None, max_entries=None, max_bytes=None):
+        self.ttl = ttl if ttl is not None else float(os.environ.get("CACHE_TTL", 300))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.environ.get("CACHE_STALE_TTL", 1800))
+        self.max_entries = max_entries if max_entries is not None else int(os.environ.get("CACHE_MAX_ENTRIES", 500))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.environ.get("CACHE_MAX_BYTES", 50 * 1024 * 1024))
+        self.entries = OrderedDict() # key -> (stored_at, size, offers)
+        self.total_bytes = 0
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key):
+        # Returns (offers, "fresh" | "stale") or (None, None) on a miss
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None, None
+            stored_at, size, offers = entry
+            age = time.time() - stored_at
+            if age > self.stale_ttl:
+                self._remove(key)
+                self.counters["expired"] += 1
+                self.counters["misses"] += 1
+                return None, None
+            self.entries.move_to_end(key)
+            if age > self.ttl:
+                self.counters["stale_hits"] += 1
+                return offers, "stale"
+            self.counters["hits"] += 1
+            return offers, "fresh"
+
+    def put(self, key, offers):
+        size = len(json.dumps(offers, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.time(), size, offers)
+            self.total_bytes += size
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.counters["evictions"] += 1
+
+    def _remove(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.total_bytes -= size
+
+    def start_refresh(self, key):
+        # Only one background refresh per key at a time
+        with self.lock:
+            if key in self.refreshing:
+                return False
+            self.refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        with self.lock:
+            self.refreshing.discard(key)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_ratio": round((self.counters["hits"] + self.counters["stale_hits"]) / lookups, 3) if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "refreshing": len(self.refreshing),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from backend.offer_store import offer_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_searches (
+    id TEXT PRIMARY KEY,
+    client_id TEXT NOT NULL,
+    query TEXT NOT NULL,
+    location TEXT NOT NULL,
+    pages INTEGER NOT NULL,
+    interval REAL NOT NULL,
+    created_at REAL NOT NULL,
+    next_run_at REAL NOT NULL,
+    last_run_at REAL,
+    last_run_id TEXT
+);
+CREATE INDEX IF NOT EXISTS saved_searches_next_run ON saved_searches (next_run_at);
+CREATE INDEX IF NOT EXISTS saved_searches_client ON saved_searches (client_id);
+CREATE TABLE IF NOT EXISTS saved_search_watermarks (
+    search_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    newest_key TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (search_id, source)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS saved_search_seen (
+    search_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    offer_key TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (search_id, source, offer_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS saved_search_runs (
+    id TEXT PRIMARY KEY,
+    search_id TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT NOT NULL,
+    new_count INTEGER NOT NULL DEFAULT 0,
+    sources TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS saved_search_runs_search ON saved_search_runs (search_id, started_at);
+"""
+
+SEARCH_COLUMNS = "id, client_id, query, location, pages, interval, created_at, next_run_at, last_run_at, last_run_id"
+
+def search_row(row):
+    return dict(zip(SEARCH_COLUMNS.split(", "), row))
+
+# Saved searches, their per-source watermarks and their refresh history, kept in the
+# same SQLite database as the offers. Writes here are small and rare, so they are
+# committed directly instead of going through the offer store's batch writer.
+class SavedSearchStore:
+    def __init__(self, path=None, seen_ttl=None):
+        self.path = path or os.environ.get("OFFER_DB_PATH", "offers.db")
+        # How long an offer counts as already seen for a search
+        self.seen_ttl = seen_ttl if seen_ttl is not None else float(os.environ.get("SAVED_SEARCH_SEEN_TTL", 30 * 24 * 3600))
+        self.local = threading.local()
+
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def start(self):
+        with self.connection() as connection:
+            connection.executescript(SCHEMA)
+            # Refreshes cut short by a restart
+            connection.execute("UPDATE saved_search_runs SET status = 'interrupted' WHERE status = 'running'")
+
+    def create(self, client_id, query, location, pages, interval):
+        now = time.time()
+        search = {"id": str(uuid.uuid4()), "client_id": client_id, "query": query, "location": location, "pages": pages,
+                  "interval": interval, "created_at": now, "next_run_at": now, "last_run_at": None, "last_run_id": None}
+        with self.connection() as connection:
+            connection.execute(f"INSERT INTO saved_searches ({SEARCH_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", tuple(search.values()))
+        return search
+
+    def get(self, search_id):
+        row = self.connection().execute(f"SELECT {SEARCH_COLUMNS} FROM saved_searches WHERE id = ?", (search_id,)).fetchone()
+        return search_row(row) if row else None
+
+    def list(self, client_id=None):
+        sql = f"SELECT {SEARCH_COLUMNS} FROM saved_searches"
+        params = ()
+        if client_id is not None:
+            sql += " WHERE client_id = ?"
+            params = (client_id,)
+        return [search_row(row) for row in self.connection().execute(sql + " ORDER BY created_at", params)]
+
+    def delete(self, search_id):
+        with self.connection() as connection:
+            for table, column in (("saved_searches", "id"), ("saved_search_watermarks", "search_id"),
+                                  ("saved_search_seen", "search_id"), ("saved_search_runs", "search_id")):
+                connection.execute(f"DELETE FROM {table} WHERE {column} = ?", (search_id,))
+
+    def due(self, now, limit):
+        rows = self.connection().execute(
+            f"SELECT {SEARCH_COLUMNS} FROM saved_searches WHERE next_run_at <= ? ORDER BY next_run_at LIMIT ?", (now, limit)
+        ).fetchall()
+        return [search_row(row) for row in rows]
+
+    def reschedule(self, search_id, run_at):
+        with self.connection() as connection:
+            connection.execute("UPDATE saved_searches SET next_run_at = ? WHERE id = ?", (run_at, search_id))
+
+    def watermarks(self, search_id):
+        # {source: {"newest_key": ..., "seen": {offer keys}}} for the sources refreshed before
+        connection = self.connection()
+        marks = {}
+        for source, newest_key in connection.execute("SELECT source, newest_key FROM saved_search_watermarks WHERE search_id = ?", (search_id,)):
+            marks[source] = {"newest_key": newest_key, "seen": set()}
+        for source, key in connection.execute("SELECT source, offer_key FROM saved_search_seen WHERE search_id = ?", (search_id,)):
+            if source in marks:
+                marks[source]["seen"].add(key)
+        return marks
+
+    def start_run(self, run_id, search_id):
+        with self.connection() as connection:
+            connection.execute("INSERT INTO saved_search_runs (id, search_id, started_at, status) VALUES (?, ?, ?, 'running')",
+                               (run_id, search_id, time.time()))
+
+    def finish_run(self, run_id, search, status, delta):
+        # Watermarks only move on a completed run, see RefreshDelta.fail
+        now = time.time()
+        with self.connection() as connection:
+            for source, newest in (delta.newest.items() if status == "completed" else ()):
+                connection.execute("INSERT OR REPLACE INTO saved_search_watermarks (search_id, source, newest_key, updated_at) VALUES (?, ?, ?, ?)",
+                                   (search["id"], source, newest, now))
+            for source, keys in (delta.seen.items() if status == "completed" else ()):
+                connection.executemany("INSERT OR REPLACE INTO saved_search_seen (search_id, source, offer_key, seen_at) VALUES (?, ?, ?, ?)",
+                                       [(search["id"], source, key, now) for key in keys])
+            connection.execute("DELETE FROM saved_search_seen WHERE search_id = ? AND seen_at < ?", (search["id"], now - self.seen_ttl))
+            connection.execute("UPDATE saved_search_runs SET finished_at = ?, status = ?, new_count = ?, sources = ? WHERE id = ?",
+                               (now, status, delta.new_count(), json.dumps(delta.summary()), run_id))
+            connection.execute("UPDATE saved_searches SET last_run_at = ?, last_run_id = ?, next_run_at = ? WHERE id = ?",
+                               (now, run_id, now + search["interval"], search["id"]))
+
+    def runs(self, search_id, limit=20, run_id=None):
+        sql = "SELECT id, started_at, finished_at, status, new_count, sources FROM saved_search_runs WHERE search_id = ?"
+        params = [search_id]
+        if run_id is not None:
+            sql += " AND id = ?"
+            params.append(run_id)
+        rows = self.connection().execute(sql + " ORDER BY started_at DESC LIMIT ?", params + [limit]).fetchall()
+        return [{"id": r[0], "started_at": r[1], "finished_at": r[2], "status": r[3], "new_count": r[4], "sources": json.loads(r[5])} for r in rows]
+
+# What one refresh found, source by source. Results are requested newest first, so as
+# soon as a page reaches the offer that topped the previous refresh (or is mostly offers
+# seen before) everything after it is old: the source stops paging there.
+class RefreshDelta:
+    def __init__(self, watermarks, stop_ratio=None):
+        self.watermarks = watermarks
+        self.stop_ratio = stop_ratio if stop_ratio is not None else float(os.environ.get("SAVED_SEARCH_STOP_RATIO", 0.8))
+        self.lock = threading.Lock()
+        self.new = {}
+        self.seen = {}
+        self.newest = {}
+        self.pages = {}
+        self.stopped_at = {}
+        self.skipped = {}
+        self.failed = {}
+
+    def on_page(self, source, page, offers):
+        with self.lock:
+            mark = self.watermarks.get(source)
+            seen = self.seen.setdefault(source, set())
+            keys = [offer_key(offer) for offer in offers]
+            if page == 1:
+                self.newest[source] = keys[0]
+            self.pages[source] = page
+            new = self.new.setdefault(source, [])
+            already_seen = 0
+            for offer, key in zip(offers, keys):
+                if mark is not None and key in mark["seen"]:
+                    already_seen += 1
+                elif key not in seen:
+                    new.append(offer)
+                seen.add(key)
+            if mark is None:
+                # First refresh: the whole search is the baseline
+                return True
+            if mark["newest_key"] in keys or already_seen >= self.stop_ratio * len(offers):
+                self.stopped_at[source] = page
+                return False
+            return True
+
+    def offers(self):
+        return [offer for offers in self.new.values() for offer in offers]
+
+    def new_count(self):
+        return sum(len(offers) for offers in self.new.values())
+
+    def skip(self, source, reason):
+        # A source the refresh did not run (e.g. one that needs a person for its captcha)
+        with self.lock:
+            self.skipped[source] = reason
+
+    def fail(self, source, status):
+        # A source that did not get through its pages (failed, blocked, timed out): its
+        # watermark stays where it was, or the offers it never reached would pass for old
+        # on the next refresh. What it did find may be reported as new again then.
+        with self.lock:
+            self.failed[source] = status
+            self.newest.pop(source, None)
+            self.seen.pop(source, None)
+
+    def summary(self):
+        summary = {source: {"new": len(self.new.get(source, [])), "pages": self.pages[source], "stopped_early": source in self.stopped_at,
+                            "baseline": source not in self.watermarks} for source in self.pages}
+        for source, status in self.failed.items():
+            if source in summary:
+                summary[source]["failed"] = status
+        for source, reason in self.skipped.items():
+            summary[source] = {"new": 0, "pages": 0, "stopped_early": False, "baseline": source not in self.watermarks, "skipped": reason}
+        return summary
+
+# Refreshes due saved searches in the background, at most `concurrency` at a time.
+# Refreshes go through submit(run_id, fn, *args), i.e. the job scheduler, so they share
+# the browser budget with interactive searches; refresh(run_id, search, delta) does the
+# scraping and returns the per-source outcomes.
+class SavedSearchScheduler:
+    def __init__(self, store, submit, refresh, poll_interval=None, concurrency=None):
+        self.store = store
+        self.submit = submit
+        self.refresh = refresh
+        self.poll_interval = poll_interval if poll_interval is not None else float(os.environ.get("SAVED_SEARCH_POLL", 30))
+        self.concurrency = concurrency if concurrency is not None else int(os.environ.get("SAVED_SEARCH_CONCURRENCY", 2))
+        self.running = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.wake = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.run, name="saved-searches", daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"Saved search scheduler failed: {e}")
+            self.wake.wait(self.poll_interval)
+            self.wake.clear()
+
+    def refresh_now(self, search_id):
+        self.store.reschedule(search_id, 0)
+        self.wake.set()
+
+    def tick(self):
+        with self.lock:
+            free = self.concurrency - len(self.running)
+            if free <= 0:
+                return
+            for search in self.store.due(time.time(), free + len(self.running)):
+                if search["id"] in self.running or len(self.running) >= self.concurrency:
+                    continue
+                run_id = f"saved-{uuid.uuid4()}"
+                self.running.add(search["id"])
+                try:
+                    self.submit(run_id, self.run_refresh, search)
+                except Exception as e:
+                    # Queue full: try again on the next tick
+                    self.running.discard(search["id"])
+                    logging.warning(f"Could not schedule saved search {search['id']}: {e}")
+
+    def run_refresh(self, run_id, search):
+        logging.info(f"Refreshing saved search {search['id']} ({search['query']} in {search['location']})")
+        try:
+            self.store.start_run(run_id, search["id"])
+            delta = RefreshDelta(self.store.watermarks(search["id"]))
+            status = "completed"
+            try:
+                outcomes = self.refresh(run_id, search, delta) or {}
+                for source, outcome in outcomes.items():
+                    if outcome.get("status") == "skipped":
+                        delta.skip(source, outcome.get("reason") or "circuit open")
+                    elif outcome.get("status") != "completed":
+                        delta.fail(source, outcome.get("status"))
+            except Exception as e:
+                logging.error(f"Saved search {search['id']} refresh failed: {e}")
+                status = "failed"
+            self.store.finish_run(run_id, search, status, delta)
+            logging.info(f"Saved search {search['id']}: {delta.new_count()} new offers")
+        finally:
+            with self.lock:
+                self.running.discard(search["id"])
+            self.wake.set()
@@ -0,0 +1,92 @@
+import os
+import logging
+import threading
+import concurrent.futures
+from collections import OrderedDict, deque
+
+class QueueFull(Exception):
+    pass
+
+# Admission control for search jobs.
+# Every running job can hold up to `browsers_per_job` Chromes, so the number of
+# concurrently running jobs is derived from the global browser cap. Waiting jobs
+# sit in per-client queues that are served round-robin, so one client submitting
+# many searches cannot starve everybody else.
+class JobScheduler:
+    def __init__(self, max_browsers=None, browsers_per_job=3, max_queued=None, max_queued_per_client=None):
+        self.max_browsers = max_browsers if max_browsers is not None else int(os.environ.get("MAX_BROWSERS", 6))
+        self.browsers_per_job = browsers_per_job
+        self.max_running = max(1, self.max_browsers // browsers_per_job)
+        self.max_queued = max_queued if max_queued is not None else int(os.environ.get("MAX_QUEUED_JOBS", 20))
+        self.max_queued_per_client = max_queued_per_client if max_queued_per_client is not None else int(os.environ.get("MAX_QUEUED_JOBS_PER_CLIENT", 3))
+        self.queues = OrderedDict() # client_id -> deque of (job_id, fn, args)
+        self.running = set()
+        self.cond = threading.Condition()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_running, thread_name_prefix="search-job")
+
+    def submit(self, job_id, client_id, fn, *args):
+        with self.cond:
+            queued = sum(len(q) for q in self.queues.values())
+            if queued >= self.max_queued:
+                raise QueueFull("Search queue is full, try again later")
+            if len(self.queues.get(client_id, ())) >= self.max_queued_per_client:
+                raise QueueFull("Too many queued searches for this client")
+            self.queues.setdefault(client_id, deque()).append((job_id, fn, args))
+            self._dispatch()
+            return self._position(job_id)
+
+    def position(self, job_id):
+        with self.cond:
+            return self._position(job_id)
+
+    def _order(self):
+        # Order in which queued jobs will be started: one job per client per round
+        clients = list(self.queues.values())
+        depth = max((len(q) for q in clients), default=0)
+        for i in range(depth):
+            for q in clients:
+                if i < len(q):
+                    yield q[i][0]
+
+    def _position(self, job_id):
+        for position, queued_id in enumerate(self._order(), start=1):
+            if queued_id == job_id:
+                return position
+        return None
+
+    def _dispatch(self):
+        # Caller must hold self.cond
+        while len(self.running) < self.max_running and self.queues:
+            client_id, q = next(iter(self.queues.items()))
+            job_id, fn, args = q.popleft()
+            # Move the client to the back of the line (or drop it when drained)
+            del self.queues[client_id]
+            if q:
+                self.queues[client_id] = q
+            self.running.add(job_id)
+            self.executor.submit(self._run, job_id, fn, args)
+
+    def _run(self, job_id, fn, args):
+        try:
+            fn(job_id, *args)
+        except Exception as e:
+            logging.error(f"Job {job_id} crashed: {e}")
+        finally:
+            with self.cond:
+                self.running.discard(job_id)
+                self._dispatch()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "running": len(self.running),
+                "queued": sum(len(q) for q in self.queues.values()),
+                "max_running": self.max_running,
+                "max_browsers": self.max_browsers,
+                "max_queued": self.max_queued,
+            }
+
+    def shutdown(self):
+        with self.cond:
+            self.queues.clear()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,42 @@
+import sys
+import time
+import argparse
+from parsers import PARSERS, parse_offers
+
+# Times every parser backend on a saved results page and checks they agree.
+# Usage: python bench_parsing.py [html_file] [--source InfoJobs] [--runs 20]
+
+def bench(html, source, backend, runs):
+    timings = []
+    offers = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        offers = parse_offers(source, html, backend=backend)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return offers, timings[len(timings) // 2], timings[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the HTML parser backends")
+    parser.add_argument("html_file", nargs="?", default="fixtures/infojobs_search.html")
+    parser.add_argument("--source", default="InfoJobs", choices=["InfoJobs", "Indeed", "LinkedIn"])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.html_file, "r", encoding="utf-8") as f:
+        html = f.read()
+    print(f"{args.html_file}: {len(html) / 1024:.0f} KB, {args.runs} runs per backend")
+
+    results = {}
+    for backend in PARSERS:
+        offers, median, best = bench(html, args.source, backend, args.runs)
+        results[backend] = (offers, median)
+        print(f"{backend:>5}: median {median * 1000:7.1f} ms, best {best * 1000:7.1f} ms, {len(offers)} offers")
+
+    reference = results["bs4"][0]
+    for backend, (offers, median) in results.items():
+        if offers != reference:
+            print(f"MISMATCH: {backend} output differs from bs4")
+            sys.exit(1)
+        if backend != "bs4":
+            print(f"{backend} is {results['bs4'][1] / median:.1f}x faster than bs4")
@@ -0,0 +1,152 @@
+import os
+import time
+import logging
+from selenium.common.exceptions import WebDriverException, InvalidSessionIdException, NoSuchWindowException
+
+# Resolves as soon as an element matching the selector exists, using a MutationObserver
+# inside the page instead of pulling and parsing the whole page source from Python.
+WAIT_FOR_SELECTOR_JS = """
+const selector = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+if (document.querySelector(selector)) {
+    done(true);
+    return;
+}
+let timer = null;
+const observer = new MutationObserver(() => {
+    if (document.querySelector(selector)) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(true);
+    }
+});
+observer.observe(document.documentElement || document, {childList: true, subtree: true});
+timer = setTimeout(() => {
+    observer.disconnect();
+    done(false);
+}, timeoutMs);
+"""
+
+def wait_for_selector(driver, selector, timeout, slice_seconds=None):
+    # Returns True as soon as the selector matches, False after `timeout` seconds.
+    # Navigations (e.g. the page reloading after a captcha) abort the in-page wait,
+    # in which case we simply start observing the new document.
+    # The wait runs in slices: driver commands are serialized, and a single in-page wait
+    # of a minute would hold back every screenshot and click of a user solving a captcha.
+    slice_seconds = slice_seconds if slice_seconds is not None else float(os.environ.get("DRIVER_WAIT_SLICE", 1.0))
+    deadline = time.time() + timeout
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        wait = min(remaining, slice_seconds)
+        try:
+            driver.set_script_timeout(wait + 5)
+            if driver.execute_async_script(WAIT_FOR_SELECTOR_JS, selector, int(wait * 1000)):
+                return True
+        except (InvalidSessionIdException, NoSuchWindowException):
+            # The browser is gone (closed, or killed because the source ran out of time)
+            raise
+        except WebDriverException as e:
+            logging.debug(f"Readiness check interrupted, retrying: {e}")
+            time.sleep(0.2)
+
+# One adaptive scroll round: scroll to the bottom, then resolve as soon as new cards
+# show up, or once the network has been quiet for idleMs (nothing more is coming),
+# or at the round timeout.
+SCROLL_ROUND_JS = """
+const selector = arguments[0];
+const timeoutMs = arguments[1];
+const idleMs = arguments[2];
+const done = arguments[arguments.length - 1];
+const countCards = () => document.querySelectorAll(selector).length;
+const resourceCount = () => performance.getEntriesByType('resource').length;
+performance.setResourceTimingBufferSize(10000);
+const before = countCards();
+const started = Date.now();
+let lastResources = resourceCount();
+let lastActivity = started;
+window.scrollTo(0, document.body.scrollHeight);
+const tick = () => {
+    const now = Date.now();
+    const count = countCards();
+    if (count > before) {
+        done({before: before, after: count, reason: 'cards'});
+        return;
+    }
+    const resources = resourceCount();
+    if (resources !== lastResources) {
+        lastResources = resources;
+        lastActivity = now;
+    }
+    if (now - lastActivity >= idleMs) {
+        done({before: before, after: count, reason: 'idle'});
+    } else if (now - started >= timeoutMs) {
+        done({before: before, after: count, reason: 'timeout'});
+    } else {
+        setTimeout(tick, 100);
+    }
+};
+tick();
+"""
+
+def scroll_until_loaded(driver, selector, max_rounds=None, round_timeout=None, idle_ms=None):
+    # Replaces fixed "scroll + sleep(2)" rounds: each round ends as soon as the page is ready.
+    # Stops early when a round adds no cards. Returns the number of cards each round added.
+    max_rounds = max_rounds if max_rounds is not None else int(os.environ.get("SCROLL_MAX_ROUNDS", 5))
+    round_timeout = round_timeout if round_timeout is not None else float(os.environ.get("SCROLL_ROUND_TIMEOUT", 4))
+    idle_ms = idle_ms if idle_ms is not None else int(os.environ.get("SCROLL_IDLE_MS", 500))
+
+    added = []
+    driver.set_script_timeout(round_timeout + 5)
+    for round_number in range(1, max_rounds + 1):
+        result = driver.execute_async_script(SCROLL_ROUND_JS, selector, int(round_timeout * 1000), idle_ms)
+        added.append(result["after"] - result["before"])
+        logging.info(f"Scroll round {round_number}: +{added[-1]} cards ({result['after']} total, {result['reason']})")
+        if added[-1] == 0:
+            break
+    return added
+
+def load_pages_in_tabs(driver, pages, selector, on_html, concurrency=3, timeout=15, prepare_tab=None):
+    # Loads several result pages at once in background tabs of the same browser (sharing
+    # its cookies and any solved captcha) and hands their HTML to on_html(page, html) in
+    # page order. `pages` is a list of (page_number, url). Stops when on_html returns False.
+    # prepare_tab(driver) runs in each new tab before it navigates: per-tab CDP settings
+    # such as Network.setBlockedURLs don't carry over from the original tab.
+    original = driver.current_window_handle
+    try:
+        for start in range(0, len(pages), concurrency):
+            batch = pages[start:start + concurrency]
+            urls = {f"page-{page}": url for page, url in batch}
+            before = set(driver.window_handles)
+            for name in urls:
+                driver.execute_script("window.open('about:blank', arguments[0]);", name)
+            handles = {}
+            for handle in driver.window_handles:
+                if handle not in before:
+                    driver.switch_to.window(handle)
+                    name = driver.execute_script("return window.name;")
+                    handles[name] = handle
+                    if name in urls:
+                        if prepare_tab:
+                            prepare_tab(driver)
+                        # Setting location doesn't wait for the page to load, so the whole batch loads in parallel
+                        driver.execute_script("window.location.href = arguments[0];", urls[name])
+            for page, url in batch:
+                handle = handles.get(f"page-{page}")
+                if handle is None:
+                    return
+                driver.switch_to.window(handle)
+                wait_for_selector(driver, selector, timeout)
+                html = driver.page_source
+                driver.close()
+                del handles[f"page-{page}"]
+                if not on_html(page, html):
+                    return
+    finally:
+        for handle in driver.window_handles:
+            if handle != original:
+                driver.switch_to.window(handle)
+                driver.close()
+        driver.switch_to.window(original)
@@ -0,0 +1,135 @@
+import os
+import re
+import zlib
+import unicodedata
+
+# Words that don't tell two vacancies apart
+STOPWORDS = {"de", "del", "la", "el", "en", "y", "a", "para", "con", "the", "of", "and", "for", "h", "m", "f", "mf", "hm"}
+# Legal suffixes, so "ACME S.L." and "Acme" are the same company
+COMPANY_SUFFIXES = {"sl", "sa", "slu", "sau", "sll", "scp", "cb", "ltd", "inc", "llc", "gmbh", "spain", "espana", "group", "grupo"}
+
+NUM_PERM = 32
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+# Fixed coefficients for the MinHash permutations (deterministic across processes)
+PERMUTATIONS = [((i * 0x9E3779B1 + 1) % MERSENNE_PRIME, (i * 0x85EBCA77 + 7) % MERSENNE_PRIME) for i in range(1, NUM_PERM + 1)]
+
+def similarity_threshold():
+    return float(os.environ.get("DEDUP_THRESHOLD", 0.7))
+
+def normalize(text):
+    if not text or text == "N/A":
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+def title_tokens(title):
+    return frozenset(t for t in normalize(title).split() if t not in STOPWORDS)
+
+def normalize_company(company):
+    # Dots dropped first so "S.L." reads as "sl"
+    return " ".join(t for t in normalize((company or "").replace(".", "")).split() if t not in COMPANY_SUFFIXES)
+
+def normalize_location(location):
+    # "Madrid, Comunidad de Madrid" and "Madrid" are the same place
+    return normalize((location or "").split(",")[0].split("(")[0])
+
+def minhash(tokens):
+    hashes = [zlib.crc32(t.encode()) for t in tokens]
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+def compatible(a, b):
+    # Same place; a missing location on one side doesn't rule out a match
+    if a["location"] and b["location"] and a["location"] != b["location"]:
+        return False
+    return True
+
+def find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def union(parent, sources, i, j, same_source=False):
+    # Joins the clusters of i and j. A cluster holds one listing per source: two different
+    # listings on the same site (the same employer hiring in two cities, say) are two
+    # vacancies, so unless same_source is allowed such clusters stay apart.
+    root_i, root_j = find(parent, i), find(parent, j)
+    if root_i == root_j:
+        return True
+    if not same_source and sources[root_i] & sources[root_j]:
+        return False
+    root, other = min(root_i, root_j), max(root_i, root_j)
+    parent[other] = root
+    sources[root] = sources[root] | sources.pop(other)
+    return True
+
+def merge(cluster):
+    # The first offer (source order) is the representative; gaps are filled from the others
+    merged = dict(cluster[0])
+    for offer in cluster[1:]:
+        for field, value in offer.items():
+            if merged.get(field) in (None, "", "N/A") and value not in (None, "", "N/A"):
+                merged[field] = value
+    merged["sources"] = list(dict.fromkeys(offer["source"] for offer in cluster))
+    merged["links"] = list({offer["link"]: {"source": offer["source"], "link": offer["link"]} for offer in cluster}.values())
+    return merged
+
+def dedupe_offers(offers, threshold=None):
+    # Clusters offers that describe the same vacancy and merges each cluster into a single
+    # offer listing every source and link. Exact duplicates (same normalized title, company
+    # and location) are grouped by hash; near duplicates ("Programador Python Sr." vs
+    # "Programador Senior Python") at the same company are found with MinHash LSH over the
+    # title words and confirmed with the exact Jaccard similarity, so the cost stays
+    # roughly linear. Only offers from different sites are merged, except repeats of the
+    # very same link (overlapping result pages).
+    # Input order is preserved (by each cluster's first offer).
+    threshold = threshold if threshold is not None else similarity_threshold()
+    keys = []
+    for offer in offers:
+        keys.append({
+            "title": title_tokens(offer.get("title")),
+            "company": normalize_company(offer.get("company")),
+            "location": normalize_location(offer.get("location")),
+        })
+
+    parent = list(range(len(offers)))
+    sources = {i: frozenset([offer.get("source")]) for i, offer in enumerate(offers)}
+    links = {}
+    exact = {}
+    buckets = {}
+    for i, key in enumerate(keys):
+        link = offers[i].get("link")
+        if link and link != "N/A":
+            if link in links:
+                union(parent, sources, i, links[link], same_source=True)
+                continue
+            links[link] = i
+        if not key["title"]:
+            continue
+        exact_key = (key["title"], key["company"], key["location"])
+        if exact_key in exact and union(parent, sources, i, exact[exact_key]):
+            continue
+        exact.setdefault(exact_key, i)
+        signature = minhash(key["title"])
+        checked = set()
+        for band in range(BANDS):
+            # Buckets are per company, so a popular title at many companies stays cheap
+            bucket = buckets.setdefault((key["company"], band, tuple(signature[band * ROWS:(band + 1) * ROWS])), [])
+            for j in bucket:
+                if j in checked:
+                    continue
+                checked.add(j)
+                if compatible(key, keys[j]) and find(parent, i) != find(parent, j) and jaccard(key["title"], keys[j]["title"]) >= threshold:
+                    union(parent, sources, i, j)
+            bucket.append(i)
+
+    clusters = {}
+    for i, offer in enumerate(offers):
+        clusters.setdefault(find(parent, i), []).append(offer)
+    return [merge(cluster) for cluster in clusters.values()]
@@ -0,0 +1,322 @@
+import os
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+from driver_worker import SerializedDriver
+
+HEADLESS_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+HEADED_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# URL patterns blocked through CDP (Network.setBlockedURLs). We only read card HTML,
+# so images, fonts, media, trackers and ads are pure overhead.
+BLOCK_PATTERNS = {
+    "images": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp"],
+    "fonts": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.ogg", "*.mp3", "*.m3u8", "*.wav"],
+    "trackers": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*adservice.google.*", "*facebook.net*", "*connect.facebook.*", "*hotjar.*", "*criteo.*",
+        "*taboola.*", "*outbrain.*", "*scorecardresearch.*", "*segment.io*", "*newrelic.*", "*nr-data.net*",
+        "*bat.bing.com*", "*ads.linkedin.com*", "*px.ads.linkedin.com*", "*snap.licdn.com*",
+        "*adnxs.com*", "*amazon-adsystem.com*",
+    ],
+    # Consent managers (cookie banners): headless scrapers never need them, but a person
+    # solving a captcha may have to get through the banner
+    "consent": ["*onetrust.*", "*cookielaw.org*", "*didomi.io*", "*cookiebot.com*", "*usercentrics.eu*", "*quantcast.mgr.consensu.org*"],
+}
+
+# "full" blocks everything we never look at. The headed InfoJobs browser defaults to
+# "captcha", which keeps images (image challenges) and the consent banner working.
+RESOURCE_POLICIES = {
+    "full": ["images", "fonts", "media", "trackers", "consent"],
+    "captcha": ["fonts", "media", "trackers"],
+    "none": [],
+}
+
+DEFAULT_SOURCE_POLICIES = {
+    "InfoJobs": "captcha",
+    "Indeed": "full",
+    "LinkedIn": "full",
+}
+
+# Sources scraped with headless browsers (InfoJobs uses a headed one for its captcha)
+HEADLESS_SOURCES = ("Indeed", "LinkedIn")
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def resolve_driver_path():
+    # ChromeDriverManager().install() hits the network and the disk cache, so do it once per process.
+    # CHROMEDRIVER_PATH lets deployments skip the download entirely.
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = os.environ.get("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+            logging.info(f"Using chromedriver at {_driver_path}")
+    return _driver_path
+
+def build_options(headless=True):
+    options = Options()
+    # "eager" returns from driver.get() at DOMContentLoaded instead of waiting for every
+    # subresource; the scrapers wait for the cards themselves anyway
+    options.page_load_strategy = os.environ.get("DRIVER_PAGE_LOAD_STRATEGY", "eager")
+    if headless:
+        options.add_argument("--headless")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument(f"user-agent={HEADLESS_USER_AGENT}")
+        if headless_blocks_images():
+            # URL patterns only catch images with a file extension; this content setting stops
+            # every image (CDN URLs without one included). Set at launch, so only when every
+            # source sharing the headless browsers blocks images anyway.
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    else:
+        # Headed browsers are used when a user has to solve a captcha manually
+        options.add_argument("--start-maximized")
+        options.add_argument("--disable-infobars")
+        options.add_argument("--disable-extensions")
+        options.add_argument(f"user-agent={HEADED_USER_AGENT}")
+    return options
+
+def new_driver(headless=True):
+    service = Service(resolve_driver_path())
+    # Every command to the browser runs on its own worker thread, see driver_worker.py
+    return SerializedDriver(webdriver.Chrome(service=service, options=build_options(headless)))
+
+def source_policy(source):
+    return os.environ.get(f"RESOURCE_POLICY_{source.upper()}", DEFAULT_SOURCE_POLICIES.get(source, "none"))
+
+def headless_blocks_images():
+    return all("images" in RESOURCE_POLICIES[source_policy(source)] for source in HEADLESS_SOURCES)
+
+def apply_resource_policy(driver, policy):
+    patterns = [p for group in RESOURCE_POLICIES[policy] for p in BLOCK_PATTERNS[group]]
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        # Blocking is an optimization, never a reason to fail a search
+        logging.warning(f"Could not apply resource policy '{policy}': {e}")
+
+def visited_origins(driver):
+    # Origins of the pages in the current tab's history
+    history = driver.execute_cdp_cmd("Page.getNavigationHistory", {})
+    origins = set()
+    for entry in history.get("entries", []):
+        url = urlsplit(entry.get("url", ""))
+        if url.scheme in ("http", "https"):
+            origins.add(f"{url.scheme}://{url.netloc}")
+    return origins
+
+class PooledDriver:
+    def __init__(self, driver, headless):
+        self.driver = driver
+        self.headless = headless
+        self.created_at = time.time()
+        self.uses = 0
+        self.owner = None
+
+# Keeps warm Chrome instances around so searches don't pay for a browser launch.
+# Drivers are split by mode (headless/headed). A checked-in driver is reset
+# (cookies, extra windows, current page) and recycled once it is too old or
+# has been used too many times.
+class DriverPool:
+    def __init__(self, headless_size=None, headed_size=None, max_age=None, max_uses=None):
+        self.sizes = {
+            True: headless_size if headless_size is not None else int(os.environ.get("DRIVER_POOL_HEADLESS_SIZE", 2)),
+            False: headed_size if headed_size is not None else int(os.environ.get("DRIVER_POOL_HEADED_SIZE", 1)),
+        }
+        self.max_age = max_age if max_age is not None else float(os.environ.get("DRIVER_POOL_MAX_AGE", 1800))
+        self.max_uses = max_uses if max_uses is not None else int(os.environ.get("DRIVER_POOL_MAX_USES", 20))
+        self.idle = {True: [], False: []}
+        self.warming = {True: 0, False: 0}
+        self.in_use = {}
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def start(self):
+        # Resolve the driver binary up front and warm the idle pools in the background
+        try:
+            resolve_driver_path()
+        except Exception as e:
+            logging.error(f"Could not resolve chromedriver: {e}")
+            return
+        threading.Thread(target=self.warm, daemon=True).start()
+
+    def warm(self):
+        # Several warm threads may run at once (startup, checkin, kill): each launch is
+        # counted in `warming` so together they don't go past the pool size, and a driver
+        # that finds the pool full (or closed) once it is up is quit
+        for headless, size in self.sizes.items():
+            while not self.closed:
+                with self.lock:
+                    if len(self.idle[headless]) + self.warming[headless] >= size:
+                        break
+                    self.warming[headless] += 1
+                try:
+                    pooled = PooledDriver(new_driver(headless), headless)
+                except Exception as e:
+                    logging.error(f"Could not warm {'headless' if headless else 'headed'} driver: {e}")
+                    with self.lock:
+                        self.warming[headless] -= 1
+                    break
+                with self.lock:
+                    self.warming[headless] -= 1
+                    full = self.closed or len(self.idle[headless]) >= size
+                    if not full:
+                        self.idle[headless].append(pooled)
+                if full:
+                    self.discard(pooled)
+                    break
+
+    def checkout(self, headless=True, owner=None):
+        while True:
+            with self.lock:
+                pooled = self.idle[headless].pop() if self.idle[headless] else None
+            if pooled is None:
+                pooled = PooledDriver(new_driver(headless), headless)
+            elif not self.is_healthy(pooled):
+                self.discard(pooled)
+                continue
+            pooled.uses += 1
+            pooled.owner = owner
+            with self.lock:
+                self.in_use[id(pooled.driver)] = pooled
+            return pooled.driver
+
+    def checkin(self, driver):
+        with self.lock:
+            pooled = self.in_use.pop(id(driver), None)
+        if pooled is None:
+            # Not ours (or already killed), just make sure it is closed
+            self.quit_driver(driver)
+            return
+
+        if self.closed or self.is_expired(pooled) or not self.reset(pooled):
+            self.discard(pooled)
+            threading.Thread(target=self.warm, daemon=True).start()
+            return
+
+        with self.lock:
+            if len(self.idle[pooled.headless]) < self.sizes[pooled.headless]:
+                self.idle[pooled.headless].append(pooled)
+                return
+        self.discard(pooled)
+
+    def kill_owner(self, owner):
+        # Used to cancel a source that ran out of time: quitting its browser makes any
+        # blocking WebDriver call in the scraper thread fail so the thread can unwind.
+        with self.lock:
+            killed = [p for key, p in self.in_use.items() if p.owner == owner]
+            for pooled in killed:
+                del self.in_use[id(pooled.driver)]
+        for pooled in killed:
+            self.discard(pooled)
+        if killed:
+            threading.Thread(target=self.warm, daemon=True).start()
+        return len(killed)
+
+    def for_owner(self, owner):
+        return OwnedPool(self, owner)
+
+    def is_expired(self, pooled):
+        return time.time() - pooled.created_at > self.max_age or pooled.uses >= self.max_uses
+
+    def is_healthy(self, pooled):
+        if self.is_expired(pooled):
+            return False
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def reset(self, pooled):
+        driver = pooled.driver
+        try:
+            # Note every site the tabs went through before closing them
+            handles = driver.window_handles
+            origins = set()
+            for handle in handles:
+                driver.switch_to.window(handle)
+                origins |= visited_origins(driver)
+            # A fresh tab has no history and no sessionStorage; the old ones go away
+            driver.switch_to.new_window("tab")
+            fresh = driver.current_window_handle
+            for handle in handles:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(fresh)
+            # localStorage, IndexedDB, caches and service workers of those sites
+            for origin in sorted(origins):
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            # Every domain, not just the current page's: restored sessions set cookies for several
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+            return True
+        except Exception as e:
+            logging.warning(f"Driver reset failed, recycling it: {e}")
+            return False
+
+    def discard(self, pooled):
+        self.quit_driver(pooled.driver)
+
+    def quit_driver(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self.lock:
+            return {
+                "idle_headless": len(self.idle[True]),
+                "idle_headed": len(self.idle[False]),
+                "in_use": len(self.in_use),
+                "sizes": {"headless": self.sizes[True], "headed": self.sizes[False]},
+            }
+
+    def shutdown(self):
+        self.closed = True
+        with self.lock:
+            pooled_drivers = self.idle[True] + self.idle[False] + list(self.in_use.values())
+            self.idle = {True: [], False: []}
+            self.in_use = {}
+        for pooled in pooled_drivers:
+            self.discard(pooled)
+
+# View of a pool that tags every checkout with an owner, so all browsers used by
+# one source of one search can be killed together
+class OwnedPool:
+    def __init__(self, pool, owner):
+        self.pool = pool
+        self.owner = owner
+
+    def checkout(self, headless=True):
+        return self.pool.checkout(headless, owner=self.owner)
+
+    def checkin(self, driver):
+        self.pool.checkin(driver)
+
+    def kill(self):
+        return self.pool.kill_owner(self.owner)
+
+def acquire_driver(pool, headless=True, source=None):
+    # Scrapers work both with a shared pool (API, CLI) and standalone
+    driver = pool.checkout(headless) if pool is not None else new_driver(headless)
+    if source is not None:
+        apply_resource_policy(driver, source_policy(source))
+    return driver
+
+def release_driver(pool, driver):
+    if pool is not None:
+        pool.checkin(driver)
+    else:
+        try:
+            driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,136 @@
+import queue
+import logging
+import threading
+import concurrent.futures
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.remote.switch_to import SwitchTo
+from selenium.webdriver.common.alert import Alert
+
+# Properties that only read what the driver already knows (no WebDriver command), safe
+# to read from any thread without queueing behind a long command
+DIRECT_PROPERTIES = {"capabilities", "name"}
+
+# Objects returned by the driver that send commands of their own
+WRAPPED_TYPES = (WebElement, SwitchTo, Alert)
+
+# A thread that owns one WebDriver. Selenium drivers are not thread-safe, and a job's
+# browser is used both by the scraper thread and by API requests (screenshots, clicks
+# while a captcha is solved), so every command goes through this worker's queue and
+# runs on its thread, one at a time, in the order it was submitted.
+class DriverWorker:
+    def __init__(self, driver):
+        self.driver = driver
+        self.queue = queue.Queue()
+        self.closed = False
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name=f"driver-{(driver.session_id or '')[:8]}", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            future, fn, args, kwargs = item
+            if self.closed:
+                # The driver was quit while this waited: it would only fail against a dead browser
+                future.cancel()
+                continue
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn, *args, **kwargs):
+        # Returns a concurrent.futures.Future (await it with asyncio.wrap_future)
+        future = concurrent.futures.Future()
+        with self.lock:
+            if self.closed:
+                future.set_exception(RuntimeError("Driver is closed"))
+                return future
+            self.queue.put((future, fn, args, kwargs))
+        return future
+
+    def call(self, fn, *args, **kwargs):
+        if threading.current_thread() is self.thread:
+            # Already on the worker (e.g. inside a submitted function): queueing would deadlock
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def stop(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.queue.put(None)
+
+def unwrap(value):
+    if isinstance(value, SerializedProxy):
+        return object.__getattribute__(value, "_target")
+    if isinstance(value, (list, tuple)):
+        return type(value)(unwrap(v) for v in value)
+    if isinstance(value, dict):
+        return {k: unwrap(v) for k, v in value.items()}
+    return value
+
+def wrap(worker, value):
+    if isinstance(value, WRAPPED_TYPES):
+        return SerializedProxy(worker, value)
+    if isinstance(value, list) and value and all(isinstance(v, WRAPPED_TYPES) for v in value):
+        return [SerializedProxy(worker, v) for v in value]
+    return value
+
+# Stand-in for a driver (or an element, or driver.switch_to) whose method calls and
+# property reads run on the driver's worker. Plain attributes (session_id, ...) are
+# read directly.
+class SerializedProxy:
+    def __init__(self, worker, target):
+        object.__setattr__(self, "_worker", worker)
+        object.__setattr__(self, "_target", target)
+
+    def __getattr__(self, name):
+        worker = object.__getattribute__(self, "_worker")
+        target = object.__getattribute__(self, "_target")
+        if isinstance(getattr(type(target), name, None), property) and name not in DIRECT_PROPERTIES:
+            return wrap(worker, worker.call(getattr, target, name))
+        value = getattr(target, name)
+        if not callable(value) or name.startswith("__"):
+            return value
+
+        def serialized(*args, **kwargs):
+            return wrap(worker, worker.call(value, *unwrap(args), **unwrap(kwargs)))
+        return serialized
+
+    def __setattr__(self, name, value):
+        worker = object.__getattribute__(self, "_worker")
+        worker.call(setattr, object.__getattribute__(self, "_target"), name, unwrap(value))
+
+    def __eq__(self, other):
+        return object.__getattribute__(self, "_target") == unwrap(other)
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, "_target"))
+
+# The driver handed to scrapers and to the API
+class SerializedDriver(SerializedProxy):
+    def __init__(self, driver):
+        super().__init__(DriverWorker(driver), driver)
+
+    def submit(self, fn, *args, **kwargs):
+        # Runs fn(driver, *args, **kwargs) on the worker as one unit (nothing else touches the
+        # driver in between) and returns a concurrent.futures.Future
+        worker = object.__getattribute__(self, "_worker")
+        return worker.submit(fn, object.__getattribute__(self, "_target"), *args, **kwargs)
+
+    def quit(self):
+        # Not queued: quitting is how a stuck source is cancelled (see DriverPool.kill_owner),
+        # so it must go through even while a command is blocking the worker. The command in
+        # flight then fails and the worker stops.
+        worker = object.__getattribute__(self, "_worker")
+        worker.stop()
+        try:
+            object.__getattribute__(self, "_target").quit()
+        except Exception as e:
+            logging.debug(f"Driver quit failed: {e}")
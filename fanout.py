@@ -0,0 +1,153 @@
+import os
+import time
+import uuid
+import logging
+import concurrent.futures
+from infojobs_search import search_infojobs
+from infojobs_api import get_client
+from indeed_search import search_indeed
+from linkedin_search import search_linkedin
+from source_health import get_source_health
+
+SOURCES = {
+    "InfoJobs": search_infojobs,
+    "Indeed": search_indeed,
+    "LinkedIn": search_linkedin,
+}
+
+# Sources whose browser flow waits for a person (captcha) unless they have an API
+NEEDS_PERSON = {"InfoJobs"}
+
+# InfoJobs may wait up to a minute for a human to solve a captcha, so it gets the biggest budget
+DEFAULT_SOURCE_BUDGETS = {
+    "InfoJobs": 150,
+    "Indeed": 60,
+    "LinkedIn": 60,
+}
+
+def job_deadline():
+    return float(os.environ.get("JOB_DEADLINE", 180))
+
+def source_budget(source):
+    return float(os.environ.get(f"SOURCE_BUDGET_{source.upper()}", DEFAULT_SOURCE_BUDGETS[source]))
+
+def run_sources(query, location, pool=None, status_callback=None, on_source_done=None, deadline=None, budgets=None, sources=None,
+                pages=None, max_results=None, on_page=None, newest=False, health=None, unattended=False):
+    # Runs every source in parallel with its own time budget inside an overall deadline.
+    # A source that runs out of time gets its browser killed and is reported as timed_out
+    # with the pages it had already delivered; whatever the other sources found is still returned.
+    # `pages` / `max_results` apply per source, and on_page(source, page, offers) is
+    # called as each result page arrives, in page order; returning False stops that
+    # source from fetching further pages. `newest` asks the sites for the most recent offers first.
+    # Sources whose circuit is open (see source_health.py) are not run and come back as skipped.
+    # `unattended` runs (background refreshes) have nobody to solve a captcha: InfoJobs only
+    # goes through its API there, and is skipped when the API is not configured.
+    # Returns {source: {"status": ..., "count": ..., "fetch_mode": ..., "circuit": ..., "offers": [...]}}.
+    started = time.time()
+    deadline = deadline if deadline is not None else job_deadline()
+    health = health if health is not None else get_source_health()
+    run_id = uuid.uuid4().hex
+    outcomes = {}
+
+    def finish(source, status, offers):
+        if status == "completed" and not offers:
+            # Zero cards because the site served a bot wall or the scraper hit an error,
+            # not because nothing matched
+            if reports[source].get("blocked"):
+                status = "blocked"
+            elif reports[source].get("error"):
+                status = "failed"
+        circuit = health.record(source, status, len(offers), time.time() - started, reports[source].get("blocked"))
+        outcomes[source] = {"status": status, "count": len(offers), **reports[source], "circuit": circuit, "offers": offers}
+        if on_source_done:
+            on_source_done(source, outcomes[source])
+
+    def skip(source, circuit, reason=None):
+        logging.info(f"Skipping {source}: {reason or f'circuit {circuit}'}")
+        outcomes[source] = {"status": "skipped", "count": 0, "circuit": circuit, "retry_in": health.snapshot(source)["retry_in"], "offers": []}
+        if reason:
+            outcomes[source]["reason"] = reason
+        if on_source_done:
+            on_source_done(source, outcomes[source])
+
+    def guarded_callback(status, driver):
+        # Ignore late status updates from a source that was already cut off
+        if status_callback and "InfoJobs" not in outcomes:
+            status_callback(status, driver)
+
+    def page_callback(source):
+        def deliver(page, offers):
+            # Pages that trickle in after the source was cut off are dropped, and no more are fetched
+            if source in outcomes:
+                return False
+            streamed[source].extend(offers)
+            if on_page:
+                return on_page(source, page, offers)
+        return deliver
+
+    selected = []
+    for source in SOURCES:
+        if sources is not None and source not in sources:
+            continue
+        if unattended and source in NEEDS_PERSON and get_client() is None:
+            skip(source, health.snapshot(source)["state"], "needs a person to solve the captcha")
+            continue
+        allowed, circuit = health.allow(source)
+        if allowed:
+            selected.append(source)
+        else:
+            skip(source, circuit)
+    if not selected:
+        return outcomes
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(selected), thread_name_prefix="source")
+    pending = {}
+    source_deadlines = {}
+    owned_pools = {}
+    # Each source records how it fetched (http/browser) and why it fell back
+    reports = {source: {} for source in selected}
+    streamed = {source: [] for source in selected}
+    for source in selected:
+        search = SOURCES[source]
+        owned_pools[source] = pool.for_owner((run_id, source)) if pool is not None else None
+        kwargs = {"pool": owned_pools[source], "report": reports[source], "on_page": page_callback(source)}
+        if pages is not None:
+            kwargs["pages"] = pages
+        if max_results is not None:
+            kwargs["max_results"] = max_results
+        if newest:
+            kwargs["newest"] = True
+        if source == "InfoJobs":
+            # InfoJobs needs the callback for interaction
+            kwargs["status_callback"] = guarded_callback
+            if unattended:
+                kwargs["allow_browser"] = False
+        pending[executor.submit(search, query, location, **kwargs)] = source
+        budget = (budgets or {}).get(source, source_budget(source))
+        source_deadlines[source] = started + min(budget, deadline)
+
+    try:
+        while pending:
+            timeout = max(0, min(source_deadlines[s] for s in pending.values()) - time.time())
+            done, _ = concurrent.futures.wait(pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    finish(source, "completed", future.result())
+                except Exception as e:
+                    logging.error(f"{source} search failed: {e}")
+                    finish(source, "failed", [])
+
+            now = time.time()
+            for future, source in list(pending.items()):
+                if now >= source_deadlines[source]:
+                    del pending[future]
+                    logging.warning(f"{source} search timed out after {now - started:.0f}s")
+                    if owned_pools[source] is not None:
+                        owned_pools[source].kill()
+                    finish(source, "timed_out", list(streamed[source]))
+    finally:
+        # Don't wait for threads of timed out sources, they unwind once their browser is gone
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return outcomes
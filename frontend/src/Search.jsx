@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { db, auth } from './firebase'
 import { collection, addDoc, query, where, getDocs, deleteDoc, doc } from 'firebase/firestore'
 
@@ -26,11 +26,45 @@ function Search() {
 
     const [jobId, setJobId] = useState(null)
     const [jobStatus, setJobStatus] = useState(null)
-    const [screenshot, setScreenshot] = useState(null)
+    const [viewKey, setViewKey] = useState(0)
+    const [queuePosition, setQueuePosition] = useState(null)
+
+    // Prefer the server-sent event stream: results from each source show up as soon as it finishes.
+    // Browsers without EventSource fall back to polling the job every 2 seconds.
+    const supportsEvents = typeof window !== 'undefined' && 'EventSource' in window
+
+    useEffect(() => {
+        if (!jobId || !supportsEvents) return
+        const BASE_URL = import.meta.env.VITE_API_URL || `http://${window.location.hostname}:8000`
+        const source = new EventSource(`${BASE_URL}/jobs/${jobId}/events`)
+        source.addEventListener('status', (e) => {
+            const data = JSON.parse(e.data)
+            setJobStatus(data.status)
+            if (data.status === 'completed') {
+                setLoading(false)
+                source.close()
+            }
+        })
+        // Deeper result pages stream in while a source is still running
+        source.addEventListener('page', (e) => {
+            const data = JSON.parse(e.data)
+            setResults(prev => [...prev, ...data.offers])
+        })
+        source.addEventListener('source', (e) => {
+            const data = JSON.parse(e.data)
+            setResults(prev => [...prev, ...data.offers])
+        })
+        // Final list with offers listed on several sites merged into one
+        source.addEventListener('results', (e) => {
+            const data = JSON.parse(e.data)
+            setResults(data.offers)
+        })
+        return () => source.close()
+    }, [jobId])
 
     useEffect(() => {
         let interval
-        if (jobId && jobStatus !== 'completed') {
+        if (jobId && jobStatus !== 'completed' && (!supportsEvents || jobStatus === 'queued')) {
             interval = setInterval(checkJobStatus, 2000)
         }
         return () => clearInterval(interval)
@@ -44,51 +78,114 @@ function Search() {
         try {
             const response = await fetch(API_URL)
             const data = await response.json()
+            setQueuePosition(data.queue_position)
+            if (supportsEvents) return // Only polling for the queue position, the stream delivers the rest
             setJobStatus(data.status)
+            setResults(data.results)
             if (data.status === 'completed') {
-                setResults(data.results)
                 setLoading(false)
-            } else if (data.status === 'waiting_input') {
-                fetchScreenshot()
             }
         } catch (error) {
             console.error("Error checking job status:", error)
         }
     }
 
-    const fetchScreenshot = async () => {
-        if (!jobId) return
+    // Live view of the server browser: an MJPEG stream of downscaled frames, sized for
+    // the space we have; a new frame only arrives when the page changes
+    const viewUrl = () => {
         const BASE_URL = import.meta.env.VITE_API_URL || `http://${window.location.hostname}:8000`
-        const API_URL = `${BASE_URL}/jobs/${jobId}/screenshot`
-        try {
-            const response = await fetch(API_URL)
-            if (response.ok) {
-                const blob = await response.blob()
-                setScreenshot(URL.createObjectURL(blob))
+        const maxWidth = Math.min(1280, Math.round(window.innerWidth * (window.devicePixelRatio || 1)))
+        return `${BASE_URL}/jobs/${jobId}/view/stream?quality=60&max_width=${maxWidth}&v=${viewKey}`
+    }
+
+    // Interaction channel: a websocket that takes batches of input events and answers each
+    // batch with the first frame painted after it, so the view follows the captcha closely.
+    // Events are queued and sent once per animation frame. If the socket cannot be opened
+    // the MJPEG view and one POST per click are used instead.
+    const [wsFrame, setWsFrame] = useState(null)
+    const [wsFailed, setWsFailed] = useState(false)
+    const socketRef = useRef(null)
+    const pendingEvents = useRef([])
+    const flushScheduled = useRef(false)
+    const batchId = useRef(0)
+
+    useEffect(() => {
+        if (!jobId || jobStatus !== 'waiting_input' || !('WebSocket' in window)) return
+        const BASE_URL = import.meta.env.VITE_API_URL || `http://${window.location.hostname}:8000`
+        const maxWidth = Math.min(1280, Math.round(window.innerWidth * (window.devicePixelRatio || 1)))
+        const socket = new WebSocket(`${BASE_URL.replace(/^http/, 'ws')}/jobs/${jobId}/interact/ws?quality=60&max_width=${maxWidth}`)
+        socket.binaryType = 'blob'
+        let opened = false
+        let frameUrl = null
+        socket.onopen = () => { opened = true; setWsFailed(false) }
+        socket.onmessage = (e) => {
+            if (typeof e.data === 'string') {
+                const ack = JSON.parse(e.data)
+                if (!ack.ok) console.error("Interaction failed:", ack.error)
+                return
             }
-        } catch (error) {
-            console.error("Error fetching screenshot:", error)
+            if (frameUrl) URL.revokeObjectURL(frameUrl)
+            frameUrl = URL.createObjectURL(e.data)
+            setWsFrame(frameUrl)
+        }
+        socket.onclose = () => {
+            if (!opened) setWsFailed(true)
+            if (socketRef.current === socket) socketRef.current = null
         }
+        socketRef.current = socket
+        return () => {
+            socket.close()
+            if (frameUrl) URL.revokeObjectURL(frameUrl)
+            setWsFrame(null)
+        }
+    }, [jobId, jobStatus, viewKey])
+
+    const flushEvents = () => {
+        flushScheduled.current = false
+        const socket = socketRef.current
+        if (!socket || socket.readyState !== WebSocket.OPEN || pendingEvents.current.length === 0) return
+        batchId.current += 1
+        socket.send(JSON.stringify({ id: batchId.current, events: pendingEvents.current }))
+        pendingEvents.current = []
     }
 
-    const handleImageClick = async (e) => {
-        if (!jobId) return
-        const img = e.target
-        const rect = img.getBoundingClientRect()
+    const queueEvent = (event) => {
+        pendingEvents.current.push(event)
+        if (!flushScheduled.current) {
+            flushScheduled.current = true
+            requestAnimationFrame(flushEvents)
+        }
+    }
 
-        // Calculate scale factor (displayed size vs actual screenshot size)
-        const scaleX = img.naturalWidth / rect.width
-        const scaleY = img.naturalHeight / rect.height
+    // Position of a pointer event as a fraction of the frame, the server maps it to the browser viewport
+    const framePoint = (e) => {
+        const rect = e.currentTarget.getBoundingClientRect()
+        return { x: (e.clientX - rect.left) / rect.width, y: (e.clientY - rect.top) / rect.height }
+    }
 
-        // Calculate click position relative to the image
-        const clickX = e.clientX - rect.left
-        const clickY = e.clientY - rect.top
+    const handleFrameWheel = (e) => {
+        queueEvent({ type: 'scroll', ...framePoint(e), dx: e.deltaX, dy: e.deltaY })
+    }
 
-        // Apply scale to get actual coordinates on the server browser
-        const x = Math.round(clickX * scaleX)
-        const y = Math.round(clickY * scaleY)
+    const handleFrameKey = (e) => {
+        e.preventDefault()
+        if (e.key.length === 1) {
+            queueEvent({ type: 'type', text: e.key })
+        } else {
+            queueEvent({ type: 'key', key: e.key, code: e.code })
+        }
+    }
 
-        console.log(`Click: Displayed(${clickX}, ${clickY}) -> Server(${x}, ${y})`)
+    const handleImageClick = async (e) => {
+        if (!jobId) return
+        const { x, y } = framePoint(e)
+
+        console.log(`Click: (${x.toFixed(3)}, ${y.toFixed(3)}) of the view`)
+
+        if (socketRef.current) {
+            queueEvent({ type: 'click', x, y })
+            return
+        }
 
         const BASE_URL = import.meta.env.VITE_API_URL || `http://${window.location.hostname}:8000`
         const API_URL = `${BASE_URL}/jobs/${jobId}/interact`
@@ -96,10 +193,8 @@ function Search() {
             await fetch(API_URL, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ action: 'click', x, y })
+                body: JSON.stringify({ action: 'click', x, y, normalized: true })
             })
-            // Refresh screenshot after a short delay
-            setTimeout(fetchScreenshot, 1000)
         } catch (error) {
             console.error("Error sending click:", error)
         }
@@ -111,7 +206,6 @@ function Search() {
         setResults([])
         setJobId(null)
         setJobStatus(null)
-        setScreenshot(null)
 
         try {
             const BASE_URL = import.meta.env.VITE_API_URL || `http://${window.location.hostname}:8000`
@@ -122,8 +216,14 @@ function Search() {
                 body: JSON.stringify({ query: queryText, location })
             })
             const data = await response.json()
+            if (response.status === 429) {
+                alert(data.detail || "The server is busy. Please try again in a moment.")
+                setLoading(false)
+                return
+            }
             setJobId(data.job_id)
-            setJobStatus('pending')
+            setJobStatus(data.status)
+            setQueuePosition(data.queue_position)
         } catch (error) {
             console.error("Search failed:", error)
             alert("Search failed. Ensure backend is running.")
@@ -197,28 +297,31 @@ function Search() {
                         </button>
                     </form>
 
+                    {jobStatus === 'queued' && (
+                        <p>⏳ Your search is queued{queuePosition ? ` (position ${queuePosition})` : ''}...</p>
+                    )}
+
                     {jobStatus === 'waiting_input' && (
                         <div className="card" style={{ border: '2px solid orange' }}>
                             <h3>⚠️ Manual Action Required</h3>
-                            <p>Please solve the CAPTCHA below by clicking on the image.</p>
-                            {screenshot ? (
-                                <div style={{ position: 'relative', display: 'inline-block' }}>
-                                    <img
-                                        src={screenshot}
-                                        alt="Browser View"
-                                        onClick={handleImageClick}
-                                        style={{ maxWidth: '100%', cursor: 'crosshair', border: '1px solid #ccc' }}
-                                    />
-                                    <button
-                                        onClick={fetchScreenshot}
-                                        style={{ position: 'absolute', top: 5, right: 5, padding: '5px', fontSize: '0.8em' }}
-                                    >
-                                        🔄 Refresh
-                                    </button>
-                                </div>
-                            ) : (
-                                <p>Loading view...</p>
-                            )}
+                            <p>Please solve the CAPTCHA below by clicking on the image (click it first to type or scroll).</p>
+                            <div style={{ position: 'relative', display: 'inline-block' }}>
+                                <img
+                                    src={wsFailed || !('WebSocket' in window) ? viewUrl() : wsFrame || undefined}
+                                    alt="Browser View"
+                                    tabIndex={0}
+                                    onClick={handleImageClick}
+                                    onWheel={handleFrameWheel}
+                                    onKeyDown={handleFrameKey}
+                                    style={{ maxWidth: '100%', cursor: 'crosshair', border: '1px solid #ccc' }}
+                                />
+                                <button
+                                    onClick={() => setViewKey(k => k + 1)}
+                                    style={{ position: 'absolute', top: 5, right: 5, padding: '5px', fontSize: '0.8em' }}
+                                >
+                                    🔄 Refresh
+                                </button>
+                            </div>
                         </div>
                     )}
 
@@ -238,7 +341,13 @@ function Search() {
                                 {job.salary && job.salary !== 'N/A' && (
                                     <p style={{ color: '#10b981', fontWeight: 'bold' }}>💰 {job.salary}</p>
                                 )}
-                                <p style={{ fontSize: '0.8em', color: 'gray' }}>Source: {job.source}</p>
+                                <p style={{ fontSize: '0.8em', color: 'gray' }}>
+                                    Source: {job.links && job.links.length > 1
+                                        ? job.links.map((l, i) => (
+                                            <span key={i}>{i > 0 && ', '}<a href={l.link} target="_blank" rel="noopener noreferrer">{l.source}</a></span>
+                                        ))
+                                        : job.source}
+                                </p>
                                 <button
                                     onClick={() => saveJob(job)}
                                     disabled={isJobSaved(job.link)}
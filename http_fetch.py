@@ -0,0 +1,98 @@
+import os
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import brotli # noqa: F401 - lets urllib3 decode "br" responses
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+}
+
+# Status codes and page markers that mean we got a bot wall instead of results. The
+# markers also show up on ordinary result pages (Cloudflare injects its challenge
+# script everywhere, LinkedIn links to its authwall), so they only count on a page
+# without any cards.
+BLOCK_STATUSES = {401, 403, 429, 503, 999}
+BLOCK_MARKERS = [
+    "cf-challenge", "challenge-platform", "cf-turnstile", "Just a moment...",
+    "g-recaptcha", "h-captcha", "px-captcha", "Verify you are human", "verify you are a human",
+    "authwall", "Security Verification", "unusual traffic",
+]
+
+class Blocked(Exception):
+    pass
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    # One keep-alive session per process; requests' connection pool is thread-safe
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            retries = Retry(total=1, backoff_factor=0.3, status_forcelist=[502, 504], allowed_methods=["GET"])
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=int(os.environ.get("HTTP_POOL_SIZE", 20)), max_retries=retries)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def http_first_enabled(source):
+    return os.environ.get(f"HTTP_FIRST_{source.upper()}", os.environ.get("HTTP_FIRST", "1")) == "1"
+
+def detect_block(status_code, html):
+    # Call with the html of a page that had no cards
+    if status_code in BLOCK_STATUSES:
+        return f"HTTP {status_code}"
+    for marker in BLOCK_MARKERS:
+        if marker in html:
+            return f"block page ({marker})"
+    return None
+
+def fetch_html(url, params=None, timeout=None):
+    timeout = timeout if timeout is not None else float(os.environ.get("HTTP_TIMEOUT", 10))
+    response = get_session().get(url, params=params, timeout=timeout)
+    if response.status_code in BLOCK_STATUSES:
+        raise Blocked(f"HTTP {response.status_code}")
+    response.raise_for_status()
+    return response.text
+
+def cards_or_block(offers, html):
+    # The offers parsed from a fetched page; a page without any that carries a bot wall
+    # marker raises Blocked instead of passing for an empty search
+    if not offers:
+        reason = detect_block(None, html)
+        if reason:
+            raise Blocked(reason)
+    return offers
+
+def try_http_first(source, fetch_offers, report):
+    # Runs the HTTP path of a source. Returns its offers, or None when the caller should
+    # fall back to the browser; either way the outcome is recorded in `report`.
+    if not http_first_enabled(source):
+        return None
+    try:
+        offers = fetch_offers()
+        if offers:
+            report["fetch_mode"] = "http"
+            return offers
+        report["fallback_reason"] = "no results over HTTP"
+    except Blocked as e:
+        report["fallback_reason"] = f"blocked: {e}"
+    except requests.RequestException as e:
+        report["fallback_reason"] = f"HTTP error: {e}"
+    logging.info(f"{source} HTTP fetch fell back to the browser ({report['fallback_reason']})")
+    return None
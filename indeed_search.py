@@ -1,119 +1,98 @@
-import time
+import os
 import json
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from parse_pool import parse_html
+from driver_pool import new_driver, acquire_driver, release_driver, apply_resource_policy, source_policy
+from browser_utils import wait_for_selector, scroll_until_loaded, load_pages_in_tabs
+from http_fetch import fetch_html, try_http_first, detect_block, cards_or_block
+from paging import PageCollector, fetch_pages_in_order, page_concurrency
+
+# Indeed job cards (current and older layout)
+CARD_SELECTOR = "div.job_seen_beacon, td.resultContent"
+
+SEARCH_URL = "https://es.indeed.com/jobs"
+
+# Indeed pages through results with start=0, 10, 20...
+PAGE_SIZE = 10
 
 def get_driver():
-    options = Options()
-    options.add_argument("--headless") # Run in headless mode
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    return new_driver(headless=True)
+
+def search_url(query, location, page=1, newest=False):
+    # Format query and location for URL
+    formatted_query = query.replace(" ", "+")
+    formatted_location = location.replace(" ", "+")
     
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    return driver
+    # Construct the search URL
+    if formatted_query:
+        url = f"https://es.indeed.com/jobs?q={formatted_query}&l={formatted_location}"
+    else:
+        url = f"https://es.indeed.com/jobs?l={formatted_location}"
+    if page > 1:
+        url += f"&start={(page - 1) * PAGE_SIZE}"
+    if newest:
+        # Most recent first
+        url += "&sort=date"
+    return url
 
-def search_indeed(query, location="madrid"):
-    driver = get_driver()
-    offers = []
+def search_indeed_http(query, location, pages=1, collector=None, newest=False):
+    def fetch_page(page):
+        params = {"l": location}
+        if query:
+            params["q"] = query
+        if page > 1:
+            params["start"] = (page - 1) * PAGE_SIZE
+        if newest:
+            params["sort"] = "date"
+        html = fetch_html(SEARCH_URL, params=params)
+        return cards_or_block(parse_html("Indeed", html), html)
+
+    return fetch_pages_in_order(fetch_page, pages, collector or PageCollector())
+
+def search_indeed(query, location="madrid", pool=None, report=None, pages=1, max_results=None, on_page=None, newest=False):
+    report = report if report is not None else {}
+    collector = PageCollector(on_page, max_results)
+    # Indeed is frequently behind a bot wall for plain HTTP, in which case we go on with Chrome
+    offers = try_http_first("Indeed", lambda: search_indeed_http(query, location, pages, collector, newest), report)
+    if offers:
+        return offers
+    
+    report["fetch_mode"] = "browser"
+    driver = acquire_driver(pool, headless=True, source="Indeed")
+    collector = PageCollector(on_page, max_results)
     
     try:
-        # Format query and location for URL
-        formatted_query = query.replace(" ", "+")
-        formatted_location = location.replace(" ", "+")
-        
-        # Construct the search URL
-        if formatted_query:
-            url = f"https://es.indeed.com/jobs?q={formatted_query}&l={formatted_location}"
+        driver.get(search_url(query, location, newest=newest))
+        # Wait for the cards instead of a flat sleep, then give lazy-loaded results a round
+        if wait_for_selector(driver, CARD_SELECTOR, timeout=float(os.environ.get("INDEED_LOAD_TIMEOUT", 10))):
+            scroll_until_loaded(driver, CARD_SELECTOR, max_rounds=int(os.environ.get("INDEED_SCROLL_ROUNDS", 1)))
         else:
-            url = f"https://es.indeed.com/jobs?l={formatted_location}"
-        
-        driver.get(url)
-        time.sleep(3) # Wait for page to load
+            # No cards: a bot wall looks the same from here as an empty search, tell them apart
+            block = detect_block(None, driver.page_source)
+            if block:
+                report["blocked"] = block
         
         # Indeed often has popups or captchas. Headless might be detected.
         # We'll try to parse the page content.
         
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # Indeed structure changes frequently. This is a best-effort selector.
-        # Look for job cards. Common classes: 'job_seen_beacon', 'result', 'job_seen_beacon'
-        job_cards = soup.find_all('div', class_='job_seen_beacon')
-        
-        if not job_cards:
-            # Fallback for different layout
-            job_cards = soup.find_all('td', class_='resultContent')
-
-        for card in job_cards:
-            try:
-                title_elem = card.find('h2', class_='jobTitle')
-                title = title_elem.get_text(strip=True) if title_elem else "N/A"
-                
-                company_elem = card.find('span', class_='companyName')
-                if not company_elem:
-                     company_elem = card.find('span', attrs={'data-testid': 'company-name'})
-                company = company_elem.get_text(strip=True) if company_elem else "N/A"
-                
-                location_elem = card.find('div', class_='companyLocation')
-                if not location_elem:
-                    location_elem = card.find('div', attrs={'data-testid': 'text-location'})
-                loc = location_elem.get_text(strip=True) if location_elem else "N/A"
-                
-                # Salary
-                salary = "N/A"
-                salary_elem = card.find('div', class_='salary-snippet-container')
-                if not salary_elem:
-                     salary_elem = card.find('div', attrs={'data-testid': 'attribute_snippet_testid'})
-                if not salary_elem:
-                    # Check metadata div
-                    metadata = card.find('div', class_='metadata')
-                    if metadata:
-                        text = metadata.get_text(strip=True)
-                        if "€" in text or "$" in text:
-                            salary = text
-                
-                if salary_elem:
-                    salary = salary_elem.get_text(strip=True)
-
-                # Fallback: Search entire card text
-                if salary == "N/A":
-                    card_text = card.get_text(separator=' ', strip=True)
-                    if "€" in card_text:
-                         import re
-                         match = re.search(r'([\d\.]+\s*[-–]?\s*[\d\.]*)\s*€', card_text)
-                         if match:
-                             salary = match.group(0)
-
-                link_elem = card.find('a', href=True)
-                # Sometimes the link is on the title
-                if title_elem and title_elem.find('a'):
-                    link_elem = title_elem.find('a')
-                
-                link = "https://es.indeed.com" + link_elem['href'] if link_elem else "N/A"
-                
-                offer = {
-                    "title": title,
-                    "company": company,
-                    "location": loc,
-                    "salary": salary,
-                    "link": link,
-                    "source": "Indeed"
-                }
-                offers.append(offer)
-            except Exception as e:
-                continue
+        if collector.add(1, parse_html("Indeed", driver.page_source)) and pages > 1:
+            # Deeper pages load side by side in extra tabs
+            load_pages_in_tabs(
+                driver,
+                [(page, search_url(query, location, page, newest)) for page in range(2, pages + 1)],
+                CARD_SELECTOR,
+                lambda page, html: collector.add(page, parse_html("Indeed", html)),
+                concurrency=page_concurrency(),
+                prepare_tab=lambda tab: apply_resource_policy(tab, source_policy("Indeed")),
+            )
 
     except Exception as e:
         print(f"Error searching Indeed: {e}")
+        report["error"] = str(e)
     finally:
-        driver.quit()
+        release_driver(pool, driver)
         
-    return offers
+    return collector.offers
 
 if __name__ == "__main__":
     results = search_indeed("programador python", "madrid")
@@ -0,0 +1,148 @@
+import os
+import time
+import base64
+import logging
+import threading
+from dotenv import load_dotenv
+from http_fetch import get_session
+from paging import PageCollector, fetch_pages_in_order
+from salary import parse_salary
+
+# Picks up INFOJOBS_CLIENT_ID / INFOJOBS_CLIENT_SECRET from a local .env (see .env.example)
+load_dotenv()
+
+DEFAULT_API_URL = "https://api.infojobs.net/api/9"
+
+class InfoJobsAPIError(Exception):
+    pass
+
+# Client for the official InfoJobs offer search API.
+# Offer search is authorized with the application's client credentials. When
+# INFOJOBS_TOKEN_URL is set the credentials are exchanged for an OAuth bearer token
+# (client_credentials grant) that is cached until shortly before it expires;
+# otherwise the pre-built Basic header is used.
+class InfoJobsClient:
+    def __init__(self, client_id, client_secret, base_url=None, token_url=None, timeout=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.base_url = (base_url or os.environ.get("INFOJOBS_API_URL", DEFAULT_API_URL)).rstrip("/")
+        self.token_url = token_url or os.environ.get("INFOJOBS_TOKEN_URL")
+        self.timeout = timeout if timeout is not None else float(os.environ.get("INFOJOBS_API_TIMEOUT", 10))
+        self.basic_auth = "Basic " + base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
+        self.token = None
+        self.token_expires_at = 0
+        self.token_lock = threading.Lock()
+
+    def authorization(self):
+        if not self.token_url:
+            return self.basic_auth
+        with self.token_lock:
+            if self.token is None or time.time() >= self.token_expires_at:
+                response = get_session().post(
+                    self.token_url,
+                    data={"grant_type": "client_credentials"},
+                    headers={"Authorization": self.basic_auth, "Accept": "application/json"},
+                    timeout=self.timeout,
+                )
+                if response.status_code != 200:
+                    raise InfoJobsAPIError(f"Token request failed with HTTP {response.status_code}")
+                payload = response.json()
+                self.token = payload["access_token"]
+                # Renew a minute early so in-flight page fetches never carry an expired token
+                self.token_expires_at = time.time() + max(0, int(payload.get("expires_in", 3600)) - 60)
+            return f"Bearer {self.token}"
+
+    def fetch_page(self, keyword, page, page_size, order=None):
+        params = {"q": keyword, "page": page, "maxResults": page_size}
+        if order:
+            params["order"] = order
+        response = get_session().get(
+            f"{self.base_url}/offer",
+            params=params,
+            headers={"Authorization": self.authorization(), "Accept": "application/json"},
+            timeout=self.timeout,
+        )
+        if response.status_code == 401 and self.token_url:
+            # Token revoked before its expiry: drop it so the next call fetches a new one
+            with self.token_lock:
+                self.token = None
+        if response.status_code != 200:
+            raise InfoJobsAPIError(f"Offer search failed with HTTP {response.status_code}")
+        return response.json()
+
+    def search(self, keyword, max_pages=None, page_size=None, concurrency=None, on_page=None, max_results=None, order=None):
+        max_pages = max_pages if max_pages is not None else int(os.environ.get("INFOJOBS_API_MAX_PAGES", 2))
+        page_size = page_size if page_size is not None else int(os.environ.get("INFOJOBS_API_PAGE_SIZE", 50))
+        concurrency = concurrency if concurrency is not None else int(os.environ.get("INFOJOBS_API_CONCURRENCY", 4))
+
+        # The first page tells us how many pages there are, the rest are fetched in parallel
+        # and handed over in page order
+        collector = PageCollector(on_page, max_results)
+        first = self.fetch_page(keyword, 1, page_size, order)
+        last_page = min(int(first.get("totalPages", 1) or 1), max_pages)
+        if collector.add(1, [map_offer(item) for item in first.get("items", [])]) and last_page > 1:
+            fetch_pages_in_order(
+                lambda page: [map_offer(item) for item in self.fetch_page(keyword, page, page_size, order).get("items", [])],
+                last_page, collector, concurrency=concurrency, first_page=2,
+            )
+        return collector.offers
+
+def value_of(field):
+    # Dictionary fields come back as {"id": ..., "value": ...}
+    if isinstance(field, dict):
+        return field.get("value")
+    return field
+
+def format_salary(item):
+    if item.get("salaryDescription"):
+        return item["salaryDescription"]
+    salary_min = value_of(item.get("salaryMin"))
+    salary_max = value_of(item.get("salaryMax"))
+    if not salary_min and not salary_max:
+        return "N/A"
+    amount = " - ".join(v for v in (salary_min, salary_max) if v)
+    period = value_of(item.get("salaryPeriod"))
+    return f"{amount} {period}" if period else amount
+
+def map_offer(item):
+    link = item.get("link") or "N/A"
+    salary = format_salary(item)
+    if link.startswith("//"):
+        link = "https:" + link
+    return {
+        "title": item.get("title") or "N/A",
+        "company": (item.get("author") or {}).get("name") or "N/A",
+        "location": item.get("city") or value_of(item.get("province")) or "N/A",
+        "salary": salary,
+        **parse_salary(salary),
+        "link": link,
+        "source": "InfoJobs"
+    }
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    # None when no credentials are configured: callers use the browser instead
+    global _client
+    client_id = os.environ.get("INFOJOBS_CLIENT_ID")
+    client_secret = os.environ.get("INFOJOBS_CLIENT_SECRET")
+    if not client_id or not client_secret or client_id == "your_client_id_here":
+        return None
+    if os.environ.get("INFOJOBS_API", "1") != "1":
+        return None
+    with _client_lock:
+        if _client is None or (_client.client_id, _client.client_secret) != (client_id, client_secret):
+            _client = InfoJobsClient(client_id, client_secret)
+    return _client
+
+def search_infojobs_api(query, location, pages=None, max_results=None, on_page=None, newest=False):
+    client = get_client()
+    if client is None:
+        raise InfoJobsAPIError("InfoJobs API credentials are not configured")
+    # Same keyword the browser search uses
+    keyword = f"{query} {location}" if query else location
+    # Most recently updated first when asked for the newest offers
+    offers = client.search(keyword, max_pages=pages, on_page=on_page, max_results=max_results, order="updated-desc" if newest else None)
+    logging.info(f"InfoJobs API returned {len(offers)} offers.")
+    return offers
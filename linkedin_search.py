@@ -1,116 +1,93 @@
-import time
+import os
 import json
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from parse_pool import parse_html
+from driver_pool import new_driver, acquire_driver, release_driver, apply_resource_policy, source_policy
+from browser_utils import wait_for_selector, scroll_until_loaded, load_pages_in_tabs
+from http_fetch import fetch_html, try_http_first, detect_block, cards_or_block
+from paging import PageCollector, fetch_pages_in_order, page_concurrency
+
+# LinkedIn public job cards (current and older layout)
+CARD_SELECTOR = "div.base-card, li.result-card"
+
+GUEST_API_URL = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+
+# Results per page, both for the guest API and the public search page (start=)
+PAGE_SIZE = 25
 
 def get_driver():
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    return driver
+    return new_driver(headless=True)
+
+def search_url(query, location, page=1, newest=False):
+    # LinkedIn public jobs url
+    formatted_query = query.replace(" ", "%20")
+    formatted_location = location.replace(" ", "%20")
+    # Construct the search URL
+    if query:
+        url = f"https://www.linkedin.com/jobs/search?keywords={formatted_query}&location={formatted_location}"
+    else:
+        url = f"https://www.linkedin.com/jobs/search?location={formatted_location}"
+    if page > 1:
+        url += f"&start={(page - 1) * PAGE_SIZE}"
+    if newest:
+        # Most recent first
+        url += "&sortBy=DD"
+    return url
 
-def search_linkedin(query, location="madrid"):
-    driver = get_driver()
-    offers = []
+def search_linkedin_http(query, location, pages=1, collector=None, newest=False):
+    # The guest jobs API returns the same job cards as the public search page, as plain HTML
+    def fetch_page(page):
+        params = {"location": location, "start": (page - 1) * PAGE_SIZE}
+        if query:
+            params["keywords"] = query
+        if newest:
+            params["sortBy"] = "DD"
+        html = fetch_html(GUEST_API_URL, params=params)
+        return cards_or_block(parse_html("LinkedIn", html), html)
+
+    return fetch_pages_in_order(fetch_page, pages, collector or PageCollector())
+
+def search_linkedin(query, location="madrid", pool=None, report=None, pages=1, max_results=None, on_page=None, newest=False):
+    report = report if report is not None else {}
+    collector = PageCollector(on_page, max_results)
+    offers = try_http_first("LinkedIn", lambda: search_linkedin_http(query, location, pages, collector, newest), report)
+    if offers:
+        return offers
+    
+    report["fetch_mode"] = "browser"
+    driver = acquire_driver(pool, headless=True, source="LinkedIn")
+    collector = PageCollector(on_page, max_results)
     
     try:
-        # LinkedIn public jobs url
-        formatted_query = query.replace(" ", "%20")
-        formatted_location = location.replace(" ", "%20")
-        # Construct the search URL
-        if query:
-            url = f"https://www.linkedin.com/jobs/search?keywords={formatted_query}&location={formatted_location}"
-        else:
-            url = f"https://www.linkedin.com/jobs/search?location={formatted_location}"
-        
-        driver.get(url)
+        driver.get(search_url(query, location, newest=newest))
         
         # Scroll down to load more jobs (LinkedIn lazy loads)
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        for _ in range(3):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
+        if wait_for_selector(driver, CARD_SELECTOR, timeout=10):
+            scroll_until_loaded(driver, CARD_SELECTOR, max_rounds=int(os.environ.get("LINKEDIN_SCROLL_ROUNDS", 3)))
+        else:
+            # No cards: a bot wall looks the same from here as an empty search, tell them apart
+            block = detect_block(None, driver.page_source)
+            if block:
+                report["blocked"] = block
             
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # LinkedIn public job card classes
-        job_cards = soup.find_all('div', class_='base-card')
-        
-        if not job_cards:
-             job_cards = soup.find_all('li', class_='result-card')
-
-        for card in job_cards:
-            try:
-                title_elem = card.find('h3', class_='base-search-card__title')
-                title = title_elem.get_text(strip=True) if title_elem else "N/A"
-                
-                company_elem = card.find('h4', class_='base-search-card__subtitle')
-                company = company_elem.get_text(strip=True) if company_elem else "N/A"
-                
-                location_elem = card.find('span', class_='job-search-card__location')
-                loc = location_elem.get_text(strip=True) if location_elem else "N/A"
-                
-                # Salary (LinkedIn public search sometimes shows it)
-                salary = "N/A"
-                salary_elem = card.find('span', class_='job-search-card__salary-info')
-                if salary_elem:
-                    salary = salary_elem.get_text(strip=True).replace('\n', '').strip()
-                else:
-                    # Fallback: check metadata text for currency symbols
-                    metadata = card.find('div', class_='base-card__metadata')
-                    if metadata:
-                        text = metadata.get_text(strip=True)
-                        if "€" in text or "$" in text:
-                            # Try to extract the salary part (simple heuristic)
-                            parts = text.split('\n')
-                            for part in parts:
-                                if "€" in part or "$" in part:
-                                    salary = part.strip()
-                                    break
-                
-                # Fallback: Search entire card text
-                if salary == "N/A":
-                    card_text = card.get_text(separator=' ', strip=True)
-                    if "€" in card_text:
-                         import re
-                         match = re.search(r'([\d\.]+\s*[-–]?\s*[\d\.]*)\s*€', card_text)
-                         if match:
-                             salary = match.group(0)
-
-                link_elem = card.find('a', class_='base-card__full-link')
-                link = link_elem['href'] if link_elem else "N/A"
-                
-                offer = {
-                    "title": title,
-                    "company": company,
-                    "location": loc,
-                    "salary": salary,
-                    "link": link,
-                    "source": "LinkedIn"
-                }
-                offers.append(offer)
-            except Exception as e:
-                continue
+        if collector.add(1, parse_html("LinkedIn", driver.page_source)) and pages > 1:
+            # Deeper pages load side by side in extra tabs
+            load_pages_in_tabs(
+                driver,
+                [(page, search_url(query, location, page, newest)) for page in range(2, pages + 1)],
+                CARD_SELECTOR,
+                lambda page, html: collector.add(page, parse_html("LinkedIn", html)),
+                concurrency=page_concurrency(),
+                prepare_tab=lambda tab: apply_resource_policy(tab, source_policy("LinkedIn")),
+            )
 
     except Exception as e:
         print(f"Error searching LinkedIn: {e}")
+        report["error"] = str(e)
     finally:
-        driver.quit()
+        release_driver(pool, driver)
         
-    return offers
+    return collector.offers
 
 if __name__ == "__main__":
     results = search_linkedin("programador python", "madrid")
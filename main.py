@@ -1,44 +1,39 @@
 import argparse
 import json
-import concurrent.futures
-from infojobs_search import search_infojobs
-from indeed_search import search_indeed
-from linkedin_search import search_linkedin
+from driver_pool import DriverPool
+from fanout import run_sources
+from dedup import dedupe_offers
 
-def search_all(query, location):
+def search_all(query, location, pool=None, deadline=None, pages=None, max_results=None):
     results = []
     
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future_infojobs = executor.submit(search_infojobs, query, location)
-        future_indeed = executor.submit(search_indeed, query, location)
-        future_linkedin = executor.submit(search_linkedin, query, location)
-        
-        try:
-            results.extend(future_infojobs.result())
-        except Exception as e:
-            print(f"InfoJobs search failed: {e}")
+    outcomes = run_sources(query, location, pool=pool, deadline=deadline, pages=pages, max_results=max_results)
+    for source, outcome in outcomes.items():
+        if outcome['status'] != 'completed':
+            print(f"{source} search {outcome['status']}")
+        results.extend(outcome['offers'])
             
-        try:
-            results.extend(future_indeed.result())
-        except Exception as e:
-            print(f"Indeed search failed: {e}")
-            
-        try:
-            results.extend(future_linkedin.result())
-        except Exception as e:
-            print(f"LinkedIn search failed: {e}")
-            
-    return results
+    # The same vacancy is often listed on several sites
+    return dedupe_offers(results)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Search for jobs on InfoJobs, Indeed, and LinkedIn")
     parser.add_argument("query", help="Job title or keywords")
     parser.add_argument("location", help="Location (city or province)")
+    parser.add_argument("--pages", type=int, default=None, help="Result pages to fetch per source, in parallel (default: 1)")
+    parser.add_argument("--max-results", type=int, default=None, help="Stop each source after this many offers")
+    parser.add_argument("--deadline", type=float, default=None, help="Overall time limit in seconds (default: JOB_DEADLINE or 180)")
     
     args = parser.parse_args()
     
     print(f"Searching for '{args.query}' in '{args.location}'...")
-    all_offers = search_all(args.query, args.location)
+    # One warm headed browser for InfoJobs and two headless ones for Indeed/LinkedIn
+    pool = DriverPool(headless_size=2, headed_size=1)
+    pool.start()
+    try:
+        all_offers = search_all(args.query, args.location, pool=pool, deadline=args.deadline, pages=args.pages, max_results=args.max_results)
+    finally:
+        pool.shutdown()
     
     print(json.dumps(all_offers, indent=2, ensure_ascii=False))
     print(f"\nFound {len(all_offers)} offers.")
@@ -0,0 +1,60 @@
+import os
+import logging
+import concurrent.futures
+
+def page_concurrency():
+    return int(os.environ.get("PAGE_CONCURRENCY", 3))
+
+# Collects the offers of consecutive result pages (numbered from 1), passing each
+# page to `on_page` in page order and stopping once `max_results` offers are in, or
+# when on_page returns False (e.g. a refresh that reached offers it has already seen).
+class PageCollector:
+    def __init__(self, on_page=None, max_results=None):
+        self.on_page = on_page
+        self.max_results = max_results
+        self.offers = []
+        self.stopped = False
+
+    @property
+    def full(self):
+        return self.stopped or (self.max_results is not None and len(self.offers) >= self.max_results)
+
+    def add(self, page, offers):
+        # Returns False when no more pages are wanted
+        if self.full:
+            return False
+        if self.max_results is not None:
+            offers = offers[:self.max_results - len(self.offers)]
+        self.offers.extend(offers)
+        if self.on_page and offers and self.on_page(page, offers) is False:
+            self.stopped = True
+        return not self.full
+
+def fetch_pages_in_order(fetch_page, pages, collector, concurrency=None, first_page=1):
+    # Fetches pages first_page..pages with at most `concurrency` requests in flight and
+    # hands them to the collector in order, so the total time is close to the slowest
+    # page rather than the sum. An empty page ends the search. Errors on page 1 propagate
+    # (the caller may fall back); later failures just end the search early, also when
+    # the caller fetched page 1 itself and starts from first_page=2.
+    concurrency = max(1, concurrency if concurrency is not None else page_concurrency())
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="page") as executor:
+        futures = {}
+        next_page = first_page
+        try:
+            for page in range(first_page, pages + 1):
+                while next_page <= pages and next_page < page + concurrency:
+                    futures[next_page] = executor.submit(fetch_page, next_page)
+                    next_page += 1
+                try:
+                    offers = futures.pop(page).result()
+                except Exception as e:
+                    if page == 1:
+                        raise
+                    logging.warning(f"Page {page} failed, keeping the first {page - 1} pages: {e}")
+                    break
+                if not collector.add(page, offers) or not offers:
+                    break
+        finally:
+            for future in futures.values():
+                future.cancel()
+    return collector.offers
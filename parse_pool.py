@@ -0,0 +1,62 @@
+import os
+import logging
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from parsers import parse_offers
+
+# Optional process pool for the HTML -> offers step. Parsing a results page is
+# pure CPU work that holds the GIL; in the API process that stalls the event loop,
+# so workers get the raw HTML and send back compact rows instead.
+# Until start_parse_pool() is called everything is parsed in-process (CLI, scripts).
+
+_executor = None
+_workers = 0
+_lock = threading.Lock()
+
+def start_parse_pool(workers=None):
+    global _executor, _workers
+    workers = workers if workers is not None else int(os.environ.get("PARSE_WORKERS", 2))
+    if workers <= 0:
+        return
+    with _lock:
+        if _executor is None:
+            _workers = workers
+            # spawn: forking a process that already runs threads (uvicorn, driver pool) is unsafe
+            _executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            # Start the workers now instead of on the first search
+            for _ in range(workers):
+                _executor.submit(int)
+
+def shutdown_parse_pool():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def parse_compact(source, html):
+    # Runs in a worker: field names once plus one tuple per offer keeps the pickled reply small
+    offers = parse_offers(source, html)
+    if not offers:
+        return (), []
+    fields = tuple(offers[0].keys())
+    return fields, [tuple(offer[field] for field in fields) for offer in offers]
+
+def parse_html(source, html):
+    executor = _executor
+    if executor is None:
+        return parse_offers(source, html)
+    try:
+        fields, rows = executor.submit(parse_compact, source, html).result()
+    except BrokenProcessPool as e:
+        # A worker died (OOM, killed): replace the pool and parse this page in-process
+        logging.error(f"Parse pool is broken, restarting it: {e}")
+        with _lock:
+            broken = _executor is executor
+        if broken:
+            shutdown_parse_pool()
+            start_parse_pool(_workers)
+        return parse_offers(source, html)
+    return [dict(zip(fields, row)) for row in rows]
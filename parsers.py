@@ -0,0 +1,495 @@
+import os
+import re
+import logging
+from bs4 import BeautifulSoup
+from salary import parse_salary
+
+try:
+    import lxml.html
+    from lxml.etree import ParserError
+except ImportError:
+    lxml = None
+
+# "lxml" walks each card once on a libxml2 tree; "bs4" is the original BeautifulSoup
+# implementation, kept as the reference the fast path must match offer for offer.
+DEFAULT_BACKEND = os.environ.get("PARSER_BACKEND", "lxml" if lxml is not None else "bs4")
+
+SALARY_PATTERN = re.compile(r'([\d\.]+\s*[-–]?\s*[\d\.]*)\s*€')
+
+# BeautifulSoup leaves the text of these tags out of get_text()
+SKIP_TEXT_TAGS = {"script", "style", "template"}
+
+# --- BeautifulSoup backend ---
+
+def parse_infojobs_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    offers = []
+
+    # Try to find job cards with the new structure (divs instead of lis)
+    job_items = soup.find_all('div', class_='sui-AtomCard')
+
+    if not job_items:
+         # Fallback to finding by title class if card container is elusive
+         logging.info("Standard card container not found, trying to find by title class...")
+         titles = soup.find_all('h2', class_='ij-OfferCardContent-description-title')
+         job_items = [t.find_parent('div', class_='sui-AtomCard') for t in titles if t.find_parent('div', class_='sui-AtomCard')]
+
+    logging.info(f"Found {len(job_items)} potential job cards.")
+
+    for card in job_items:
+        try:
+            # Title
+            title_elem = card.find('a', class_='ij-OfferCardContent-description-title-link')
+            if not title_elem:
+                # Try h2
+                title_elem = card.find('h2', class_='ij-OfferCardContent-description-title')
+
+            title = title_elem.get_text(strip=True) if title_elem else "N/A"
+
+            # Link
+            link = "N/A"
+            if title_elem and title_elem.name == 'a':
+                link = title_elem['href']
+            elif title_elem and title_elem.find('a'):
+                link = title_elem.find('a')['href']
+
+            if link != "N/A":
+                if link.startswith("//"):
+                    link = "https:" + link
+                elif link.startswith("/"):
+                    link = "https://www.infojobs.net" + link
+
+            # Company
+            company_elem = card.find('h3', class_='ij-OfferCardContent-description-subtitle')
+            company = company_elem.get_text(strip=True) if company_elem else "N/A"
+
+            # Location, Date, and Salary
+            loc = "N/A"
+            date_posted = "N/A"
+            salary = "N/A"
+
+            details_list = card.find('ul', class_='ij-OfferCardContent-description-list')
+            if details_list:
+                for item in details_list.find_all('li'):
+                    text = item.get_text(strip=True)
+                    has_salary_class = item.find('span', class_='ij-OfferCardContent-description-salary') is not None
+                    loc, date_posted, salary = classify_infojobs_detail(text, has_salary_class, loc, date_posted, salary)
+
+            # Fallback: Search entire card text for salary if not found
+            if salary == "N/A":
+                card_text = card.get_text(separator=' ', strip=True)
+                if "€" in card_text:
+                    # Simple heuristic: find the part with €
+                    match = SALARY_PATTERN.search(card_text)
+                    if match:
+                        salary = match.group(0) + " (Est.)"
+
+            offers.append(make_offer(title, company, loc, salary, link, "InfoJobs"))
+        except Exception as e:
+            continue
+
+    return offers
+
+def parse_indeed_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    offers = []
+
+    # Indeed structure changes frequently. This is a best-effort selector.
+    # Look for job cards. Common classes: 'job_seen_beacon', 'result', 'job_seen_beacon'
+    job_cards = soup.find_all('div', class_='job_seen_beacon')
+
+    if not job_cards:
+        # Fallback for different layout
+        job_cards = soup.find_all('td', class_='resultContent')
+
+    for card in job_cards:
+        try:
+            title_elem = card.find('h2', class_='jobTitle')
+            title = title_elem.get_text(strip=True) if title_elem else "N/A"
+
+            company_elem = card.find('span', class_='companyName')
+            if not company_elem:
+                 company_elem = card.find('span', attrs={'data-testid': 'company-name'})
+            company = company_elem.get_text(strip=True) if company_elem else "N/A"
+
+            location_elem = card.find('div', class_='companyLocation')
+            if not location_elem:
+                location_elem = card.find('div', attrs={'data-testid': 'text-location'})
+            loc = location_elem.get_text(strip=True) if location_elem else "N/A"
+
+            # Salary
+            salary = "N/A"
+            salary_elem = card.find('div', class_='salary-snippet-container')
+            if not salary_elem:
+                 salary_elem = card.find('div', attrs={'data-testid': 'attribute_snippet_testid'})
+            if not salary_elem:
+                # Check metadata div
+                metadata = card.find('div', class_='metadata')
+                if metadata:
+                    text = metadata.get_text(strip=True)
+                    if "€" in text or "$" in text:
+                        salary = text
+
+            if salary_elem:
+                salary = salary_elem.get_text(strip=True)
+
+            # Fallback: Search entire card text
+            if salary == "N/A":
+                card_text = card.get_text(separator=' ', strip=True)
+                if "€" in card_text:
+                     match = SALARY_PATTERN.search(card_text)
+                     if match:
+                         salary = match.group(0)
+
+            link_elem = card.find('a', href=True)
+            # Sometimes the link is on the title
+            if title_elem and title_elem.find('a'):
+                link_elem = title_elem.find('a')
+
+            link = "https://es.indeed.com" + link_elem['href'] if link_elem else "N/A"
+
+            offers.append(make_offer(title, company, loc, salary, link, "Indeed"))
+        except Exception as e:
+            continue
+
+    return offers
+
+def parse_linkedin_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    offers = []
+
+    # LinkedIn public job card classes
+    job_cards = soup.find_all('div', class_='base-card')
+
+    if not job_cards:
+         job_cards = soup.find_all('li', class_='result-card')
+
+    for card in job_cards:
+        try:
+            title_elem = card.find('h3', class_='base-search-card__title')
+            title = title_elem.get_text(strip=True) if title_elem else "N/A"
+
+            company_elem = card.find('h4', class_='base-search-card__subtitle')
+            company = company_elem.get_text(strip=True) if company_elem else "N/A"
+
+            location_elem = card.find('span', class_='job-search-card__location')
+            loc = location_elem.get_text(strip=True) if location_elem else "N/A"
+
+            # Salary (LinkedIn public search sometimes shows it)
+            salary = "N/A"
+            salary_elem = card.find('span', class_='job-search-card__salary-info')
+            if salary_elem:
+                salary = salary_elem.get_text(strip=True).replace('\n', '').strip()
+            else:
+                # Fallback: check metadata text for currency symbols
+                metadata = card.find('div', class_='base-card__metadata')
+                if metadata:
+                    salary = linkedin_metadata_salary(metadata.get_text(strip=True), salary)
+
+            # Fallback: Search entire card text
+            if salary == "N/A":
+                card_text = card.get_text(separator=' ', strip=True)
+                if "€" in card_text:
+                     match = SALARY_PATTERN.search(card_text)
+                     if match:
+                         salary = match.group(0)
+
+            link_elem = card.find('a', class_='base-card__full-link')
+            link = link_elem['href'] if link_elem else "N/A"
+
+            offers.append(make_offer(title, company, loc, salary, link, "LinkedIn"))
+        except Exception as e:
+            continue
+
+    return offers
+
+# --- Shared field heuristics ---
+
+def make_offer(title, company, loc, salary, link, source):
+    return {
+        "title": title,
+        "company": company,
+        "location": loc,
+        "salary": salary,
+        # salary_min / salary_max / salary_currency / salary_period
+        **parse_salary(salary),
+        "link": link,
+        "source": source
+    }
+
+def classify_infojobs_detail(text, has_salary_class, loc, date_posted, salary):
+    lower = text.lower()
+    # Check for specific salary class
+    if has_salary_class:
+         salary = text
+    elif "€" in text or "bruto" in lower or "s/a" in lower or "salario" in lower:
+         if "no disponible" not in lower:
+             salary = text
+    elif "hace" in lower:
+        date_posted = text
+    elif "presencial" in lower or "híbrido" in lower or "teletrabajo" in lower:
+        pass
+    elif len(text) < 30 and "contrato" not in lower and "jornada" not in lower:
+         if loc == "N/A":
+             loc = text
+    return loc, date_posted, salary
+
+def linkedin_metadata_salary(text, salary):
+    if "€" in text or "$" in text:
+        # Try to extract the salary part (simple heuristic)
+        for part in text.split('\n'):
+            if "€" in part or "$" in part:
+                return part.strip()
+    return salary
+
+# --- lxml backend ---
+
+def parse_tree(html):
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # Unicode strings with an encoding declaration are rejected by lxml
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+
+def has_class(el, name):
+    return name in el.get("class", "").split()
+
+def iter_strings(el):
+    # Same strings BeautifulSoup's get_text() sees: no comments, no script/style content
+    if el.tag in SKIP_TEXT_TAGS:
+        return
+    if el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from iter_strings(child)
+        if child.tail:
+            yield child.tail
+
+def get_text(el, separator=''):
+    return separator.join(s.strip() for s in iter_strings(el) if s.strip())
+
+def matches(el, rule):
+    tag, attr, value = rule
+    if el.tag != tag:
+        return False
+    if attr == "class":
+        return has_class(el, value)
+    if value is True:
+        return el.get(attr) is not None
+    return el.get(attr) == value
+
+def first_matches(card, rules):
+    # One walk over the card's descendants, keeping the first element matching each rule
+    found = {}
+    remaining = dict(rules)
+    elements = card.iter()
+    next(elements) # find() only looks at descendants, never the card itself
+    for el in elements:
+        if not isinstance(el.tag, str):
+            continue
+        for name, rule in list(remaining.items()):
+            if matches(el, rule):
+                found[name] = el
+                del remaining[name]
+        if not remaining:
+            break
+    return found
+
+def find_cards(root, tag, class_name):
+    return [el for el in root.iter(tag) if has_class(el, class_name)]
+
+def first_descendant(el, tag):
+    for child in el.iter(tag):
+        if child is not el:
+            return child
+    return None
+
+def regex_salary(card, suffix=""):
+    card_text = get_text(card, ' ')
+    if "€" in card_text:
+        match = SALARY_PATTERN.search(card_text)
+        if match:
+            return match.group(0) + suffix
+    return "N/A"
+
+INFOJOBS_RULES = {
+    "title_link": ("a", "class", "ij-OfferCardContent-description-title-link"),
+    "title_h2": ("h2", "class", "ij-OfferCardContent-description-title"),
+    "company": ("h3", "class", "ij-OfferCardContent-description-subtitle"),
+    "details": ("ul", "class", "ij-OfferCardContent-description-list"),
+}
+
+def parse_infojobs_lxml(html):
+    try:
+        root = parse_tree(html)
+    except ParserError:
+        return []
+    offers = []
+
+    job_items = find_cards(root, 'div', 'sui-AtomCard')
+    if not job_items:
+        # A title outside of any sui-AtomCard can't be mapped back to a card either
+        logging.info("Standard card container not found, trying to find by title class...")
+
+    logging.info(f"Found {len(job_items)} potential job cards.")
+
+    for card in job_items:
+        try:
+            found = first_matches(card, INFOJOBS_RULES)
+            title_elem = found.get("title_link")
+            if title_elem is None:
+                title_elem = found.get("title_h2")
+            title = get_text(title_elem) if title_elem is not None else "N/A"
+
+            link = "N/A"
+            if title_elem is not None:
+                link_elem = title_elem if title_elem.tag == 'a' else first_descendant(title_elem, 'a')
+                if link_elem is not None:
+                    link = link_elem.attrib['href']
+            if link != "N/A":
+                if link.startswith("//"):
+                    link = "https:" + link
+                elif link.startswith("/"):
+                    link = "https://www.infojobs.net" + link
+
+            company = get_text(found["company"]) if "company" in found else "N/A"
+
+            loc = "N/A"
+            date_posted = "N/A"
+            salary = "N/A"
+            if "details" in found:
+                for item in found["details"].iter('li'):
+                    has_salary_class = any(has_class(span, 'ij-OfferCardContent-description-salary') for span in item.iter('span'))
+                    loc, date_posted, salary = classify_infojobs_detail(get_text(item), has_salary_class, loc, date_posted, salary)
+
+            if salary == "N/A":
+                salary = regex_salary(card, " (Est.)")
+
+            offers.append(make_offer(title, company, loc, salary, link, "InfoJobs"))
+        except Exception as e:
+            continue
+
+    return offers
+
+INDEED_RULES = {
+    "title": ("h2", "class", "jobTitle"),
+    "company": ("span", "class", "companyName"),
+    "company_testid": ("span", "data-testid", "company-name"),
+    "location": ("div", "class", "companyLocation"),
+    "location_testid": ("div", "data-testid", "text-location"),
+    "salary": ("div", "class", "salary-snippet-container"),
+    "salary_testid": ("div", "data-testid", "attribute_snippet_testid"),
+    "metadata": ("div", "class", "metadata"),
+    "link": ("a", "href", True),
+}
+
+def parse_indeed_lxml(html):
+    try:
+        root = parse_tree(html)
+    except ParserError:
+        return []
+    offers = []
+
+    job_cards = find_cards(root, 'div', 'job_seen_beacon')
+    if not job_cards:
+        job_cards = find_cards(root, 'td', 'resultContent')
+
+    for card in job_cards:
+        try:
+            found = first_matches(card, INDEED_RULES)
+            title_elem = found.get("title")
+            title = get_text(title_elem) if title_elem is not None else "N/A"
+
+            company_elem = found.get("company", found.get("company_testid"))
+            company = get_text(company_elem) if company_elem is not None else "N/A"
+
+            location_elem = found.get("location", found.get("location_testid"))
+            loc = get_text(location_elem) if location_elem is not None else "N/A"
+
+            salary = "N/A"
+            salary_elem = found.get("salary", found.get("salary_testid"))
+            if salary_elem is not None:
+                salary = get_text(salary_elem)
+            elif "metadata" in found:
+                text = get_text(found["metadata"])
+                if "€" in text or "$" in text:
+                    salary = text
+
+            if salary == "N/A":
+                salary = regex_salary(card)
+
+            link_elem = found.get("link")
+            title_link = first_descendant(title_elem, 'a') if title_elem is not None else None
+            if title_link is not None:
+                link_elem = title_link
+            link = "https://es.indeed.com" + link_elem.attrib['href'] if link_elem is not None else "N/A"
+
+            offers.append(make_offer(title, company, loc, salary, link, "Indeed"))
+        except Exception as e:
+            continue
+
+    return offers
+
+LINKEDIN_RULES = {
+    "title": ("h3", "class", "base-search-card__title"),
+    "company": ("h4", "class", "base-search-card__subtitle"),
+    "location": ("span", "class", "job-search-card__location"),
+    "salary": ("span", "class", "job-search-card__salary-info"),
+    "metadata": ("div", "class", "base-card__metadata"),
+    "link": ("a", "class", "base-card__full-link"),
+}
+
+def parse_linkedin_lxml(html):
+    try:
+        root = parse_tree(html)
+    except ParserError:
+        return []
+    offers = []
+
+    job_cards = find_cards(root, 'div', 'base-card')
+    if not job_cards:
+        job_cards = find_cards(root, 'li', 'result-card')
+
+    for card in job_cards:
+        try:
+            found = first_matches(card, LINKEDIN_RULES)
+            title = get_text(found["title"]) if "title" in found else "N/A"
+            company = get_text(found["company"]) if "company" in found else "N/A"
+            loc = get_text(found["location"]) if "location" in found else "N/A"
+
+            salary = "N/A"
+            if "salary" in found:
+                salary = get_text(found["salary"]).replace('\n', '').strip()
+            elif "metadata" in found:
+                salary = linkedin_metadata_salary(get_text(found["metadata"]), salary)
+
+            if salary == "N/A":
+                salary = regex_salary(card)
+
+            link = found["link"].attrib['href'] if "link" in found else "N/A"
+
+            offers.append(make_offer(title, company, loc, salary, link, "LinkedIn"))
+        except Exception as e:
+            continue
+
+    return offers
+
+PARSERS = {
+    "bs4": {
+        "InfoJobs": parse_infojobs_bs4,
+        "Indeed": parse_indeed_bs4,
+        "LinkedIn": parse_linkedin_bs4,
+    },
+    "lxml": {
+        "InfoJobs": parse_infojobs_lxml,
+        "Indeed": parse_indeed_lxml,
+        "LinkedIn": parse_linkedin_lxml,
+    },
+}
+
+def parse_offers(source, html, backend=None):
+    backend = backend or DEFAULT_BACKEND
+    if backend == "lxml" and lxml is None:
+        backend = "bs4"
+    return PARSERS[backend][source](html)
@@ -0,0 +1,79 @@
+import re
+
+CURRENCIES = {"€": "EUR", "eur": "EUR", "euros": "EUR", "$": "USD", "usd": "USD", "£": "GBP", "gbp": "GBP"}
+
+# Checked in order, the first match wins
+PERIOD_PATTERNS = [
+    ("hour", re.compile(r"hora|hour|/h\b|/hr\b|\bph\b")),
+    ("day", re.compile(r"\bd[ií]a\b|diario|\bday\b|daily")),
+    ("week", re.compile(r"semana|week")),
+    ("month", re.compile(r"\bmes\b|mensual|month|/mo\b")),
+    ("year", re.compile(r"a[ñn]o|anual|year|annual|/yr\b|\bb/a\b|\bs/a\b")),
+]
+
+# Working time per year, to compare salaries quoted per hour, day, week or month
+PERIODS_PER_YEAR = {"hour": 1760, "day": 220, "week": 52, "month": 12, "year": 1}
+
+# "24.000", "24,000", "1.500,50", "30k", "30 K"
+AMOUNT_PATTERN = re.compile(r"(\d[\d.,]*)\s*(k\b|mil\b)?", re.IGNORECASE)
+
+def parse_amount(number, thousands_suffix):
+    # Dots and commas followed by exactly three digits are thousands separators,
+    # anything else is the decimal mark
+    number = number.rstrip(".,")
+    groups = re.split(r"[.,]", number)
+    if len(groups) > 1 and all(len(g) == 3 for g in groups[1:]):
+        value = float("".join(groups))
+    elif len(groups) > 1:
+        value = float("".join(groups[:-1]) + "." + groups[-1])
+    else:
+        value = float(number)
+    if thousands_suffix:
+        value *= 1000
+    return value
+
+def infer_period(amount):
+    # Listings without a period: Spanish salaries are usually yearly gross, small
+    # numbers are monthly or hourly rates
+    if amount >= 6000:
+        return "year"
+    if amount >= 300:
+        return "month"
+    return "hour"
+
+def parse_salary(text):
+    # "24.000€ - 30.000€ Bruto/año" -> {"salary_min": 24000.0, "salary_max": 30000.0,
+    # "salary_currency": "EUR", "salary_period": "year"}. Unknown parts are None.
+    parsed = {"salary_min": None, "salary_max": None, "salary_currency": None, "salary_period": None}
+    if not text or text == "N/A":
+        return parsed
+    lower = text.lower()
+    amounts = []
+    for match in AMOUNT_PATTERN.finditer(lower):
+        try:
+            amount = parse_amount(match.group(1), match.group(2))
+        except ValueError:
+            continue
+        if amount > 0:
+            amounts.append(amount)
+        if len(amounts) == 2:
+            # "Entre 25 y 30 mil": the suffix applies to both ends of the range
+            if match.group(2) and amounts[0] < 1000 <= amounts[1]:
+                amounts[0] *= 1000
+            break
+    if not amounts:
+        return parsed
+
+    parsed["salary_min"] = min(amounts)
+    parsed["salary_max"] = max(amounts)
+    for symbol, code in CURRENCIES.items():
+        if symbol in lower:
+            parsed["salary_currency"] = code
+            break
+    for period, pattern in PERIOD_PATTERNS:
+        if pattern.search(lower):
+            parsed["salary_period"] = period
+            break
+    else:
+        parsed["salary_period"] = infer_period(parsed["salary_max"])
+    return parsed
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import logging
+import threading
+
+SESSION_VERSION = 1
+
+# CookieParam fields Network.setCookies accepts, out of what Network.getAllCookies returns
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires", "priority", "sourceScheme", "sourcePort")
+
+# Installed with Page.addScriptToEvaluateOnNewDocument so the saved local storage is in
+# place before the site's own scripts (consent banner, bot check) look at it
+RESTORE_STORAGE_JS = """
+(() => {
+    const saved = %s;
+    if (location.origin !== saved.origin) return;
+    try {
+        for (const [key, value] of Object.entries(saved.items)) {
+            if (localStorage.getItem(key) === null) localStorage.setItem(key, value);
+        }
+    } catch (e) {}
+})();
+"""
+
+CAPTURE_STORAGE_JS = "return [location.origin, Object.assign({}, localStorage)];"
+
+def session_reuse_enabled():
+    return os.environ.get("SESSION_REUSE", "1") == "1"
+
+# Browser sessions (cookies and local storage) that got through a site's consent banner
+# and captcha, one JSON file per source. A new driver starts from the saved session so
+# repeat searches land straight on the results. Sessions expire after SESSION_TTL, and
+# one that shows the captcha again is dropped (see invalidate).
+class SessionStore:
+    def __init__(self, directory=None, ttl=None):
+        self.directory = directory or os.environ.get("SESSION_DIR", "sessions")
+        self.ttl = ttl if ttl is not None else float(os.environ.get("SESSION_TTL", 12 * 3600))
+        self.lock = threading.Lock()
+
+    def path(self, source):
+        return os.path.join(self.directory, f"{source.lower()}.json")
+
+    def load(self, source):
+        # The saved session if it is still usable, else None
+        path = self.path(source)
+        try:
+            with open(path, encoding="utf-8") as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.invalidate(source, f"unreadable session file ({e})")
+            return None
+        now = time.time()
+        if not isinstance(session, dict) or session.get("version") != SESSION_VERSION or session.get("source") != source:
+            self.invalidate(source, "unknown session format")
+            return None
+        if now - session.get("saved_at", 0) > self.ttl:
+            self.invalidate(source, "expired")
+            return None
+        # Session cookies (expires -1) only live as long as the saved session itself
+        cookies = [c for c in session.get("cookies", []) if c.get("expires", -1) < 0 or c["expires"] > now]
+        if not cookies:
+            self.invalidate(source, "no cookies left")
+            return None
+        session["cookies"] = cookies
+        return session
+
+    def save(self, source, driver):
+        # Captures the driver's cookies (all domains, httpOnly included) and the local storage
+        # of the page it is on. Only call this once the session got to the results.
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        origin, items = driver.execute_script(CAPTURE_STORAGE_JS)
+        session = {
+            "version": SESSION_VERSION,
+            "source": source,
+            "saved_at": time.time(),
+            "cookies": [{k: c[k] for k in COOKIE_FIELDS if k in c and not (k == "expires" and c.get("session"))} for c in cookies],
+            "local_storage": {"origin": origin, "items": items},
+        }
+        path = self.path(source)
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            # Written aside and renamed so a reader never sees half a file. Cookies are
+            # credentials: owner-only permissions.
+            tmp = f"{path}.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(session, f)
+            os.replace(tmp, path)
+        logging.info(f"Saved {source} session ({len(session['cookies'])} cookies)")
+        return session
+
+    def restore(self, source, driver):
+        # Loads the saved session into a fresh driver, before its first navigation.
+        # Returns the session (pass it to settle() once the first page loaded) or None.
+        session = self.load(source)
+        if session is None:
+            return None
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": session["cookies"]})
+            storage = session.get("local_storage") or {}
+            if storage.get("items"):
+                script = RESTORE_STORAGE_JS % json.dumps(storage)
+                session["script_id"] = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": script})["identifier"]
+        except Exception as e:
+            logging.warning(f"Could not restore {source} session: {e}")
+            return None
+        logging.info(f"Restored {source} session from {time.time() - session['saved_at']:.0f}s ago")
+        return session
+
+    def settle(self, driver, session):
+        # The first page has loaded with the restored storage: stop injecting it, the
+        # driver goes back to the pool afterwards
+        if session is None or "script_id" not in session:
+            return
+        try:
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": session["script_id"]})
+        except Exception as e:
+            logging.debug(f"Could not remove session restore script: {e}")
+
+    def invalidate(self, source, reason):
+        with self.lock:
+            try:
+                os.remove(self.path(source))
+            except FileNotFoundError:
+                return
+            except OSError as e:
+                logging.warning(f"Could not remove {source} session: {e}")
+                return
+        logging.info(f"Dropped {source} session: {reason}")
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_session_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+    return _store
@@ -0,0 +1,135 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Health of one source over its last `window` runs, plus the circuit breaker state.
+#   closed: runs go ahead
+#   open: runs are skipped until the cool-down is over
+#   half_open: one probe run is let through; success closes the circuit, failure opens it
+#   again with twice the cool-down (up to max_cooldown)
+class SourceCircuit:
+    def __init__(self, window, min_runs, failure_rate, cooldown, max_cooldown):
+        self.runs = deque(maxlen=window)
+        self.min_runs = min_runs
+        self.failure_rate = failure_rate
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.opened_at = None
+        self.probing = False
+        self.probe_started = None
+        self.skipped = 0
+        self.last_block = None
+
+    def allow(self, now):
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and (not self.probing or now - self.probe_started >= self.cooldown):
+            # One probe at a time (a probe that never reported back is replaced after a cool-down)
+            self.probing = True
+            self.probe_started = now
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, now, ok, count, latency, block):
+        self.runs.append({"at": now, "ok": ok, "count": count, "latency": latency, "block": block})
+        if block:
+            self.last_block = {"at": now, "reason": block}
+        if self.state == HALF_OPEN and self.probing:
+            self.probing = False
+            if ok:
+                self.state = CLOSED
+                self.cooldown = self.base_cooldown
+                # The failures that opened the circuit are history
+                self.runs.clear()
+                self.runs.append({"at": now, "ok": ok, "count": count, "latency": latency, "block": block})
+            else:
+                self.open(now, min(self.cooldown * 2, self.max_cooldown))
+            return
+        failures = sum(1 for run in self.runs if not run["ok"])
+        if self.state == CLOSED and len(self.runs) >= self.min_runs and failures >= self.failure_rate * len(self.runs):
+            self.open(now, self.cooldown)
+
+    def open(self, now, cooldown):
+        self.state = OPEN
+        self.opened_at = now
+        self.cooldown = cooldown
+
+    def snapshot(self, now):
+        runs = list(self.runs)
+        latencies = sorted(run["latency"] for run in runs)
+        return {
+            "state": self.state,
+            "runs": len(runs),
+            "success_rate": round(sum(1 for run in runs if run["ok"]) / len(runs), 3) if runs else None,
+            "avg_count": round(sum(run["count"] for run in runs) / len(runs), 1) if runs else None,
+            "p50_latency": round(latencies[len(latencies) // 2], 2) if runs else None,
+            "max_latency": round(latencies[-1], 2) if runs else None,
+            "blocks": sum(1 for run in runs if run["block"]),
+            "last_block": self.last_block,
+            "skipped": self.skipped,
+            "retry_in": round(max(0, self.opened_at + self.cooldown - now), 1) if self.state == OPEN else None,
+        }
+
+# Per-source circuits, shared by every search of the process. A run fails when the source
+# errored, timed out or ended on a bot wall; a source whose recent runs mostly failed is
+# skipped for a cool-down instead of spending a browser on it, then probed again.
+class SourceHealth:
+    def __init__(self, window=None, min_runs=None, failure_rate=None, cooldown=None, max_cooldown=None):
+        self.window = window if window is not None else int(os.environ.get("HEALTH_WINDOW", 20))
+        self.min_runs = min_runs if min_runs is not None else int(os.environ.get("HEALTH_MIN_RUNS", 3))
+        self.failure_rate = failure_rate if failure_rate is not None else float(os.environ.get("HEALTH_FAILURE_RATE", 0.6))
+        self.cooldown = cooldown if cooldown is not None else float(os.environ.get("HEALTH_COOLDOWN", 300))
+        self.max_cooldown = max_cooldown if max_cooldown is not None else float(os.environ.get("HEALTH_MAX_COOLDOWN", 3600))
+        self.circuits = {}
+        self.lock = threading.Lock()
+
+    def circuit(self, source):
+        circuit = self.circuits.get(source)
+        if circuit is None:
+            circuit = self.circuits[source] = SourceCircuit(self.window, self.min_runs, self.failure_rate, self.cooldown, self.max_cooldown)
+        return circuit
+
+    def allow(self, source):
+        # Whether a search may run the source now, and the circuit state it ran (or not) under
+        with self.lock:
+            circuit = self.circuit(source)
+            allowed = circuit.allow(time.time())
+            return allowed, circuit.state
+
+    def record(self, source, status, count, latency, block=None):
+        with self.lock:
+            circuit = self.circuit(source)
+            before = circuit.state
+            circuit.record(time.time(), status == "completed", count, latency, block)
+            after = circuit.state
+        if after != before:
+            logging.warning(f"{source} circuit {before} -> {after}" + (f" ({block})" if block else ""))
+        return after
+
+    def snapshot(self, source=None):
+        now = time.time()
+        with self.lock:
+            if source is not None:
+                return self.circuit(source).snapshot(now)
+            return {name: circuit.snapshot(now) for name, circuit in self.circuits.items()}
+
+_health = None
+_health_lock = threading.Lock()
+
+def get_source_health():
+    global _health
+    with _health_lock:
+        if _health is None:
+            _health = SourceHealth()
+    return _health
@@ -0,0 +1,45 @@
+import json
+import queue
+import concurrent.futures
+import pytest
+from backend.cdp import CDPSession, interaction_events
+
+# Replies to nothing: recv() hands out what the test puts in, and a None drops the connection
+class FakeSocket:
+    def __init__(self):
+        self.incoming = queue.Queue()
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+    def recv(self):
+        message = self.incoming.get(timeout=5)
+        if message is None:
+            raise ConnectionError("gone")
+        return json.dumps(message)
+
+def test_dropped_connection_cancels_pending_commands():
+    session = CDPSession("127.0.0.1:0")
+    session.ws = FakeSocket()
+    answered = session.send("Runtime.evaluate", wait=False)
+    unanswered = session.send("Input.dispatchMouseEvent", wait=False)
+    session.ws.incoming.put({"id": session.ws.sent[0]["id"], "result": {"ok": True}})
+    session.ws.incoming.put(None)
+    session.read_loop()
+
+    assert answered.result(1) == {"ok": True}
+    with pytest.raises(concurrent.futures.CancelledError):
+        unanswered.result(1)
+    assert session.pending == {}
+    with pytest.raises(RuntimeError):
+        session.send("Runtime.evaluate", wait=False)
+
+def test_malformed_interaction_messages_are_rejected():
+    events = [{"type": "click", "x": 0.5, "y": 0.25}, {"type": "key", "key": "Enter"}]
+    assert interaction_events({"id": 1, "events": events}) == events
+    assert interaction_events({"id": 2}) == []
+    for message in ([], "click", 3, {"events": {"type": "click"}}, {"events": ["click"]}, {"events": [{"type": "drag"}]},
+                    {"events": [{"type": "move", "x": "left"}]}, {"events": [{"type": "key"}]}):
+        with pytest.raises(ValueError):
+            interaction_events(message)
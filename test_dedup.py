@@ -0,0 +1,36 @@
+from dedup import dedupe_offers
+
+def offer(title, company, location, source, salary="N/A"):
+    return {"title": title, "company": company, "location": location, "salary": salary, "link": f"https://{source.lower()}/{title}", "source": source}
+
+def test_dedupe_merges_the_same_vacancy_across_sources():
+    offers = [
+        offer("Programador Python", "ACME S.L.", "Madrid", "InfoJobs"),
+        offer("Programador/a Python Senior (H/M)", "Beta", "Madrid", "InfoJobs"),
+        offer("PROGRAMADOR PYTHON", "Acme", "Madrid, Comunidad de Madrid", "Indeed", salary="30.000 €"),
+        offer("Programador Python", "Gamma", "Madrid", "LinkedIn"),
+        offer("Programador Python Senior", "Beta", "Madrid", "LinkedIn"),
+    ]
+    results = dedupe_offers(offers)
+
+    assert [r["sources"] for r in results] == [["InfoJobs", "Indeed"], ["InfoJobs", "LinkedIn"], ["LinkedIn"]]
+    # The representative keeps its own link and picks up fields the others had
+    assert results[0]["link"] == "https://infojobs/Programador Python"
+    assert results[0]["salary"] == "30.000 €"
+    assert [l["source"] for l in results[0]["links"]] == ["InfoJobs", "Indeed"]
+
+def test_dedupe_keeps_distinct_listings_of_one_source_apart():
+    offers = [
+        offer("Programador Python", "ACME", "Madrid", "InfoJobs"),
+        offer("Programador Python", "ACME", "N/A", "InfoJobs") | {"link": "https://infojobs/acme-2"},
+        offer("Programador Python", "ACME", "Madrid, España", "InfoJobs") | {"link": "https://infojobs/acme-3"},
+        offer("Programador Python", "ACME", "Madrid", "Indeed"),
+        # The same listing again, from an overlapping result page
+        offer("Programador Python", "ACME", "Madrid", "InfoJobs"),
+    ]
+    results = dedupe_offers(offers)
+
+    assert len(results) == 3
+    assert results[0]["sources"] == ["InfoJobs", "Indeed"]
+    assert [l["link"] for l in results[0]["links"]] == ["https://infojobs/Programador Python", "https://indeed/Programador Python"]
+    assert [r["link"] for r in results[1:]] == ["https://infojobs/acme-2", "https://infojobs/acme-3"]
@@ -0,0 +1,159 @@
+import time
+import threading
+import driver_pool
+from browser_utils import load_pages_in_tabs
+from driver_pool import DriverPool, PooledDriver, RESOURCE_POLICIES, BLOCK_PATTERNS, build_options, apply_resource_policy
+
+# Two tabs that went through InfoJobs and a captcha provider
+class FakeDriver:
+    def __init__(self):
+        self.handles = ["tab-1", "tab-2"]
+        self.current = "tab-1"
+        self.history = {
+            "tab-1": ["https://www.infojobs.net/", "https://www.infojobs.net/jobsearch/search-results/list.xhtml?keyword=dev"],
+            "tab-2": ["about:blank", "https://geo.captcha-delivery.com/captcha/?x=1"],
+        }
+        self.log = []
+        self.switch_to = self
+
+    @property
+    def window_handles(self):
+        return list(self.handles)
+
+    @property
+    def current_window_handle(self):
+        return self.current
+
+    def window(self, handle):
+        self.current = handle
+
+    def new_window(self, kind):
+        self.handles.append("tab-3")
+        self.history["tab-3"] = []
+        self.current = "tab-3"
+        self.log.append(("new_window", kind))
+
+    def close(self):
+        self.handles.remove(self.current)
+        self.log.append(("close", self.current))
+
+    def execute_cdp_cmd(self, method, params):
+        if method == "Page.getNavigationHistory":
+            return {"entries": [{"url": url} for url in self.history[self.current]]}
+        self.log.append((method, params.get("origin")))
+        return {}
+
+def test_reset_clears_the_storage_of_every_visited_site_in_a_fresh_tab():
+    driver = FakeDriver()
+    assert DriverPool(0, 0).reset(PooledDriver(driver, True))
+
+    assert driver.log == [
+        ("new_window", "tab"),
+        ("close", "tab-1"),
+        ("close", "tab-2"),
+        ("Storage.clearDataForOrigin", "https://geo.captcha-delivery.com"),
+        ("Storage.clearDataForOrigin", "https://www.infojobs.net"),
+        ("Network.clearBrowserCookies", None),
+        ("Network.setBlockedURLs", None),
+    ]
+    assert driver.window_handles == ["tab-3"] and driver.current_window_handle == "tab-3"
+
+def test_captcha_policy_keeps_consent_banners_and_full_blocks_extensionless_images(monkeypatch):
+    captcha = [p for group in RESOURCE_POLICIES["captcha"] for p in BLOCK_PATTERNS[group]]
+    assert "*onetrust.*" not in captcha and "*cookielaw.org*" not in captcha
+    assert "*onetrust.*" in [p for group in RESOURCE_POLICIES["full"] for p in BLOCK_PATTERNS[group]]
+
+    prefs = build_options(headless=True).experimental_options.get("prefs", {})
+    assert prefs.get("profile.managed_default_content_settings.images") == 2
+    assert "prefs" not in build_options(headless=False).experimental_options
+    # A headless source that wants images keeps them
+    monkeypatch.setenv("RESOURCE_POLICY_LINKEDIN", "captcha")
+    assert "prefs" not in build_options(headless=True).experimental_options
+
+# A browser that opens tabs with window.open and logs, per tab, blocking and navigation
+class TabbedDriver:
+    def __init__(self):
+        self.tabs = {"main": {"name": "", "log": []}}
+        self.current = "main"
+        self.switch_to = self
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    @property
+    def current_window_handle(self):
+        return self.current
+
+    @property
+    def page_source(self):
+        return self.tabs[self.current]["log"][-1][1]
+
+    def window(self, handle):
+        self.current = handle
+
+    def close(self):
+        del self.tabs[self.current]
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def execute_async_script(self, script, *args):
+        return True
+
+    def execute_script(self, script, *args):
+        if script.startswith("window.open"):
+            self.tabs[f"tab-{len(self.tabs)}"] = {"name": args[0], "log": []}
+        elif script.startswith("return window.name"):
+            return self.tabs[self.current]["name"]
+        elif script.startswith("window.location.href"):
+            self.tabs[self.current]["log"].append(("navigate", args[0]))
+
+    def execute_cdp_cmd(self, method, params):
+        if method == "Network.setBlockedURLs":
+            self.tabs[self.current]["log"].append(("block", len(params["urls"])))
+        return {}
+
+def test_extra_result_tabs_block_before_they_navigate():
+    driver = TabbedDriver()
+    pages = []
+    logs = {}
+    original_close = driver.close
+
+    def close():
+        logs[driver.tabs[driver.current]["name"]] = driver.tabs[driver.current]["log"]
+        original_close()
+
+    driver.close = close
+    load_pages_in_tabs(driver, [(2, "https://indeed/2"), (3, "https://indeed/3")], "div", lambda page, html: pages.append((page, html)) or True,
+                       prepare_tab=lambda tab: apply_resource_policy(tab, "full"))
+
+    assert pages == [(2, "https://indeed/2"), (3, "https://indeed/3")]
+    patterns = sum(len(BLOCK_PATTERNS[group]) for group in RESOURCE_POLICIES["full"])
+    assert logs == {name: [("block", patterns), ("navigate", f"https://indeed/{name[-1]}")] for name in ("page-2", "page-3")}
+    assert driver.window_handles == ["main"] and driver.current_window_handle == "main"
+
+class LaunchedDriver:
+    def quit(self):
+        pass
+
+def test_concurrent_warm_threads_never_overfill_the_pool(monkeypatch):
+    launched = []
+
+    def slow_new_driver(headless):
+        time.sleep(0.05)
+        launched.append(headless)
+        return LaunchedDriver()
+
+    monkeypatch.setattr(driver_pool, "new_driver", slow_new_driver)
+    pool = DriverPool(headless_size=2, headed_size=1)
+    # Startup, a checkin and a kill all warm at the same time
+    threads = [threading.Thread(target=pool.warm) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (len(pool.idle[True]), len(pool.idle[False])) == (2, 1)
+    assert sorted(launched) == [False, True, True]
+    assert pool.warming == {True: 0, False: 0}
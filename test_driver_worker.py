@@ -0,0 +1,66 @@
+import time
+import threading
+import concurrent.futures
+import pytest
+from driver_worker import SerializedDriver
+
+# Records the thread each command runs on and counts commands that overlap
+class FakeDriver:
+    def __init__(self):
+        self.session_id = "abc123"
+        self.threads = set()
+        self.active = 0
+        self.overlaps = 0
+        self.quit_called = threading.Event()
+
+    def command(self, value, delay=0.01):
+        self.active += 1
+        if self.active > 1:
+            self.overlaps += 1
+        self.threads.add(threading.current_thread().name)
+        time.sleep(delay)
+        self.active -= 1
+        return value
+
+    @property
+    def current_url(self):
+        return self.command("about:blank", 0)
+
+    def block(self):
+        self.quit_called.wait(5)
+        raise ConnectionError("browser gone")
+
+    def quit(self):
+        self.quit_called.set()
+
+def test_commands_from_many_threads_run_one_at_a_time_on_the_worker():
+    fake = FakeDriver()
+    driver = SerializedDriver(fake)
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda i: driver.command(i), range(40)))
+
+    assert results == list(range(40))
+    assert fake.overlaps == 0
+    assert fake.threads == {"driver-abc123"}
+    assert driver.current_url == "about:blank"
+    # Plain attributes are read directly
+    assert driver.session_id == "abc123"
+    assert driver.submit(lambda d, x: d.command(x * 2), 21).result(1) == 42
+    driver.quit()
+
+def test_quit_is_not_queued_behind_a_blocked_command():
+    fake = FakeDriver()
+    driver = SerializedDriver(fake)
+    blocked = driver.submit(lambda d: d.block())
+    queued = driver.submit(lambda d: d.command(1))
+    while not blocked.running():
+        time.sleep(0.01)
+    driver.quit()
+
+    assert fake.quit_called.is_set()
+    with pytest.raises(ConnectionError):
+        blocked.result(1)
+    with pytest.raises(concurrent.futures.CancelledError):
+        queued.result(1)
+    with pytest.raises(RuntimeError):
+        driver.command(1)
@@ -0,0 +1,84 @@
+import time
+import threading
+import fanout
+from source_health import SourceHealth
+
+def test_unattended_runs_skip_sources_that_need_a_person(monkeypatch):
+    calls = []
+
+    def captcha_source(query, location, pool=None, report=None, on_page=None, status_callback=None, allow_browser=True):
+        calls.append(allow_browser)
+        return []
+
+    def http_source(query, location, pool=None, report=None, on_page=None):
+        return [{"title": "Dev"}]
+
+    monkeypatch.setattr(fanout, "SOURCES", {"InfoJobs": captcha_source, "Indeed": http_source})
+    monkeypatch.setattr(fanout, "get_client", lambda: None)
+    outcomes = fanout.run_sources("dev", "madrid", health=SourceHealth(), unattended=True)
+    assert calls == []
+    assert outcomes["InfoJobs"]["status"] == "skipped"
+    assert outcomes["InfoJobs"]["reason"] == "needs a person to solve the captcha"
+    assert outcomes["Indeed"]["count"] == 1
+
+    # With API credentials it runs, but may not fall back to the browser
+    monkeypatch.setattr(fanout, "get_client", lambda: object())
+    fanout.run_sources("dev", "madrid", health=SourceHealth(), unattended=True)
+    assert calls == [False]
+
+# Hands each source its own owned pool; killing it is what unblocks a stuck search
+class FakePool:
+    def __init__(self):
+        self.owned = {}
+
+    def for_owner(self, owner):
+        return self.owned.setdefault(owner[1], FakeOwnedPool())
+
+class FakeOwnedPool:
+    def __init__(self):
+        self.killed = threading.Event()
+
+    def kill(self):
+        self.killed.set()
+
+def test_source_over_its_budget_is_killed_and_keeps_its_streamed_pages(monkeypatch):
+    late_pages = []
+
+    def stuck_source(query, location, pool=None, report=None, on_page=None):
+        on_page(1, [{"title": "Dev 1"}])
+        # Stuck on page 2 until its browser is killed
+        assert pool.killed.wait(5)
+        late_pages.append(on_page(2, [{"title": "Dev 2"}]))
+        return [{"title": "Dev 1"}, {"title": "Dev 2"}]
+
+    def quick_source(query, location, pool=None, report=None, on_page=None):
+        return [{"title": "QA"}]
+
+    monkeypatch.setattr(fanout, "SOURCES", {"Indeed": stuck_source, "LinkedIn": quick_source})
+    pool = FakePool()
+    started = time.time()
+    outcomes = fanout.run_sources("dev", "madrid", pool=pool, health=SourceHealth(), deadline=5,
+                                  budgets={"Indeed": 0.2, "LinkedIn": 5})
+
+    assert time.time() - started < 2
+    assert pool.owned["Indeed"].killed.is_set() and not pool.owned["LinkedIn"].killed.is_set()
+    assert outcomes["Indeed"]["status"] == "timed_out"
+    assert outcomes["Indeed"]["offers"] == [{"title": "Dev 1"}] and outcomes["Indeed"]["count"] == 1
+    assert outcomes["LinkedIn"]["status"] == "completed" and outcomes["LinkedIn"]["offers"] == [{"title": "QA"}]
+    # The page that arrives after the cut-off is dropped and stops the source
+    for _ in range(50):
+        if late_pages:
+            break
+        time.sleep(0.01)
+    assert late_pages == [False]
+
+def test_overall_deadline_caps_every_source_budget(monkeypatch):
+    def stuck_source(query, location, pool=None, report=None, on_page=None):
+        pool.killed.wait(5)
+        return []
+
+    monkeypatch.setattr(fanout, "SOURCES", {"Indeed": stuck_source, "LinkedIn": stuck_source})
+    pool = FakePool()
+    outcomes = fanout.run_sources("dev", "madrid", pool=pool, health=SourceHealth(), deadline=0.2, budgets={"Indeed": 60, "LinkedIn": 60})
+    assert {source: outcome["status"] for source, outcome in outcomes.items()} == {"Indeed": "timed_out", "LinkedIn": "timed_out"}
+    assert all(owned.killed.is_set() for owned in pool.owned.values())
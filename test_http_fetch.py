@@ -0,0 +1,24 @@
+import indeed_search
+from http_fetch import try_http_first
+from test_parsing import load_fixture
+
+CHALLENGE_SCRIPT = '<script src="/cdn-cgi/challenge-platform/scripts/jsd/main.js"></script>'
+
+def search_indeed_over(html, monkeypatch):
+    monkeypatch.setenv("HTTP_FIRST", "1")
+    monkeypatch.setattr(indeed_search, "fetch_html", lambda url, params=None: html)
+    report = {}
+    return try_http_first("Indeed", lambda: indeed_search.search_indeed_http("python", "madrid"), report), report
+
+def test_result_page_with_a_challenge_script_is_accepted(monkeypatch):
+    # Cloudflare adds its challenge script to ordinary pages too
+    html = load_fixture("Indeed").replace("</body>", CHALLENGE_SCRIPT + "</body>")
+    offers, report = search_indeed_over(html, monkeypatch)
+    assert len(offers) == 4
+    assert report["fetch_mode"] == "http"
+
+def test_card_less_block_page_falls_back_to_the_browser(monkeypatch):
+    html = f"<html><head><title>Just a moment...</title>{CHALLENGE_SCRIPT}</head><body></body></html>"
+    offers, report = search_indeed_over(html, monkeypatch)
+    assert offers is None
+    assert report["fallback_reason"] == "blocked: block page (challenge-platform)"
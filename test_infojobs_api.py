@@ -0,0 +1,103 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import infojobs_search
+from infojobs_api import InfoJobsClient
+
+# Local stand-in for the InfoJobs API: 3 pages of 2 offers each plus an OAuth token endpoint
+class StubHandler(BaseHTTPRequestHandler):
+    token_requests = 0
+    page_requests = []
+    failing_pages = set()
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        StubHandler.token_requests += 1
+        self.reply(200, {"access_token": "stub-token", "expires_in": 3600})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if self.headers.get("Authorization") != "Bearer stub-token":
+            return self.reply(401, {"error": "unauthorized"})
+        page = int(parse_qs(url.query)["page"][0])
+        StubHandler.page_requests.append(page)
+        if page in StubHandler.failing_pages:
+            return self.reply(500, {"error": "internal"})
+        items = [{
+            "title": f"Programador Python {page}-{i}",
+            "author": {"name": "ACME S.L."},
+            "city": "Madrid",
+            "province": {"id": 33, "value": "Madrid"},
+            "link": f"//www.infojobs.net/madrid/of-{page}{i}",
+            "salaryMin": {"value": "24.000€"},
+            "salaryMax": {"value": "30.000€"},
+            "salaryPeriod": {"value": "Bruto/año"},
+        } for i in range(2)]
+        self.reply(200, {"currentPage": page, "totalPages": 3, "items": items})
+
+def test_infojobs_client_against_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        client = InfoJobsClient("id", "secret", base_url=base, token_url=f"{base}/oauth/token")
+        offers = client.search("python madrid", max_pages=5, page_size=2)
+        again = client.search("python madrid", max_pages=1, page_size=2)
+    finally:
+        server.shutdown()
+
+    # Pages are fetched in parallel but returned in page order, mapped to the scraper schema
+    assert [o["title"] for o in offers] == [f"Programador Python {p}-{i}" for p in (1, 2, 3) for i in range(2)]
+    assert offers[0] == {
+        "title": "Programador Python 1-0",
+        "company": "ACME S.L.",
+        "location": "Madrid",
+        "salary": "24.000€ - 30.000€ Bruto/año",
+        "salary_min": 24000.0,
+        "salary_max": 30000.0,
+        "salary_currency": "EUR",
+        "salary_period": "year",
+        "link": "https://www.infojobs.net/madrid/of-10",
+        "source": "InfoJobs",
+    }
+    assert len(again) == 2
+    assert sorted(StubHandler.page_requests) == [1, 1, 2, 3]
+    # The token is fetched once and reused by every page request
+    assert StubHandler.token_requests == 1
+
+def test_failure_after_the_first_page_keeps_it_without_the_browser(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(StubHandler, "failing_pages", {2})
+    monkeypatch.setattr(infojobs_search, "get_client", lambda: client)
+    monkeypatch.setattr("infojobs_api.get_client", lambda: client)
+
+    def no_browser(*args, **kwargs):
+        raise AssertionError("fell back to the browser")
+
+    monkeypatch.setattr(infojobs_search, "acquire_driver", no_browser)
+    delivered = []
+    report = {}
+    try:
+        client = InfoJobsClient("id", "secret", base_url=base, token_url=f"{base}/oauth/token")
+        offers = infojobs_search.search_infojobs("python", "madrid", report=report, pages=3,
+                                                 on_page=lambda page, offers: delivered.append((page, len(offers))))
+    finally:
+        server.shutdown()
+
+    assert [o["title"] for o in offers] == ["Programador Python 1-0", "Programador Python 1-1"]
+    assert delivered == [(1, 2)]
+    assert report["fetch_mode"] == "api"
@@ -0,0 +1,105 @@
+import time
+import threading
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+import backend.main as main
+from backend.events import EventBroker
+from backend.job_store import JobStore
+from backend.offer_store import OfferStore
+from backend.result_cache import ResultCache
+from backend.scheduler import JobScheduler
+
+@pytest.fixture
+def app_state(tmp_path, monkeypatch):
+    # Fresh stores and a scheduler running one job at a time; searches block until released
+    store = OfferStore(path=str(tmp_path / "offers.db"))
+    store.start()
+    release = threading.Event()
+    started = []
+
+    def fake_search(job_id, query, location, sources=None, pages=None, max_results=None):
+        started.append(job_id)
+        release.wait(5)
+
+    monkeypatch.setattr(main, "offer_store", store)
+    monkeypatch.setattr(main, "jobs", JobStore())
+    monkeypatch.setattr(main, "events", EventBroker())
+    monkeypatch.setattr(main, "result_cache", ResultCache())
+    monkeypatch.setattr(main, "inflight", {})
+    monkeypatch.setattr(main, "scheduler", JobScheduler(max_browsers=3, browsers_per_job=3, max_queued=1, max_queued_per_client=1))
+    monkeypatch.setattr(main, "run_search_job", fake_search)
+    yield SimpleNamespace(store=store, started=started)
+    release.set()
+    main.scheduler.shutdown()
+    store.stop()
+
+def start(query, client="client-a"):
+    request = SimpleNamespace(headers={"X-Client-Id": client}, client=None)
+    return main.start_job(main.SearchRequest(query=query, location="madrid"), request)
+
+def test_identical_search_follows_the_running_one(app_state):
+    leader = start("python")
+    main.publish_source(leader["job_id"], "Indeed", "completed", [{"title": "Dev", "source": "Indeed", "link": "https://i/1"}])
+
+    follower = start("Python ", client="client-b")
+    assert follower["coalesced"] is True
+    assert app_state.started == [leader["job_id"]]
+    # The follower catches up on what the leader already had, then mirrors its updates
+    assert [o["link"] for o in main.jobs[follower["job_id"]]["results"]] == ["https://i/1"]
+    main.publish_source(leader["job_id"], "LinkedIn", "completed", [{"title": "Dev", "source": "LinkedIn", "link": "https://l/1"}])
+    assert main.jobs[follower["job_id"]]["sources"]["LinkedIn"]["count"] == 1
+
+    # An evicted follower is detached: the leader keeps publishing without it
+    del main.jobs[follower["job_id"]]
+    assert main.attached_jobs(leader["job_id"]) == [leader["job_id"]]
+    main.finish_job(leader["job_id"])
+    assert main.jobs[leader["job_id"]]["status"] == "completed"
+
+def test_searches_beyond_the_queue_are_shed_with_429(app_state):
+    running = start("python")
+    queued = start("java", client="client-b")
+    assert queued["queue_position"] == 1
+
+    with pytest.raises(HTTPException) as rejected:
+        start("rust", client="client-c")
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers["Retry-After"] == "30"
+    assert len(main.jobs.jobs) == 2
+    app_state.store.flush()
+    statuses = [row[0] for row in app_state.store.reader().execute("SELECT status FROM jobs ORDER BY created_at")]
+    assert statuses[-1] == "rejected"
+    assert app_state.started == [running["job_id"]]
+
+def job(status, results, updated_at):
+    return {"id": status, "status": status, "results": results, "sources": {}, "driver": None,
+            "created_at": updated_at, "updated_at": updated_at, "last_seen": updated_at}
+
+def test_job_store_expires_finished_jobs_and_keeps_under_the_byte_cap():
+    evicted = []
+    store = JobStore(ttl=60, max_result_bytes=300, on_evict=evicted.append)
+    now = time.time()
+    store["old"] = job("completed", [], now - 120)
+    store["big-1"] = job("completed", [{"title": "x" * 200}], now - 30)
+    store["big-2"] = job("completed", [{"title": "y" * 200}], now - 10)
+    store["running"] = job("running", [{"title": "z" * 50}], now - 500)
+    store.reap()
+
+    # Expired by TTL first, then the oldest finished job until the results fit
+    assert evicted == ["old", "big-1"]
+    assert sorted(store.jobs) == ["big-2", "running"]
+    assert store.stats()["expired"] == 1 and store.stats()["evicted_for_size"] == 1
+
+def test_job_store_quits_the_browser_of_an_abandoned_captcha():
+    quit = []
+    store = JobStore(abandon_timeout=30, quit_driver=quit.append)
+    store["captcha"] = job("waiting_input", [], time.time() - 60)
+    store["captcha"]["driver"] = "driver-1"
+    store.reap()
+    assert quit == ["driver-1"] and store["captcha"]["driver"] is None
+
+def test_job_results_only_accept_known_sort_orders():
+    # Validated by FastAPI (422) rather than silently sorting ascending
+    parameters = {p["name"]: p["schema"] for p in main.app.openapi()["paths"]["/jobs/{job_id}"]["get"]["parameters"]}
+    assert parameters["order"]["enum"] == ["asc", "desc"]
+    assert parameters["sort"]["anyOf"][0]["enum"] == ["salary", "title", "company", "location", "source"]
@@ -0,0 +1,13 @@
+from backend.offer_filters import filter_offers
+
+OFFERS = [
+    {"title": "Dev", "company": "ACME", "location": "Madrid", "source": "InfoJobs", "sources": ["InfoJobs", "LinkedIn"]},
+    {"title": "Data", "company": "Beta", "location": "Madrid", "source": "Indeed"},
+    {"title": "QA", "company": "Gamma", "location": "Madrid", "source": "LinkedIn"},
+]
+
+def test_source_filter_matches_whole_source_names():
+    assert [o["title"] for o in filter_offers(OFFERS, source="linkedin")] == ["Dev", "QA"]
+    assert [o["title"] for o in filter_offers(OFFERS, source="Indeed, InfoJobs")] == ["Dev", "Data"]
+    assert filter_offers(OFFERS, source="in") == []
+    assert filter_offers(OFFERS, source="jobs") == []
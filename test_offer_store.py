@@ -0,0 +1,59 @@
+from backend.offer_store import OfferStore
+
+def offer(source, title, **fields):
+    return {"title": title, "company": "ACME", "location": "Madrid", "source": source, "link": "https://indeed/1", **fields}
+
+def test_jobs_sharing_a_link_keep_their_own_results(tmp_path):
+    store = OfferStore(path=str(tmp_path / "offers.db"), flush_interval=0)
+    store.start()
+    try:
+        store.save_job("A", "python", "madrid", "running")
+        store.save_job("B", "python", "madrid", "running")
+        store.add_offers("A", [offer("Indeed", "Programador Python")])
+        store.set_results("A", [offer("Indeed", "Programador Python", sources=["Indeed", "LinkedIn"])])
+        # A later job finds the same link with different contents
+        store.add_offers("B", [offer("Indeed", "Programador Python Senior", salary_min=40000)])
+        store.flush()
+
+        assert store.load_job("A")["results"] == [offer("Indeed", "Programador Python", sources=["Indeed", "LinkedIn"])]
+        assert store.load_job("B")["results"] == [offer("Indeed", "Programador Python Senior", salary_min=40000)]
+        # Search sees the latest version of the link
+        assert store.search("senior")[0]["salary_min"] == 40000
+    finally:
+        store.stop()
+
+def test_writer_survives_a_failing_write_and_releases_flushers(tmp_path):
+    store = OfferStore(path=str(tmp_path / "offers.db"), flush_interval=0)
+    store.start()
+    try:
+        store.save_job("A", "python", "madrid", "running")
+        store.flush()
+        # Not JSON serializable: the batch is dropped, the writer carries on
+        store.add_offers("A", [offer("Indeed", object())])
+        assert store.flush(timeout=5) is True
+        store.add_offers("A", [offer("Indeed", "Dev")])
+        assert store.flush(timeout=5) is True
+        assert [o["title"] for o in store.load_job("A")["results"]] == ["Dev"]
+    finally:
+        store.stop()
+
+def test_search_folds_accents_and_matches_prefixes(tmp_path):
+    store = OfferStore(path=str(tmp_path / "offers.db"), flush_interval=0)
+    store.start()
+    try:
+        store.add_offers("A", [
+            offer("Indeed", "Programador Python híbrido") | {"link": "https://indeed/1"},
+            offer("LinkedIn", "Analista de datos remoto") | {"link": "https://linkedin/2", "company": "Compañía Beta"},
+        ])
+        store.flush()
+
+        # Accents are folded both ways
+        assert [o["link"] for o in store.search("hibrido")] == ["https://indeed/1"]
+        assert [o["link"] for o in store.search("híbrido")] == ["https://indeed/1"]
+        assert [o["link"] for o in store.search("compania")] == ["https://linkedin/2"]
+        assert [o["link"] for o in store.search("progra pyth")] == ["https://indeed/1"]
+        assert store.search("python", source="LinkedIn") == []
+        # FTS syntax in the query is taken as plain words
+        assert store.search('"python" OR NEAR(') == []
+    finally:
+        store.stop()
@@ -1,85 +1,42 @@
-from bs4 import BeautifulSoup
+import os
 import json
+from parsers import PARSERS, parse_offers
 
-def test_parsing():
-    try:
-        with open('debug_infojobs_manual.html', 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        soup = BeautifulSoup(content, 'html.parser')
-        offers = []
+# Saved result pages, one per source (checked in: the scrapers overwrite their debug dumps)
+FIXTURES = {
+    "InfoJobs": "infojobs_search.html",
+    "Indeed": "indeed_search.html",
+    "LinkedIn": "linkedin_search.html",
+}
 
-        # Try to find job cards with the new structure (divs instead of lis)
-        job_items = soup.find_all('div', class_='sui-AtomCard')
-        
-        if not job_items:
-             # Fallback to finding by title class if card container is elusive
-             print("Standard card container not found, trying to find by title class...")
-             titles = soup.find_all('h2', class_='ij-OfferCardContent-description-title')
-             job_items = [t.find_parent('div', class_='sui-AtomCard') for t in titles if t.find_parent('div', class_='sui-AtomCard')]
+def load_fixture(source):
+    with open(os.path.join(os.path.dirname(__file__), "fixtures", FIXTURES[source]), 'r', encoding='utf-8') as f:
+        return f.read()
 
-        print(f"Found {len(job_items)} potential job cards.")
+def test_parsing():
+    # Every parser backend must produce exactly the offers of the BeautifulSoup reference
+    for source in FIXTURES:
+        content = load_fixture(source)
+        offers = parse_offers(source, content, backend="bs4")
+        assert offers, f"no {source} offers in the fixture"
+        for backend in PARSERS:
+            assert parse_offers(source, content, backend=backend) == offers, f"{backend} output differs for {source}"
 
-        for card in job_items:
-            try:
-                # Title
-                title_elem = card.find('a', class_='ij-OfferCardContent-description-title-link')
-                if not title_elem:
-                    # Try h2
-                    title_elem = card.find('h2', class_='ij-OfferCardContent-description-title')
-                
-                title = title_elem.get_text(strip=True) if title_elem else "N/A"
-                
-                # Link
-                link = "N/A"
-                if title_elem and title_elem.name == 'a':
-                    link = title_elem['href']
-                elif title_elem and title_elem.find('a'):
-                    link = title_elem.find('a')['href']
-                
-                if link != "N/A":
-                    if link.startswith("//"):
-                        link = "https:" + link
-                    elif link.startswith("/"):
-                        link = "https://www.infojobs.net" + link
-                
-                # Company
-                company_elem = card.find('h3', class_='ij-OfferCardContent-description-subtitle')
-                company = company_elem.get_text(strip=True) if company_elem else "N/A"
-                
-                # Location and Date
-                loc = "N/A"
-                date_posted = "N/A"
-                details_list = card.find('ul', class_='ij-OfferCardContent-description-list')
-                if details_list:
-                    items = details_list.find_all('li')
-                    for item in items:
-                        text = item.get_text(strip=True)
-                        # Heuristic: Location usually doesn't have "hace" (date) or contract types
-                        if "hace" in text.lower():
-                            date_posted = text
-                        elif "presencial" in text.lower() or "híbrido" in text.lower() or "teletrabajo" in text.lower():
-                            pass
-                        elif len(text) < 30 and "contrato" not in text.lower() and "jornada" not in text.lower():
-                             if loc == "N/A":
-                                 loc = text
-                
-                offer = {
-                    "title": title,
-                    "company": company,
-                    "location": loc,
-                    "link": link,
-                    "source": "InfoJobs"
-                }
-                offers.append(offer)
-            except Exception as e:
-                print(f"Error parsing card: {e}")
-                continue
-        
+        print(f"Found {len(offers)} {source} offers.")
         print(json.dumps(offers, indent=2, ensure_ascii=False))
 
-    except Exception as e:
-        print(f"Error: {e}")
+def test_indeed_and_linkedin_fields():
+    indeed = parse_offers("Indeed", load_fixture("Indeed"), backend="bs4")
+    assert [o["company"] for o in indeed] == ["Acme Software S.L.", "Beta Consulting", "Gamma Data", "Delta   Services"]
+    assert indeed[0]["link"] == "https://es.indeed.com/rc/clk?jk=3f1e6b2a9c0d1e2f&bb=abc"
+    # Salary from the snippet, the metadata block, the card text, or none at all
+    assert [o["salary"] for o in indeed] == ["30.000 € - 38.000 € al año", "Desde 2.100 € al mes", "45.000 €", "N/A"]
+
+    linkedin = parse_offers("LinkedIn", load_fixture("LinkedIn"), backend="bs4")
+    assert [o["title"] for o in linkedin] == ["Programador Python", "Backend Developer (Python/Go)", "Data Analyst", "Prácticas en desarrollo web"]
+    assert linkedin[0]["salary_min"] == 35000 and linkedin[0]["salary_period"] == "year"
+    assert linkedin[2]["salary"] == "28.000€"
+    assert linkedin[3]["link"] == "N/A"
 
 if __name__ == "__main__":
     test_parsing()
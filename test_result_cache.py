@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+from backend.result_cache import ResultCache, cache_key
+
+def test_entries_go_stale_then_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("backend.result_cache.time", SimpleNamespace(time=lambda: now[0]))
+    cache = ResultCache(ttl=60, stale_ttl=300, max_entries=10, max_bytes=10000)
+    key = cache_key("Indeed", " Programador  Python", "Madrid")
+    assert key == cache_key("Indeed", "programador python", "madrid")
+    cache.put(key, [{"title": "Dev"}])
+
+    assert cache.get(key) == ([{"title": "Dev"}], "fresh")
+    now[0] += 61
+    assert cache.get(key) == ([{"title": "Dev"}], "stale")
+    # Stale results are served while a single background refresh runs
+    assert cache.start_refresh(key) is True
+    assert cache.start_refresh(key) is False
+    assert cache.get(key) == ([{"title": "Dev"}], "stale")
+    cache.put(key, [{"title": "Dev 2"}])
+    cache.end_refresh(key)
+    assert cache.get(key) == ([{"title": "Dev 2"}], "fresh")
+    assert cache.start_refresh(key) is True
+
+    now[0] += 301
+    assert cache.get(key) == (None, None)
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"], stats["expired"], stats["entries"]) == (2, 2, 1, 1, 0)
+
+def test_least_recently_used_entries_are_evicted_by_count_and_size():
+    cache = ResultCache(ttl=60, stale_ttl=300, max_entries=2, max_bytes=10000)
+    cache.put("a", [{"title": "A"}])
+    cache.put("b", [{"title": "B"}])
+    cache.get("a")
+    cache.put("c", [{"title": "C"}])
+    assert list(cache.entries) == ["a", "c"]
+
+    size = cache.entries["a"][1]
+    cache = ResultCache(ttl=60, stale_ttl=300, max_entries=10, max_bytes=2 * size)
+    for key in ("a", "b", "c"):
+        cache.put(key, [{"title": key.upper()}])
+    assert list(cache.entries) == ["b", "c"] and cache.total_bytes == 2 * size
+    # An entry bigger than the whole cache is not stored
+    cache.put("huge", [{"title": "x" * 100}])
+    assert "huge" not in cache.entries and cache.stats()["evictions"] == 1
@@ -0,0 +1,10 @@
+from salary import parse_salary
+
+def test_parse_salary_formats():
+    assert parse_salary("24.000€ - 30.000€ Bruto/año") == {"salary_min": 24000.0, "salary_max": 30000.0, "salary_currency": "EUR", "salary_period": "year"}
+    assert parse_salary("De 1.500 € a 2.000 € al mes")["salary_period"] == "month"
+    assert parse_salary("12,50 € por hora")["salary_min"] == 12.5
+    assert parse_salary("30K-40K €")["salary_max"] == 40000.0
+    # Regex fallback from the card text, no period given
+    assert parse_salary("30.000 - 35.000 € (Est.)")["salary_period"] == "year"
+    assert parse_salary("N/A")["salary_min"] is None
@@ -0,0 +1,51 @@
+from backend.saved_searches import SavedSearchStore, SavedSearchScheduler
+
+def offer(n):
+    return {"title": f"Dev {n}", "source": "Indeed", "link": f"https://indeed/{n}"}
+
+def refresher(pages, outcome="completed", error=None):
+    # A refresh that delivers `pages` newest first and records whether paging went on
+    calls = []
+
+    def refresh(run_id, search, delta):
+        for page, offers in enumerate(pages, 1):
+            calls.append(delta.on_page("Indeed", page, offers))
+            if calls[-1] is False:
+                break
+        if error:
+            raise error
+        return {"Indeed": {"status": outcome}}
+
+    return refresh, calls
+
+def run(store, search, refresh):
+    scheduler = SavedSearchScheduler(store, submit=None, refresh=refresh)
+    scheduler.run_refresh(f"run-{len(store.runs(search['id'])) + 1}", search)
+    return store.runs(search["id"], limit=1)[0]
+
+def test_refresh_stops_at_the_watermark_and_only_advances_it_on_success(tmp_path):
+    store = SavedSearchStore(path=str(tmp_path / "offers.db"))
+    store.start()
+    search = store.create("client-a", "python", "madrid", pages=3, interval=3600)
+
+    # First refresh: the whole search is the baseline
+    refresh, calls = refresher([[offer(3), offer(2)], [offer(1)]])
+    run(store, search, refresh)
+    assert calls == [True, True]
+    assert store.watermarks(search["id"])["Indeed"]["newest_key"] == "https://indeed/3"
+
+    # Two new offers on top: paging stops on the page that reaches the previous newest
+    refresh, calls = refresher([[offer(5), offer(4), offer(3)], [offer(2), offer(1)]])
+    latest = run(store, search, refresh)
+    assert calls == [False]
+    assert latest["new_count"] == 2 and latest["sources"]["Indeed"]["stopped_early"] is True
+    assert store.watermarks(search["id"])["Indeed"]["newest_key"] == "https://indeed/5"
+
+    # Neither a failed run nor a source that timed out moves the watermark
+    for refresh, _ in (refresher([[offer(7), offer(6)]], error=RuntimeError("boom")), refresher([[offer(7), offer(6)]], outcome="timed_out")):
+        run(store, search, refresh)
+        marks = store.watermarks(search["id"])["Indeed"]
+        assert marks["newest_key"] == "https://indeed/5"
+        assert "https://indeed/7" not in marks["seen"]
+    assert [r["status"] for r in store.runs(search["id"], limit=2)][::-1] == ["failed", "completed"]
+    assert store.runs(search["id"], limit=1)[0]["sources"]["Indeed"]["failed"] == "timed_out"
@@ -0,0 +1,63 @@
+import os
+import json
+import time
+from session_store import SessionStore
+
+# Answers the CDP and script calls the store makes, like a driver on an InfoJobs page
+class FakeDriver:
+    def __init__(self, cookies=None):
+        self.cookies = cookies or []
+        self.commands = []
+
+    def execute_cdp_cmd(self, method, params):
+        self.commands.append((method, params))
+        if method == "Network.getAllCookies":
+            return {"cookies": self.cookies}
+        if method == "Page.addScriptToEvaluateOnNewDocument":
+            return {"identifier": "7"}
+        return {}
+
+    def execute_script(self, script):
+        return ["https://www.infojobs.net", {"didomi_token": "abc"}]
+
+COOKIES = [
+    {"name": "JSESSIONID", "value": "1", "domain": "www.infojobs.net", "path": "/", "expires": -1, "session": True,
+     "httpOnly": True, "secure": True, "size": 11},
+    {"name": "didomi_token", "value": "x", "domain": ".infojobs.net", "path": "/", "expires": time.time() + 3600, "session": False,
+     "httpOnly": False, "secure": True, "sameSite": "Lax", "size": 13},
+    {"name": "old", "value": "y", "domain": ".infojobs.net", "path": "/", "expires": time.time() - 10, "session": False},
+]
+
+def test_saved_session_is_restored_into_a_new_driver(tmp_path):
+    store = SessionStore(directory=str(tmp_path), ttl=60)
+    store.save("InfoJobs", FakeDriver(COOKIES))
+    assert oct(os.stat(store.path("InfoJobs")).st_mode & 0o777) == "0o600"
+
+    driver = FakeDriver()
+    session = store.restore("InfoJobs", driver)
+    methods = [method for method, _ in driver.commands]
+    assert methods == ["Network.enable", "Network.setCookies", "Page.addScriptToEvaluateOnNewDocument"]
+    cookies = driver.commands[1][1]["cookies"]
+    # Expired cookies are dropped, session cookies kept, fields setCookies rejects removed
+    assert [c["name"] for c in cookies] == ["JSESSIONID", "didomi_token"]
+    assert "size" not in cookies[0] and "expires" not in cookies[0]
+    assert "didomi_token" in driver.commands[2][1]["source"]
+
+    store.settle(driver, session)
+    assert driver.commands[-1] == ("Page.removeScriptToEvaluateOnNewDocument", {"identifier": "7"})
+
+def test_expired_and_broken_sessions_are_dropped(tmp_path):
+    store = SessionStore(directory=str(tmp_path), ttl=60)
+    store.save("InfoJobs", FakeDriver(COOKIES))
+    with open(store.path("InfoJobs")) as f:
+        session = json.load(f)
+    session["saved_at"] -= 120
+    with open(store.path("InfoJobs"), "w") as f:
+        json.dump(session, f)
+    assert store.restore("InfoJobs", FakeDriver()) is None
+    assert not os.path.exists(store.path("InfoJobs"))
+
+    with open(store.path("InfoJobs"), "w") as f:
+        f.write("{not json")
+    assert store.load("InfoJobs") is None
+    assert not os.path.exists(store.path("InfoJobs"))
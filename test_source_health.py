@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+import fanout
+from source_health import SourceHealth
+
+def test_circuit_opens_on_blocks_and_closes_after_a_good_probe(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("source_health.time", SimpleNamespace(time=lambda: now[0]))
+    health = SourceHealth(window=10, min_runs=3, failure_rate=0.6, cooldown=60, max_cooldown=240)
+
+    health.record("Indeed", "completed", 25, 3.0)
+    # Two bot walls out of three runs
+    for _ in range(2):
+        assert health.allow("Indeed") == (True, "closed")
+        health.record("Indeed", "blocked", 0, 11.0, block="block page (cf-challenge)")
+    assert health.allow("Indeed") == (False, "open")
+    assert health.snapshot("Indeed")["last_block"]["reason"] == "block page (cf-challenge)"
+
+    # After the cool-down a single probe goes through; failing it doubles the cool-down
+    now[0] += 61
+    assert health.allow("Indeed") == (True, "half_open")
+    assert health.allow("Indeed") == (False, "half_open")
+    health.record("Indeed", "blocked", 0, 10.0, block="HTTP 403")
+    now[0] += 61
+    assert health.allow("Indeed")[0] is False
+    assert health.snapshot("Indeed")["retry_in"] == 59
+
+    now[0] += 60
+    assert health.allow("Indeed") == (True, "half_open")
+    health.record("Indeed", "completed", 20, 4.0)
+    assert health.allow("Indeed") == (True, "closed")
+    assert health.snapshot("Indeed")["runs"] == 1
+
+def test_run_sources_skips_sources_with_an_open_circuit(monkeypatch):
+    calls = []
+
+    def blocked(query, location, pool=None, report=None, on_page=None):
+        calls.append("Indeed")
+        report["blocked"] = "authwall"
+        return []
+
+    def working(query, location, pool=None, report=None, on_page=None):
+        calls.append("LinkedIn")
+        return [{"title": "Dev"}]
+
+    monkeypatch.setattr(fanout, "SOURCES", {"Indeed": blocked, "LinkedIn": working})
+    health = SourceHealth(window=5, min_runs=2, failure_rate=0.5, cooldown=300)
+    for _ in range(2):
+        outcomes = fanout.run_sources("dev", "madrid", health=health)
+        assert outcomes["Indeed"]["status"] == "blocked"
+
+    outcomes = fanout.run_sources("dev", "madrid", health=health)
+    assert calls.count("Indeed") == 2 and calls.count("LinkedIn") == 3
+    assert outcomes["Indeed"]["status"] == "skipped"
+    assert outcomes["Indeed"]["circuit"] == "open"
+    assert outcomes["LinkedIn"] == {"status": "completed", "count": 1, "circuit": "closed", "offers": [{"title": "Dev"}]}